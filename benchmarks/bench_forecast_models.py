@@ -0,0 +1,54 @@
+"""
+    Compares fit time and score of BTCForecast model types as the history grows.
+
+    Every 10th rate is held out; the hold-out score is R^2 of predictions at the held-out end times.
+    The exact SVR is skipped above --max-svr-rows rows.
+
+    Usage: python benchmarks/bench_forecast_models.py [--max-svr-rows N] [num_of_rows ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bitcoin_forecast import BTCForecast
+from synthetic import make_rates
+
+
+def measure(model_type, rates_train, rates_test):
+    forecast = BTCForecast(model_type)
+
+    start = time.perf_counter()
+    score = forecast.learn(rates_train)
+    fit_time = time.perf_counter() - start
+
+    predicted = forecast.predict(rates_test)
+    hold_out_score = 1 - np.sum((rates_test.prices - predicted) ** 2) / \
+        np.sum((rates_test.prices - rates_test.prices.mean()) ** 2)
+    return fit_time, score, hold_out_score
+
+
+def main(sizes, max_svr_rows):
+    print('{:>9} {:>9} {:>10} {:>9} {:>9}'.format('rows', 'model', 'fit s', 'score', 'hold-out'))
+    for num_of_rows in sizes:
+        rates = make_rates(num_of_rows, granularity=60 * 60)
+        is_test = np.arange(num_of_rows) % 10 == 9
+
+        for model_type in ['SVR', 'NYSTROEM']:
+            if model_type == 'SVR' and num_of_rows > max_svr_rows:
+                continue
+            fit_time, score, hold_out_score = measure(model_type, rates[~is_test], rates[is_test])
+            print('{:>9} {:>9} {:>10.3f} {:>9.4f} {:>9.4f}'.format(num_of_rows, model_type, fit_time, score,
+                                                                  hold_out_score))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-svr-rows', type=int, default=20000)
+    parser.add_argument('sizes', type=int, nargs='*', default=[1000, 3000, 10000, 30000, 100000])
+    args = parser.parse_args()
+    main(args.sizes, args.max_svr_rows)
@@ -0,0 +1,38 @@
+"""
+    Compares rows per second of the bulk GDAXRateLog.read() against the row by row reader.
+
+    Usage: python benchmarks/bench_rate_log_read.py [num_of_rows ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bitcoin_forecast import GDAXRateLog
+from synthetic import make_rates
+
+
+def measure(read, num_of_rows):
+    start = time.perf_counter()
+    read()
+    return num_of_rows / (time.perf_counter() - start)
+
+
+def main(sizes):
+    print('{:>10} {:>16} {:>16} {:>8}'.format('rows', 'row reader r/s', 'bulk reader r/s', 'speedup'))
+    for num_of_rows in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            log = GDAXRateLog(os.path.join(directory, 'rate_log.csv'))
+            log.append(make_rates(num_of_rows))
+
+            row_rate = measure(log._read_rows, num_of_rows)
+            bulk_rate = measure(log.read, num_of_rows)
+
+        print('{:>10} {:>16,.0f} {:>16,.0f} {:>7.1f}x'.format(num_of_rows, row_rate, bulk_rate, bulk_rate / row_rate))
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [10 ** 3, 10 ** 4, 10 ** 5])
@@ -0,0 +1,200 @@
+"""
+    Benchmark suite of the hot paths: fetching, parsing, storing, learning and predicting rates.
+
+    Every benchmark runs on synthetic hourly rates (the schema of resources/test_rate_log_2017_sep.csv)
+    of each size up to its own limit. GDAXApi fetches from a local stub server rather than the live API.
+    Results, with the commit and library versions they were measured with, are written as JSON,
+    so that two runs can be compared to find regressions.
+
+    Usage:
+        python benchmarks/run_benchmarks.py [--sizes N ...] [--repeat N] [--filter NAME] [--output FILE]
+        python benchmarks/run_benchmarks.py --compare BASELINE.json CURRENT.json [--threshold 1.2]
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import sklearn
+
+ROOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_PATH)
+
+from bitcoin_forecast import GDAXApi, GDAXRateSeries, GDAXRateLog, GDAXBinaryRateLog, BTCForecast
+from bitcoin_forecast.gdax_sync import _format_iso
+from synthetic import make_rates
+from test.gdax_stub_server import StubGDAXServer
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5]
+GRANULARITY = 60 * 60
+
+# name, maximum number of rows, rows handled per run (all if None),
+# generator(rates, directory) yielding the function to time and cleaning up after it
+BENCHMARKS = []
+
+
+def benchmark(name, max_rows=None, rows_per_run=None):
+    def register(function):
+        BENCHMARKS.append((name, max_rows, rows_per_run, function))
+        return function
+    return register
+
+
+@benchmark('gdax_rate_log.read')
+def bench_rate_log_read(rates, directory):
+    log = GDAXRateLog(os.path.join(directory, 'read.csv'))
+    log.append(rates)
+    yield lambda: GDAXRateLog(log.file_path).read()
+
+
+@benchmark('gdax_rate_log.append')
+def bench_rate_log_append(rates, directory):
+    file_paths = iter(os.path.join(directory, 'append_{}.csv'.format(i)) for i in range(10 ** 6))
+    yield lambda: GDAXRateLog(next(file_paths)).append(rates)
+
+
+@benchmark('gdax_rate_log.append_page', rows_per_run=GDAXApi.MAX_NUM_DATA_POINTS_PER_PAGE)
+def bench_rate_log_append_page(rates, directory):
+    # pages of newer rates appended to a log of the given size, one page per run
+    log = GDAXRateLog(os.path.join(directory, 'append_page.csv'))
+    log.append(rates)
+    page = rates[:GDAXApi.MAX_NUM_DATA_POINTS_PER_PAGE]
+    pages = (GDAXRateSeries(page.start_time + offset, page.end_time + offset, *page.columns()[2:])
+             for offset in itertools.count(rates.end_time[-1] - page.start_time[0], len(page) * GRANULARITY))
+    yield lambda: log.merge(next(pages))
+
+
+@benchmark('gdax_binary_rate_log.read')
+def bench_binary_rate_log_read(rates, directory):
+    file_path = os.path.join(directory, 'read.bin')
+    GDAXBinaryRateLog(file_path, 'BTC-USD', GRANULARITY).append(rates)
+    yield lambda: np.sum(GDAXBinaryRateLog(file_path).read().prices)
+
+
+@benchmark('gdax_rate_series.to_rates', max_rows=10 ** 6)
+def bench_to_rates(rates, directory):
+    yield rates.to_rates
+
+
+@benchmark('gdax_api.get_historic_rates', max_rows=10 ** 5)
+def bench_get_historic_rates(rates, directory):
+    start, end = _format_iso(rates.start_time[0]), _format_iso(rates.start_time[-1])
+    with StubGDAXServer({'BTC-USD': rates}) as server:
+        api = GDAXApi(server.url, max_in_flight=4, requests_per_second=10 ** 6)
+        yield lambda: api.get_historic_rates('BTC-USD', start, end, GRANULARITY)
+
+
+@benchmark('btc_forecast.learn.svr', max_rows=10 ** 4)
+def bench_learn_svr(rates, directory):
+    yield lambda: BTCForecast('SVR').learn(rates)
+
+
+@benchmark('btc_forecast.learn.nystroem', max_rows=10 ** 6)
+def bench_learn_nystroem(rates, directory):
+    yield lambda: BTCForecast('NYSTROEM').learn(rates)
+
+
+@benchmark('btc_forecast.predict.nystroem', max_rows=10 ** 7)
+def bench_predict_nystroem(rates, directory):
+    forecast = BTCForecast('NYSTROEM')
+    forecast.learn(rates[-10 ** 4:])
+    yield lambda: forecast.predict(rates.timestamps)
+
+
+def run(sizes, repeat, name_filter=None):
+    results = []
+    for num_of_rows in sizes:
+        rates = make_rates(num_of_rows, granularity=GRANULARITY)
+        for name, max_rows, rows_per_run, function in BENCHMARKS:
+            if (name_filter and name_filter not in name) or (max_rows and num_of_rows > max_rows):
+                continue
+
+            with tempfile.TemporaryDirectory() as directory, \
+                    contextlib.contextmanager(function)(rates, directory) as timed_function:
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    timed_function()
+                    times.append(time.perf_counter() - start)
+
+            result = {'name': name, 'rows': num_of_rows, 'repeat': repeat, 'min': min(times),
+                      'median': float(np.median(times)), 'mean': float(np.mean(times)),
+                      'rows_per_second': (rows_per_run or num_of_rows) / min(times)}
+            results.append(result)
+            print('{:<32} {:>10} {:>12.6f} {:>16,.0f}'.format(name, num_of_rows, result['min'],
+                                                              result['rows_per_second']))
+    return results
+
+
+def get_metadata():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT_PATH,
+                                         stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(), 'numpy': np.__version__, 'sklearn': sklearn.__version__,
+            'machine': platform.machine(), 'processor': platform.processor(), 'cpu_count': os.cpu_count()}
+
+
+def compare(baseline_file_path, current_file_path, threshold):
+    """
+    Prints time ratios of benchmarks in both runs.
+
+    :return: number of benchmarks slower than threshold times the baseline
+    """
+    with open(baseline_file_path) as baseline_file, open(current_file_path) as current_file:
+        baseline = {(result['name'], result['rows']): result for result in json.load(baseline_file)['results']}
+        current = json.load(current_file)['results']
+
+    num_of_regressions = 0
+    print('{:<32} {:>10} {:>12} {:>12} {:>8}'.format('benchmark', 'rows', 'baseline s', 'current s', 'ratio'))
+    for result in current:
+        if (result['name'], result['rows']) not in baseline:
+            continue
+        baseline_time = baseline[(result['name'], result['rows'])]['min']
+        ratio = result['min'] / baseline_time
+        is_regression = ratio > threshold
+        num_of_regressions += is_regression
+        print('{:<32} {:>10} {:>12.6f} {:>12.6f} {:>7.2f}x{}'.format(result['name'], result['rows'], baseline_time,
+                                                                     result['min'], ratio,
+                                                                     ' REGRESSION' if is_regression else ''))
+    return num_of_regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='numbers of rows, up to 10^7')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each benchmark, the fastest is reported')
+    parser.add_argument('--filter', help='only benchmarks with names containing this')
+    parser.add_argument('--output', help='JSON file, benchmarks/results/<commit>.json by default')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='compare two JSON results')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(args.compare[0], args.compare[1], args.threshold) else 0)
+
+    print('{:<32} {:>10} {:>12} {:>16}'.format('benchmark', 'rows', 'min s', 'rows/s'))
+    results = run(args.sizes, args.repeat, args.filter)
+
+    metadata = get_metadata()
+    output_file_path = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                                   '{}.json'.format(metadata['commit'] or 'unknown'))
+    os.makedirs(os.path.dirname(os.path.abspath(output_file_path)), exist_ok=True)
+    with open(output_file_path, 'w') as output_file:
+        json.dump({'metadata': metadata, 'results': results}, output_file, indent=2)
+    print('results written to {}'.format(output_file_path))
+
+
+if __name__ == '__main__':
+    main()
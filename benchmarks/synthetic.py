@@ -0,0 +1,27 @@
+"""
+    Synthetic rates for benchmarks.
+"""
+
+import numpy as np
+from bitcoin_forecast import GDAXRateSeries
+
+
+def make_rates(num_of_rows, granularity=60, seed=0):
+    """
+    Random walk of rates starting at 2017-09-01.
+
+    :param num_of_rows: number of rates
+    :param granularity: timeslice in seconds
+    :param seed: random seed
+    :return: GDAXRateSeries
+    """
+    random = np.random.RandomState(seed)
+    start_time = 1504224000 + granularity * np.arange(num_of_rows, dtype=np.int64)
+    closing_price = np.round(4700 + np.cumsum(random.normal(0, 5, num_of_rows)), 2)
+    opening_price = np.roll(closing_price, 1)
+    spread = np.round(np.abs(random.normal(0, 3, num_of_rows)), 2)
+
+    return GDAXRateSeries(start_time, start_time + granularity,
+                          np.minimum(opening_price, closing_price) - spread,
+                          np.maximum(opening_price, closing_price) + spread,
+                          opening_price, closing_price, random.exponential(300, num_of_rows))
@@ -1,7 +1,43 @@
 """
     BTC/LTC/ETH/USD forecasts based on historical trade data from GDAX
 
+    Public names are imported lazily, on first access, so that e.g. reading rate logs doesn't import
+    requests or scikit-learn.
 """
 
-from .gdax_api import GDAXApi, GDAXRate, GDAXRateLog
-from .btc_forecast import BTCForecast
\ No newline at end of file
+import importlib
+
+# public name -> submodule defining it
+_SUBMODULES = {
+    'GDAXApi': 'gdax_api',
+    'GDAXApiError': 'gdax_api',
+    'GDAXRateLimitError': 'gdax_api',
+    'GDAXRate': 'gdax_api',
+    'GDAXRateSeries': 'gdax_api',
+    'GDAXRateLog': 'gdax_api',
+    'GDAXRateLogWriter': 'gdax_api',
+    'GDAXBinaryRateLog': 'gdax_binary_log',
+    'GDAXRateLogSync': 'gdax_sync',
+    'GDAXPageCache': 'gdax_cache',
+    'GDAXRateStore': 'gdax_store',
+    'GDAXRateResampler': 'gdax_resample',
+    'BTCForecast': 'btc_forecast',
+    'BTCForecastRegistry': 'forecast_registry',
+    'BTCForecastDaemon': 'daemon',
+}
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name not in _SUBMODULES:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+    value = getattr(importlib.import_module('.' + _SUBMODULES[name], __name__), name)
+    # later lookups don't go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
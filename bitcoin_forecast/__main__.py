@@ -0,0 +1,55 @@
+"""
+    bitcoin-forecast command line.
+
+    Usage:
+        python -m bitcoin_forecast daemon --log btc_usd_hourly.csv --output predictions.json [--model model.pkl]
+"""
+
+import argparse
+import logging
+import signal
+from bitcoin_forecast import GDAXApi, BTCForecastDaemon
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='bitcoin-forecast', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verbose', action='store_true', help='log debug messages')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    daemon_parser = commands.add_parser('daemon', help='stay resident, forecasting whenever a candle closes')
+    daemon_parser.add_argument('--log', required=True, help='CSV rate log, created if it doesn\'t exist')
+    daemon_parser.add_argument('--product-id', default='BTC-USD', help='product e.g. BTC-USD')
+    daemon_parser.add_argument('--granularity', type=int, default=60 * 60, help='timeslice in seconds')
+    daemon_parser.add_argument('--model', help='model file loaded at start up and saved on shutdown')
+    daemon_parser.add_argument('--window-size', type=int, help='number of latest rates the model learns from')
+    daemon_parser.add_argument('--output', help='JSON file replaced with every new prediction')
+    daemon_parser.add_argument('--socket', help='Unix datagram socket every new prediction is sent to')
+    daemon_parser.add_argument('--horizons', type=int, default=BTCForecastDaemon.DEFAULT_HORIZONS,
+                               help='number of next candles to predict')
+    daemon_parser.add_argument('--settle-delay', type=float, default=BTCForecastDaemon.DEFAULT_SETTLE_DELAY,
+                               help='seconds to wait after a candle boundary')
+    daemon_parser.add_argument('--api-url', default=GDAXApi.API_URL, help='GDAX API URL')
+    args = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    model_params = {'window_size': args.window_size} if args.window_size else None
+    try:
+        daemon = BTCForecastDaemon(GDAXApi(args.api_url), args.log, args.product_id, args.granularity,
+                                   model_params, model_file_path=args.model, output_file_path=args.output,
+                                   socket_path=args.socket, horizons=args.horizons,
+                                   settle_delay=args.settle_delay)
+    except ValueError as error:
+        parser.error(str(error))
+
+    def stop(signal_number, frame):
+        daemon.stop()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    daemon.run()
+
+
+if __name__ == '__main__':
+    main()
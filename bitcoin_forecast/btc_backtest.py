@@ -0,0 +1,87 @@
+import logging
+import time
+import numpy as np
+from bitcoin_forecast import GDAXRateSeries, BTCForecast
+from bitcoin_forecast.shared_arrays import SharedRatesExecutor
+
+
+def backtest(gdax_rates, model_type=BTCForecast.DEFAULT_MODEL_TYPE, model_params=None, retrain_interval=24,
+             horizon=24, train_size=None, start=None, max_workers=1):
+    """
+    Replays rates as if a forecast had been learned again every retrain_interval rates.
+
+    Every window learns from the rates before its split point and predicts the next horizon rates.
+    Windows are independent of each other, so they run in parallel with more than one worker.
+    Errors are computed across all windows at once, from a matrix of predictions with one row per window
+    and one column per step ahead (NaN beyond the last rate).
+
+    :param gdax_rates: list of GDAXRate's or GDAXRateSeries ordered by time
+    :param model_type: BTCForecast model type
+    :param model_params: parameters overriding the model type defaults
+    :param retrain_interval: number of rates between split points
+    :param horizon: number of rates predicted in each window
+    :param train_size: number of rates learned from in each window, all rates before the split point if None
+    :param start: index of the first split point, train_size or half of the rates if None
+    :param max_workers: number of worker processes, None for the number of CPUs
+    :return: dict with
+             'split_points': index of the first predicted rate of each window,
+             'predictions', 'actual': windows x horizon arrays of predicted and closing prices,
+             'mae', 'rmse', 'mape': mean absolute, root mean squared and mean absolute percentage error,
+             'mae_by_step': mean absolute error of each step ahead,
+             'directional_accuracy': fraction of predictions moving the same way from the last learned
+             closing price as the actual price,
+             'fit_time': total time spent learning, 'elapsed': wall time in seconds,
+             'windows_per_second': throughput of the whole backtest
+    """
+    gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+    start = start or train_size or len(gdax_rates) // 2
+    assert retrain_interval > 0 and horizon > 0, 'Retrain interval and horizon need to be positive'
+    if not 0 < start < len(gdax_rates):
+        raise ValueError('{} rates are not enough for a backtest starting at rate {}'.format(len(gdax_rates), start))
+
+    split_points = np.arange(start, len(gdax_rates), retrain_interval)
+    tasks = [(model_type, model_params, 0 if train_size is None else max(0, split_point - train_size),
+              split_point, split_point + horizon) for split_point in split_points.tolist()]
+
+    started = time.perf_counter()
+    with SharedRatesExecutor(gdax_rates, max_workers) as executor:
+        windows = executor.map(_run_window, tasks)
+    elapsed = time.perf_counter() - started
+
+    # windows x horizon matrices, padded with NaN after the last rate
+    steps = split_points[:, np.newaxis] + np.arange(horizon)
+    is_known = steps < len(gdax_rates)
+    predictions = np.full(steps.shape, np.nan)
+    predictions[is_known] = np.concatenate([predicted for predicted, _ in windows])
+    actual = np.where(is_known, gdax_rates.prices[np.minimum(steps, len(gdax_rates) - 1)], np.nan)
+
+    errors = predictions - actual
+    last_learned_prices = gdax_rates.prices[split_points - 1][:, np.newaxis]
+    same_direction = np.sign(predictions - last_learned_prices) == np.sign(actual - last_learned_prices)
+
+    result = {'split_points': split_points, 'predictions': predictions, 'actual': actual,
+              'mae': float(np.nanmean(np.abs(errors))),
+              'rmse': float(np.sqrt(np.nanmean(errors ** 2))),
+              'mape': float(np.nanmean(np.abs(errors) / np.abs(actual))),
+              'mae_by_step': np.nanmean(np.abs(errors), axis=0),
+              'directional_accuracy': float(np.mean(same_direction[is_known])),
+              'fit_time': float(sum(fit_time for _, fit_time in windows)),
+              'elapsed': elapsed, 'windows_per_second': len(windows) / elapsed}
+
+    logging.getLogger('BTCBacktest').debug('backtest | windows=%s, elapsed=%.3fs, windows_per_second=%.1f, rmse=%s',
+                                           len(windows), elapsed, result['windows_per_second'], result['rmse'])
+    return result
+
+
+def _run_window(gdax_rates, model_type, model_params, train_start, train_end, test_end):
+    """
+    Learns from one training window and predicts the rates after it.
+
+    :return: predictions, time spent learning in seconds
+    """
+    forecast = BTCForecast(model_type, model_params)
+    fit_start = time.perf_counter()
+    forecast.learn(gdax_rates[train_start:train_end])
+    fit_time = time.perf_counter() - fit_start
+
+    return forecast.predict(gdax_rates[train_end:test_end]), fit_time
@@ -1,9 +1,17 @@
-from bitcoin_forecast import GDAXRate
+from bitcoin_forecast import GDAXRate, GDAXRateSeries
+from bitcoin_forecast.metrics import get_metrics
+import sklearn
 from sklearn.svm import SVR
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import Ridge
+from sklearn.base import BaseEstimator, RegressorMixin
 from sklearn import preprocessing
 from sklearn.pipeline import make_pipeline
 import numpy as np
+import hashlib
 import logging
+import os
+import pickle
 
 class BTCForecast(object):
     """
@@ -14,44 +22,119 @@ class BTCForecast(object):
     Please don't trade currencies based on this forecast.
     The risk of loss in trading or holding Digital Currency can be substantial.
 
-    Current implementation uses Support Vector Regression (SVR).
+    Supported models:
+    - 'SVR': Support Vector Regression with an exact RBF kernel. Fit time grows quadratically to cubically
+      with the number of rates, so it's only practical up to a few tens of thousands of rates.
+    - 'NYSTROEM': the RBF kernel approximated with a Nystroem feature map of n_components dimensions,
+      followed by a linear ridge regression. Fit time grows linearly with the number of rates.
+      More components approximate the kernel better at the cost of fit time (O(n * n_components^2)).
+      See benchmarks/bench_forecast_models.py.
+    - 'ONLINE': the RBF kernel approximated with random Fourier features, followed by a ridge regression
+      over a sliding window of the latest window_size rates. partial_learn() updates the model in time
+      proportional to the new rates only. Time is scaled as if standardized over a full window, so gamma
+      has the same meaning as for the other models trained on window_size rates.
+
+    A learned forecast can be saved and loaded again. learn_or_load() skips learning when the saved model
+    was learned from the same rates, which is checked with a fingerprint of the rates.
+
+    By default the end time of a rate is the only input of the model. With BTCFeatures, the model learns
+    from lagged prices, returns, rolling means and volatility of the previous rates as well, and predict()
+    needs the rates to predict rather than bare timestamps. Features are cached between learn() and
+    predict(), so forecasting the next rates only computes their own features.
     """
 
+    FILE_FORMAT_VERSION = 1
+
     DEFAULT_MODEL_TYPE = 'SVR'
     DEFAULT_SVR_MODEL_PARAMS = {'kernel': 'rbf', 'epsilon': 0.01, 'c': 100, 'gamma': 100}
+    DEFAULT_NYSTROEM_MODEL_PARAMS = {'kernel': 'rbf', 'gamma': 100, 'n_components': 300, 'alpha': 0.001,
+                                     'random_state': 0}
+    DEFAULT_ONLINE_MODEL_PARAMS = {'gamma': 100, 'n_components': 300, 'alpha': 0.001, 'window_size': 1000,
+                                   'random_state': 0}
+    DEFAULT_MODEL_PARAMS = {'SVR': DEFAULT_SVR_MODEL_PARAMS, 'NYSTROEM': DEFAULT_NYSTROEM_MODEL_PARAMS,
+                            'ONLINE': DEFAULT_ONLINE_MODEL_PARAMS}
 
-    def __init__(self, model_type=DEFAULT_MODEL_TYPE):
+    def __init__(self, model_type=DEFAULT_MODEL_TYPE, model_params=None, features=None):
         """
         Set ups model and pipeline for learning and predicting.
 
-        :param model_type: only 'SVR' model is supported for now
+        :param model_type: 'SVR', 'NYSTROEM' or 'ONLINE'
+        :param model_params: parameters overriding the model type defaults e.g. {'gamma': 10}
+        :param features: BTCFeatures, or None to learn from end times only
         """
-        assert (model_type == 'SVR'), "Model '{}' is not supported. " \
-                                      "We support only SVR for now.".format(model_type)
+        assert (model_type in BTCForecast.DEFAULT_MODEL_PARAMS), "Model '{}' is not supported. " \
+            "We support only {} for now.".format(model_type, ', '.join(BTCForecast.DEFAULT_MODEL_PARAMS))
+        assert features is None or model_type != 'ONLINE', "Model 'ONLINE' learns from end times only"
         self._model_type = model_type
-        self._model_params = BTCForecast.DEFAULT_SVR_MODEL_PARAMS
+        self._model_params = dict(BTCForecast.DEFAULT_MODEL_PARAMS[model_type], **(model_params or {}))
+        self._features = features
 
-        # set up SVR pipeline
         self._scaler = preprocessing.StandardScaler(copy=True, with_mean=True, with_std=True)
-        self._model = SVR(kernel=self._model_params['kernel'],
-                          epsilon=self._model_params['epsilon'],
-                          C=self._model_params['c'],
-                          gamma=self._model_params['gamma'])
-        self._pipeline = make_pipeline(self._scaler, self._model)
+        if model_type == 'SVR':
+            # set up SVR pipeline
+            self._model = SVR(kernel=self._model_params['kernel'],
+                              epsilon=self._model_params['epsilon'],
+                              C=self._model_params['c'],
+                              gamma=self._model_params['gamma'])
+            self._pipeline = make_pipeline(self._scaler, self._model)
+        elif model_type == 'ONLINE':
+            # set up incremental pipeline
+            self._feature_map = RBFSampler(gamma=self._model_params['gamma'],
+                                           n_components=self._model_params['n_components'],
+                                           random_state=self._model_params['random_state'])
+            self._model = _SlidingWindowRidge(alpha=self._model_params['alpha'])
+            self._pipeline = make_pipeline(self._scaler, self._feature_map, self._model)
+            self._window = GDAXRateSeries.empty()
+        else:
+            # set up kernel approximation pipeline
+            self._feature_map = Nystroem(kernel=self._model_params['kernel'],
+                                         gamma=self._model_params['gamma'],
+                                         n_components=self._model_params['n_components'],
+                                         random_state=self._model_params['random_state'])
+            self._model = Ridge(alpha=self._model_params['alpha'])
+            self._pipeline = make_pipeline(self._scaler, self._feature_map, self._model)
         self.has_learned = False
+        self._fingerprint = None
+        self._score = None
+
+    @property
+    def model_type(self):
+        """
+        :return: 'SVR', 'NYSTROEM' or 'ONLINE'
+        """
+        return self._model_type
+
+    @property
+    def model_params(self):
+        """
+        :return: dict of model parameters, including the model type defaults
+        """
+        return dict(self._model_params)
+
+    @property
+    def uses_features(self):
+        """
+        :return: whether the forecast learns from BTCFeatures of rates, rather than from end times only
+        """
+        return self._features is not None
 
     def _transform_training_set(self, gdax_rates):
         """
         Transform input for learning
 
-        :param gdax_rates: list of GDAXRate's
+        :param gdax_rates: list of GDAXRate's or GDAXRateSeries
         :return: x,y training vectors
         """
-        rates = [gdax_rate.closing_price for gdax_rate in gdax_rates]
-        timestamps = [gdax_rate.end_time.timestamp() for gdax_rate in gdax_rates]
+        gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+
+        if self._features is not None:
+            # rates without enough previous rates for all features are left out
+            x_train = self._features.transform(gdax_rates)
+            is_complete = ~np.isnan(x_train).any(axis=1)
+            return x_train[is_complete], gdax_rates.prices[is_complete]
 
-        x_train = np.reshape(timestamps, (len(timestamps), 1))
-        y_train = rates
+        x_train = np.reshape(gdax_rates.timestamps, (len(gdax_rates), 1))
+        y_train = gdax_rates.prices
 
         return x_train, y_train
 
@@ -59,29 +142,311 @@ class BTCForecast(object):
         """
         Learns based on past rates.
 
-        :param gdax_rates: list of GDAXRate's
+        :param gdax_rates: list of GDAXRate's or GDAXRateSeries
         :return: current score after training
         """
         logging.getLogger('BTCForecast').debug('learning...')
-        x_train, y_train = self._transform_training_set(gdax_rates)
+        metrics = get_metrics()
+        tags = {'model_type': self._model_type}
+        with metrics.timer('btc_forecast_learn_seconds', tags):
+            gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+            self._fingerprint = BTCForecast.fingerprint(gdax_rates)
+            if self._model_type == 'ONLINE':
+                score = self._learn_window(gdax_rates)
+            else:
+                x_train, y_train = self._transform_training_set(gdax_rates)
 
-        # LEARN!
-        self._pipeline.fit(x_train, y_train)
-        score = self._pipeline.score(x_train, y_train)
-        self.has_learned = True
+                # LEARN!
+                self._pipeline.fit(x_train, y_train)
+                score = self._pipeline.score(x_train, y_train)
+                self.has_learned = True
+            self._score = score
+        metrics.increment('btc_forecast_learn_samples_total', len(gdax_rates), tags)
 
-        logging.getLogger('BTCForecast').debug('score: {}'.format(score))
+        logging.getLogger('BTCForecast').debug('score: %s', score)
         return score
 
+    def learn_or_load(self, gdax_rates, file_path):
+        """
+        Loads the model saved at file_path if it was learned from the same rates with the same model type,
+        parameters and scikit-learn version. Otherwise, or if the file can't be read, learns based on the rates
+        and saves the model there.
+
+        :param gdax_rates: list of GDAXRate's or GDAXRateSeries
+        :param file_path: path of the saved model
+        :return: score after training
+        """
+        gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+        metadata = self._get_metadata(BTCForecast.fingerprint(gdax_rates))
+        if os.path.isfile(file_path):
+            try:
+                with open(file_path, 'rb') as model_file:
+                    saved_metadata = pickle.load(model_file)
+                    score = saved_metadata.pop('score', None)
+                    saved_metadata.pop('labels', None)
+                    if saved_metadata == metadata:
+                        self.__dict__.update(pickle.load(model_file))
+                        logging.getLogger('BTCForecast').debug('loaded | file_path=%s', file_path)
+                        return score
+            except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, TypeError,
+                    ValueError) as error:
+                # truncated, corrupt or not a model file at all
+                logging.getLogger('BTCForecast').warning('Model file unusable, learning again | file_path=%s, '
+                                                         'error=%r', file_path, error)
+
+        score = self.learn(gdax_rates)
+        self.save(file_path)
+        return score
+
+    def save(self, file_path, labels=None):
+        """
+        Saves the learned model with metadata describing how and from which rates it was learned.
+
+        :param file_path: path of the saved model, replaced atomically if it exists
+        :param labels: dict describing the model e.g. {'product_id': 'BTC-USD'}, saved with the metadata
+        """
+        if not self.has_learned:
+            raise TypeError('Learning is required before saving')
+
+        temporary_file_path = file_path + '.tmp'
+        with open(temporary_file_path, 'wb') as model_file:
+            # metadata first, so that it can be checked without loading the model
+            pickle.dump(dict(self._get_metadata(self._fingerprint), score=self._score, labels=labels or {}),
+                        model_file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(self.__dict__, model_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file_path, file_path)
+
+    @staticmethod
+    def load(file_path):
+        """
+        Loads a saved model.
+
+        :param file_path: path of the saved model
+        :return: BTCForecast
+        """
+        with open(file_path, 'rb') as model_file:
+            metadata = pickle.load(model_file)
+            if metadata['format_version'] != BTCForecast.FILE_FORMAT_VERSION:
+                raise ValueError("Unsupported model file format {} in '{}'".format(metadata['format_version'],
+                                                                                   file_path))
+            if metadata['sklearn_version'] != sklearn.__version__:
+                logging.getLogger('BTCForecast').warning(
+                    'Model saved with scikit-learn %s loaded with %s | file_path=%s',
+                    metadata['sklearn_version'], sklearn.__version__, file_path)
+
+            forecast = BTCForecast.__new__(BTCForecast)
+            forecast.__dict__.update(pickle.load(model_file))
+        return forecast
+
+    @staticmethod
+    def load_metadata(file_path):
+        """
+        Reads the metadata of a saved model, without loading the model.
+
+        :param file_path: path of the saved model
+        :return: dict with 'model_type', 'model_params', 'fingerprint', 'score', 'labels' etc.
+        """
+        with open(file_path, 'rb') as model_file:
+            return pickle.load(model_file)
+
+    @staticmethod
+    def search(gdax_rates, param_grid, model_type=DEFAULT_MODEL_TYPE, **kwargs):
+        """
+        Finds the best model parameters with walk-forward cross validation across a process pool.
+
+        See bitcoin_forecast.btc_search.search for all options.
+
+        :param gdax_rates: list of GDAXRate's or GDAXRateSeries ordered by time
+        :param param_grid: dict of parameter name -> list of values e.g. {'c': [10, 100], 'gamma': [10, 100]}
+        :param model_type: 'SVR', 'NYSTROEM' or 'ONLINE'
+        :return: dict with 'best_params', 'best_rmse' and per-fold 'folds' results with timings
+        """
+        from bitcoin_forecast.btc_search import search
+        return search(gdax_rates, param_grid, model_type, **kwargs)
+
+    @staticmethod
+    def fingerprint(gdax_rates):
+        """
+        Identifies rates to learn from.
+
+        :param gdax_rates: list of GDAXRate's or GDAXRateSeries
+        :return: dict of sha256 of all fields, number of rates, first start time and last end time
+        """
+        gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+        digest = hashlib.sha256()
+        for column in gdax_rates.columns():
+            digest.update(np.ascontiguousarray(column).tobytes())
+
+        return {'sha256': digest.hexdigest(), 'num_of_rates': len(gdax_rates),
+                'start_time': int(gdax_rates.start_time.min()) if len(gdax_rates) else None,
+                'end_time': int(gdax_rates.end_time.max()) if len(gdax_rates) else None}
+
+    def _get_metadata(self, fingerprint):
+        return {'format_version': BTCForecast.FILE_FORMAT_VERSION, 'model_type': self._model_type,
+                'model_params': self._model_params, 'sklearn_version': sklearn.__version__,
+                'features': None if self._features is None else self._features.get_params(),
+                'fingerprint': fingerprint}
+
+    def partial_learn(self, new_rates):
+        """
+        Updates the model with new rates, without learning from the whole history again.
+
+        Only supported by the 'ONLINE' model. Rates not newer than the latest learned one are ignored.
+        The oldest rates leave the sliding window as new ones come in.
+
+        :param new_rates: list of GDAXRate's or GDAXRateSeries
+        :return: number of rates learned
+        """
+        if self._model_type != 'ONLINE':
+            raise TypeError("Model '{}' doesn't support incremental learning".format(self._model_type))
+
+        metrics = get_metrics()
+        with metrics.timer('btc_forecast_partial_learn_seconds'):
+            num_of_rates = self._partial_learn(GDAXRateSeries.from_rates(new_rates))
+        metrics.increment('btc_forecast_partial_learn_samples_total', num_of_rates)
+        return num_of_rates
+
+    def _partial_learn(self, new_rates):
+        if not self.has_learned:
+            self._score = self._learn_window(new_rates)
+            self._fingerprint = BTCForecast.fingerprint(self._window)
+            return len(self._window)
+
+        new_rates = new_rates[new_rates.end_time > self._window.end_time[-1]]
+        if len(new_rates) == 0:
+            return 0
+
+        window = GDAXRateSeries.concatenate([self._window, new_rates])
+        num_of_old_rates = max(0, len(window) - self._model_params['window_size'])
+        old_rates, self._window = window[:num_of_old_rates], window[num_of_old_rates:]
+
+        self._rates_since_refresh += len(new_rates)
+        if self._rates_since_refresh >= self._model_params['window_size']:
+            # start from scratch once in a while so that rounding errors don't pile up
+            self._fit_window()
+        else:
+            x_train, y_train = self._transform_training_set(GDAXRateSeries.concatenate([new_rates, old_rates]))
+            sample_weight = np.concatenate([np.ones(len(new_rates)), -np.ones(len(old_rates))])
+            self._model.partial_fit(self._transform_features(x_train), y_train, sample_weight)
+
+        # the model now describes the window rather than the rates it was learned from first
+        self._fingerprint = BTCForecast.fingerprint(self._window)
+        self._score = None
+        return len(new_rates)
+
+    def _learn_window(self, gdax_rates):
+        """
+        Learns the 'ONLINE' model from the latest window_size rates.
+
+        :param gdax_rates: list of GDAXRate's or GDAXRateSeries
+        :return: current score after training
+        """
+        gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+        assert len(gdax_rates) > 0, 'At least one rate is required to learn'
+        self._window = GDAXRateSeries.merge([gdax_rates])[-self._model_params['window_size']:]
+
+        # time standardized as if over a full window of evenly spaced rates
+        granularity = self._window.end_time[0] - self._window.start_time[0]
+        half_range = self._model_params['window_size'] * granularity / np.sqrt(12)
+        self._scaler.fit([[self._window.timestamps[0] - half_range], [self._window.timestamps[0] + half_range]])
+        self._feature_map.fit(np.zeros((1, 1)))
+
+        score = self._fit_window()
+        self.has_learned = True
+        return score
+
+    def _fit_window(self):
+        x_train, y_train = self._transform_training_set(self._window)
+        features = self._transform_features(x_train)
+        self._model.fit(features, y_train)
+        self._rates_since_refresh = 0
+        return self._model.score(features, y_train)
+
+    def _transform_features(self, x):
+        return self._feature_map.transform(self._scaler.transform(x))
+
     def predict(self, timestamps):
         """
         Predicts a value for each timestamp.
 
-        :param timestamps: a list of timestamps
-        :return: a list or predictions
+        :param timestamps: a list or an array of timestamps, or GDAXRateSeries to predict at its end times
+                           (list of GDAXRate's or GDAXRateSeries with features)
+        :return: a list or predictions, NaN for rates without enough previous rates for all features
         """
         if not self.has_learned:
             raise TypeError('Learning is required before any predictions')
 
+        metrics = get_metrics()
+        tags = {'model_type': self._model_type}
+        with metrics.timer('btc_forecast_predict_seconds', tags):
+            predictions = self._predict(timestamps)
+        metrics.increment('btc_forecast_predict_samples_total', len(predictions), tags)
+        return predictions
+
+    def _predict(self, timestamps):
+        if self._features is not None:
+            if not isinstance(timestamps, GDAXRateSeries) and not all(isinstance(rate, GDAXRate)
+                                                                      for rate in timestamps):
+                raise TypeError('Rates are required to predict from features')
+
+            x_test = self._features.transform(timestamps)
+            is_complete = ~np.isnan(x_test).any(axis=1)
+            predictions = np.full(len(x_test), np.nan)
+            if np.any(is_complete):
+                predictions[is_complete] = self._pipeline.predict(x_test[is_complete])
+            return predictions
+
+        if isinstance(timestamps, GDAXRateSeries):
+            timestamps = timestamps.timestamps
+
         x_test = np.reshape(timestamps, (len(timestamps), 1))
         return self._pipeline.predict(x_test)
+
+
+class _SlidingWindowRidge(BaseEstimator, RegressorMixin):
+    """
+    Ridge regression solved from running sums of the rows it has seen.
+
+    partial_fit() with a sample weight of -1 removes rows again, so a sliding window costs time proportional
+    to the rows entering and leaving it, and the memory held doesn't depend on the number of rows.
+    """
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+
+    def fit(self, x, y, sample_weight=None):
+        num_of_features = np.shape(x)[1]
+        self.n_features_in_ = num_of_features
+        self.weight_sum_ = 0.0
+        self.x_sum_ = np.zeros(num_of_features)
+        self.y_sum_ = 0.0
+        self.xx_sum_ = np.zeros((num_of_features, num_of_features))
+        self.xy_sum_ = np.zeros(num_of_features)
+        return self.partial_fit(x, y, sample_weight)
+
+    def partial_fit(self, x, y, sample_weight=None):
+        if not hasattr(self, 'xx_sum_'):
+            return self.fit(x, y, sample_weight)
+
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        sample_weight = np.ones(len(y)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+
+        weighted_x = x * sample_weight[:, np.newaxis]
+        self.weight_sum_ += sample_weight.sum()
+        self.x_sum_ += weighted_x.sum(axis=0)
+        self.y_sum_ += sample_weight @ y
+        self.xx_sum_ += weighted_x.T @ x
+        self.xy_sum_ += weighted_x.T @ y
+
+        # centered normal equations, the intercept isn't penalized
+        x_mean = self.x_sum_ / self.weight_sum_
+        y_mean = self.y_sum_ / self.weight_sum_
+        xx = self.xx_sum_ - self.weight_sum_ * np.outer(x_mean, x_mean)
+        xy = self.xy_sum_ - self.weight_sum_ * x_mean * y_mean
+        self.coef_ = np.linalg.solve(xx + self.alpha * np.eye(len(xy)), xy)
+        self.intercept_ = y_mean - x_mean @ self.coef_
+        return self
+
+    def predict(self, x):
+        return np.asarray(x, dtype=np.float64) @ self.coef_ + self.intercept_
@@ -0,0 +1,94 @@
+import itertools
+import logging
+import math
+import time
+import numpy as np
+from sklearn.model_selection import ParameterGrid
+from bitcoin_forecast import GDAXRateSeries, BTCForecast
+from bitcoin_forecast.shared_arrays import SharedRatesExecutor
+
+
+def search(gdax_rates, param_grid, model_type=BTCForecast.DEFAULT_MODEL_TYPE, num_of_folds=5, test_size=None,
+           min_train_size=None, reduction_factor=3, max_workers=1):
+    """
+    Tunes model parameters with walk-forward cross validation and successive halving.
+
+    Each fold learns from the rates before its split point and is scored by the root mean squared error
+    of predictions for the following test_size rates, so the model never sees rates from the future.
+    All parameter combinations are first evaluated with short training windows of min_train_size rates
+    right before each split point. Only the best 1/reduction_factor of them go on to the next round,
+    where the windows are reduction_factor times longer, until the last round learns from all rates
+    before each split point.
+
+    With more than one worker the rates are copied once into shared memory, which all worker
+    processes read from.
+
+    :param gdax_rates: list of GDAXRate's or GDAXRateSeries ordered by time
+    :param param_grid: dict of parameter name -> list of values, or a list of such dicts
+    :param model_type: BTCForecast model type
+    :param num_of_folds: number of walk-forward folds
+    :param test_size: number of rates predicted in each fold, len(gdax_rates) // (num_of_folds + 1) if None
+    :param min_train_size: training window in the first round, test_size if None
+    :param reduction_factor: fraction of parameter combinations dropped and window growth per round
+    :param max_workers: number of worker processes, None for the number of CPUs
+    :return: dict with 'best_params', 'best_rmse' and 'folds', a list of dicts with 'params', 'round',
+             'fold', 'train_size', 'fit_time', 'predict_time' and 'rmse' of every fold evaluated
+    """
+    gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+    test_size = test_size or len(gdax_rates) // (num_of_folds + 1)
+    min_train_size = min_train_size or test_size
+    assert reduction_factor > 1, 'Reduction factor needs to be greater than 1'
+
+    split_points = [len(gdax_rates) - (num_of_folds - fold) * test_size for fold in range(num_of_folds)]
+    if test_size < 1 or split_points[0] < 1:
+        raise ValueError('{} rates are not enough for {} folds of {} rates'.format(len(gdax_rates), num_of_folds,
+                                                                                  test_size))
+
+    candidates = list(ParameterGrid(param_grid))
+    with SharedRatesExecutor(gdax_rates, max_workers) as executor:
+        folds = []
+        train_size = min_train_size
+        for search_round in itertools.count():
+            is_last_round = len(candidates) == 1 or train_size >= split_points[-1]
+            tasks = [(model_type, params, 0 if is_last_round else max(0, split_point - train_size), split_point,
+                      split_point + test_size)
+                     for params in candidates for split_point in split_points]
+
+            round_folds = executor.map(_evaluate, tasks)
+            for task, fold in zip(tasks, round_folds):
+                fold.update({'params': task[1], 'round': search_round, 'fold': split_points.index(task[3])})
+            folds += round_folds
+
+            rmses = np.mean(np.reshape([fold['rmse'] for fold in round_folds], (len(candidates), num_of_folds)),
+                            axis=1)
+            ranking = np.argsort(rmses, kind='stable')
+            logging.getLogger('BTCSearch').debug('round %s | train_size=%s, candidates=%s, best_rmse=%s',
+                                                 search_round, 'all' if is_last_round else train_size,
+                                                 len(candidates), rmses[ranking[0]])
+
+            if is_last_round:
+                return {'best_params': candidates[ranking[0]], 'best_rmse': float(rmses[ranking[0]]),
+                        'folds': folds}
+
+            candidates = [candidates[i] for i in ranking[:int(math.ceil(len(candidates) / reduction_factor))]]
+            train_size *= reduction_factor
+
+
+def _evaluate(gdax_rates, model_type, params, train_start, train_end, test_end):
+    """
+    Learns from one training window and scores predictions of the test window after it.
+
+    :return: dict with 'train_size', 'fit_time', 'predict_time' and 'rmse'
+    """
+    forecast = BTCForecast(model_type, params)
+    fit_start = time.perf_counter()
+    forecast.learn(gdax_rates[train_start:train_end])
+    predict_start = time.perf_counter()
+    test_rates = gdax_rates[train_end:test_end]
+    predicted = forecast.predict(test_rates)
+    predict_end = time.perf_counter()
+
+    return {'train_size': train_end - train_start, 'fit_time': predict_start - fit_start,
+            'predict_time': predict_end - predict_start,
+            'rmse': float(np.sqrt(np.mean((predicted - test_rates.prices) ** 2)))}
+
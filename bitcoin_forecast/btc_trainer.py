@@ -0,0 +1,148 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+import numpy as np
+from bitcoin_forecast import GDAXRateSeries, BTCForecast
+from bitcoin_forecast.metrics import get_metrics
+from bitcoin_forecast.shared_arrays import SharedArrays, attach_worker_rates, get_rate_arrays, get_worker_arrays, \
+    get_worker_rates
+
+# guards the job slots of the shared arrays, so that a worker isn't killed after its job has finished
+_worker_lock = None
+
+POLL_INTERVAL = 0.05
+
+
+def train(rates_by_product, jobs, max_workers=None, timeout=None):
+    """
+    Learns a forecast for every (product, model) job on a pool of worker processes.
+
+    The rates of all products are copied once into SharedArrays, which every worker attaches to when
+    it starts, so jobs only carry their product and model. Fitted forecasts are sent back to the calling
+    process. With one worker and no timeout, jobs run in the calling process.
+
+    A job running for longer than timeout seconds is reported as failed and its worker process is killed,
+    the pool replaces it with a new one and carries on with the other jobs.
+
+    Usage:
+        results = train({'BTC-USD': btc_rates, 'ETH-USD': eth_rates},
+                        [('BTC-USD', 'NYSTROEM', None), ('ETH-USD', 'NYSTROEM', {'gamma': 10})], max_workers=4)
+        registry = BTCForecastRegistry({result['product_id']: result['forecast'] for result in results
+                                        if result['error'] is None})
+
+    :param rates_by_product: dict of product id -> list of GDAXRate's or GDAXRateSeries ordered by time
+    :param jobs: a list of (product id, model type, model params) tuples, model params may be None
+    :param max_workers: number of worker processes, None for the number of CPUs
+    :param timeout: seconds a job may run for, None for no limit
+    :return: a list of dicts with 'product_id', 'model_type', 'model_params', 'forecast', 'score', 'fit_time'
+             and 'error' (None, or a message if the job failed) of every job, in the order of jobs
+    """
+    rates_by_product = {product_id: GDAXRateSeries.from_rates(gdax_rates)
+                        for product_id, gdax_rates in rates_by_product.items()}
+    for product_id, _, _ in jobs:
+        if product_id not in rates_by_product:
+            raise KeyError("No rates for product '{}'".format(product_id))
+    max_workers = max_workers or os.cpu_count()
+
+    started = time.perf_counter()
+    if max_workers == 1 and timeout is None:
+        results = [_run_job(rates_by_product, *job) for job in jobs]
+    else:
+        results = _train_in_pool(rates_by_product, jobs, max_workers, timeout)
+
+    metrics = get_metrics()
+    for result in results:
+        metrics.increment('btc_trainer_jobs_total', tags={'status': 'ok' if result['error'] is None else 'error'})
+    logging.getLogger('BTCTrainer').debug('trained | jobs=%s, max_workers=%s, elapsed=%s', len(jobs), max_workers,
+                                          time.perf_counter() - started)
+    return results
+
+
+def _train_in_pool(rates_by_product, jobs, max_workers, timeout):
+    arrays = dict(get_rate_arrays(rates_by_product), job_start_times=np.zeros(len(jobs)),
+                  job_pids=np.zeros(len(jobs), dtype=np.int64))
+
+    with SharedArrays(arrays) as shared_arrays:
+        start_times = shared_arrays.arrays['job_start_times']
+        pids = shared_arrays.arrays['job_pids']
+        lock = multiprocessing.Lock()
+        pool = multiprocessing.Pool(min(max_workers, max(len(jobs), 1)), initializer=_init_worker,
+                                    initargs=(shared_arrays.descriptor, list(rates_by_product), lock))
+        try:
+            pending = {index: pool.apply_async(_run_worker_job, (index,) + tuple(job))
+                       for index, job in enumerate(jobs)}
+            results = [None] * len(jobs)
+            while pending:
+                for index, async_result in list(pending.items()):
+                    if async_result.ready():
+                        results[index] = async_result.get()
+                        del pending[index]
+                    elif timeout is not None and start_times[index] and time.time() - start_times[index] > timeout:
+                        with lock:
+                            # the job may have finished since, and its worker moved on to another job
+                            is_running = bool(start_times[index] and pids[index])
+                            if is_running:
+                                # the pool replaces the killed worker
+                                _kill(int(pids[index]))
+                        if is_running:
+                            results[index] = _get_result(*jobs[index], error='Timed out after {}s'.format(timeout))
+                            del pending[index]
+                if pending:
+                    next(iter(pending.values())).wait(POLL_INTERVAL)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    return results
+
+
+def _run_job(rates_by_product, product_id, model_type, model_params):
+    """
+    Learns a forecast of a product.
+
+    :return: dict of the job with 'forecast', 'score', 'fit_time' and 'error'
+    """
+    try:
+        forecast = BTCForecast(model_type, model_params)
+        started = time.perf_counter()
+        score = forecast.learn(rates_by_product[product_id])
+        fit_time = time.perf_counter() - started
+    except Exception as error:
+        logging.getLogger('BTCTrainer').warning('job failed | product_id=%s, model_type=%s, error=%r',
+                                                product_id, model_type, error)
+        return _get_result(product_id, model_type, model_params, error=repr(error))
+
+    return _get_result(product_id, model_type, model_params, forecast=forecast, score=score, fit_time=fit_time)
+
+
+def _get_result(product_id, model_type, model_params, forecast=None, score=None, fit_time=None, error=None):
+    return {'product_id': product_id, 'model_type': model_type, 'model_params': model_params, 'forecast': forecast,
+            'score': score, 'fit_time': fit_time, 'error': error}
+
+
+def _init_worker(descriptor, product_ids, lock):
+    global _worker_lock
+    _worker_lock = lock
+    attach_worker_rates(descriptor, product_ids)
+
+
+def _run_worker_job(index, product_id, model_type, model_params):
+    arrays = get_worker_arrays()
+    with _worker_lock:
+        arrays['job_pids'][index] = os.getpid()
+        arrays['job_start_times'][index] = time.time()
+    try:
+        return _run_job(get_worker_rates(), product_id, model_type, model_params)
+    finally:
+        with _worker_lock:
+            arrays['job_start_times'][index] = 0
+            arrays['job_pids'][index] = 0
+
+
+def _kill(pid):
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
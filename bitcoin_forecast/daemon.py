@@ -0,0 +1,221 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import numpy as np
+from bitcoin_forecast import GDAXApiError, GDAXRateLog, GDAXRateSeries, BTCForecast
+from bitcoin_forecast.gdax_sync import _format_iso
+from bitcoin_forecast.metrics import get_metrics
+
+
+class BTCForecastDaemon(object):
+    """
+    Resident forecaster of a product, waking up whenever a candle closes.
+
+    Every cycle fetches only the candles closed since the last one in the log, appends them to the log,
+    updates an 'ONLINE' forecast with them and publishes predictions for the next candles, as JSON written
+    to a file and/or sent as a datagram to a local (Unix) socket. The model stays in memory between cycles.
+
+    Memory is bounded: the forecast keeps a sliding window of window_size rates, and at most window_size
+    candles are fetched at start up or after a long outage (GDAXRateLogSync can fill older gaps of the log).
+    When the latest candle isn't published yet when the daemon wakes up, or fetching it fails, it's requested
+    again after retry_delay seconds, doubling up to max_retry_delay seconds, until the next candle boundary.
+
+    A model file has to hold an 'ONLINE' forecast saved by a daemon of the same product and granularity.
+
+    stop() ends run() after the current cycle; the forecast is saved if a model file is given.
+    Time is read from clock and waited for with sleep, both replaceable with fakes in tests.
+
+    Usage:
+        daemon = BTCForecastDaemon(GDAXApi(), 'btc_usd_hourly.csv', output_file_path='predictions.json')
+        daemon.run()
+    """
+
+    DEFAULT_HORIZONS = 24
+    DEFAULT_SETTLE_DELAY = 5
+    DEFAULT_RETRY_DELAY = 5
+    DEFAULT_MAX_RETRY_DELAY = 60
+
+    def __init__(self, api, log_file_path, product_id='BTC-USD', granularity=60*60, model_params=None,
+                 model_file_path=None, output_file_path=None, socket_path=None, horizons=DEFAULT_HORIZONS,
+                 settle_delay=DEFAULT_SETTLE_DELAY, retry_delay=DEFAULT_RETRY_DELAY,
+                 max_retry_delay=DEFAULT_MAX_RETRY_DELAY, clock=time.time, sleep=None):
+        """
+        :param api: GDAXApi
+        :param log_file_path: CSV rate log of the product, created if it doesn't exist
+        :param product_id: product e.g. BTC-USD
+        :param granularity: timeslice in seconds
+        :param model_params: dict of 'ONLINE' model parameters, see BTCForecast
+        :param model_file_path: file the forecast is loaded from at start up and saved to on stop
+        :param output_file_path: JSON file replaced with every new prediction
+        :param socket_path: Unix datagram socket every new prediction is sent to
+        :param horizons: number of next candles to predict
+        :param settle_delay: seconds to wait after a candle boundary, for the API to publish the candle
+        :param retry_delay: seconds to wait before requesting a candle which isn't published yet again
+        :param max_retry_delay: longest wait between requests of a candle which isn't published yet
+        :param clock: current time in epoch seconds
+        :param sleep: waits for a number of seconds, returns early when stop() is called if None
+        """
+        self.api = api
+        self.log = GDAXRateLog(log_file_path)
+        self.product_id = product_id
+        self.granularity = granularity
+        self.model_file_path = model_file_path
+        self.output_file_path = output_file_path
+        self.socket_path = socket_path
+        self.horizons = horizons
+        self.settle_delay = settle_delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.prediction = None
+
+        if model_file_path is not None and os.path.isfile(model_file_path):
+            self.forecast = self._load_forecast(model_file_path)
+        else:
+            self.forecast = BTCForecast('ONLINE', model_params)
+        self.window_size = self.forecast.model_params['window_size']
+
+        self._clock = clock
+        self._stop_event = threading.Event()
+        self._sleep = sleep if sleep is not None else self._stop_event.wait
+        self._socket = None
+        if socket_path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.setblocking(False)
+
+    def run(self):
+        """
+        Runs cycles at candle boundaries until stop() is called.
+        """
+        logging.getLogger('BTCForecastDaemon').debug('starting | product_id=%s, granularity=%s',
+                                                     self.product_id, self.granularity)
+        try:
+            self._learn_log()
+            retry_delay = self.retry_delay
+            while not self._stop_event.is_set():
+                self.run_once()
+                if self._stop_event.is_set():
+                    break
+
+                now = self._clock()
+                next_wakeup = self.get_next_wakeup(now)
+                if not self._has_latest_rate(now) and now + retry_delay < next_wakeup:
+                    self._sleep(retry_delay)
+                    retry_delay = min(2 * retry_delay, self.max_retry_delay)
+                else:
+                    self._sleep(max(0, next_wakeup - now))
+                    retry_delay = self.retry_delay
+        finally:
+            self.close()
+
+    def stop(self):
+        """
+        Asks run() to return, may be called from a signal handler or another thread.
+        """
+        self._stop_event.set()
+
+    def close(self):
+        """
+        Saves the forecast to the model file and closes the socket.
+        """
+        if self.model_file_path is not None and self.forecast.has_learned:
+            self.forecast.save(self.model_file_path,
+                               {'product_id': self.product_id, 'granularity': self.granularity})
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def get_next_wakeup(self, now):
+        """
+        :param now: epoch seconds
+        :return: epoch seconds of the next candle boundary after now, plus the settle delay
+        """
+        return ((now - self.settle_delay) // self.granularity + 1) * self.granularity + self.settle_delay
+
+    def run_once(self):
+        """
+        Fetches candles closed since the last one in the log, learns them and publishes a prediction.
+
+        :return: number of new candles
+        """
+        metrics = get_metrics()
+        with metrics.timer('btc_forecast_daemon_cycle_seconds'):
+            try:
+                new_rates = self._fetch_closed_rates()
+            except (GDAXApiError, ValueError) as error:
+                # ValueError for a malformed page of candles
+                logging.getLogger('BTCForecastDaemon').warning('fetching candles failed | error=%s', error)
+                metrics.increment('btc_forecast_daemon_errors_total')
+                return 0
+
+            if len(new_rates):
+                self.log.merge(new_rates)
+                self.forecast.partial_learn(new_rates)
+                self._publish(new_rates.end_time[-1])
+        metrics.increment('btc_forecast_daemon_candles_total', len(new_rates))
+
+        logging.getLogger('BTCForecastDaemon').debug('cycle | new_rates=%s', len(new_rates))
+        return len(new_rates)
+
+    def _load_forecast(self, model_file_path):
+        metadata = BTCForecast.load_metadata(model_file_path)
+        if metadata['model_type'] != 'ONLINE':
+            raise ValueError("Model '{}' is a '{}' model, the daemon needs an 'ONLINE' model".format(
+                model_file_path, metadata['model_type']))
+
+        labels = metadata.get('labels', {})
+        if labels.get('product_id') != self.product_id or labels.get('granularity') != self.granularity:
+            raise ValueError("Model '{}' was saved for {} candles of {}s, not {} candles of {}s".format(
+                model_file_path, labels.get('product_id'), labels.get('granularity'), self.product_id,
+                self.granularity))
+        return BTCForecast.load(model_file_path)
+
+    def _has_latest_rate(self, now):
+        last_end_time = self.log.last_end_time()
+        return last_end_time is not None and last_end_time >= int(now) // self.granularity * self.granularity
+
+    def _learn_log(self):
+        """
+        Learns the latest window of the log, unless the forecast has learned it already.
+        """
+        last_end_time = self.log.last_end_time()
+        if last_end_time is None:
+            return
+
+        # partial_learn skips rates a loaded forecast has learned already
+        self.forecast.partial_learn(self.log.read_range(last_end_time - (self.window_size - 1) * self.granularity,
+                                                   last_end_time + 1))
+        self._publish(last_end_time)
+
+    def _fetch_closed_rates(self):
+        boundary = int(self._clock()) // self.granularity * self.granularity
+        last_end_time = self.log.last_end_time()
+        start = max(last_end_time or 0, boundary - self.window_size * self.granularity)
+        if start >= boundary:
+            return GDAXRateSeries.empty()
+
+        # the candle starting at the boundary is included in the response, but it's still open
+        gdax_rates = self.api.get_historic_rates(self.product_id, _format_iso(start), _format_iso(boundary),
+                                                 self.granularity)
+        return gdax_rates[(gdax_rates.start_time >= start) & (gdax_rates.end_time <= boundary)]
+
+    def _publish(self, last_end_time):
+        timestamps = last_end_time + np.arange(1, self.horizons + 1, dtype=np.int64) * self.granularity
+        self.prediction = {'product_id': self.product_id, 'granularity': self.granularity,
+                           'last_end_time': int(last_end_time), 'timestamps': timestamps.tolist(),
+                           'predictions': self.forecast.predict(timestamps).tolist()}
+        content = json.dumps(self.prediction)
+
+        if self.output_file_path is not None:
+            temporary_file_path = self.output_file_path + '.tmp'
+            with open(temporary_file_path, 'w') as output_file:
+                output_file.write(content)
+            os.replace(temporary_file_path, self.output_file_path)
+
+        if self._socket is not None:
+            try:
+                self._socket.sendto(content.encode(), self.socket_path)
+            except OSError as error:
+                logging.getLogger('BTCForecastDaemon').debug('sending failed | error=%s', error)
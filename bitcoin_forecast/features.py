@@ -0,0 +1,200 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from bitcoin_forecast import GDAXRateSeries
+
+
+class BTCFeatures(object):
+    """
+    Lagged closing prices, returns, rolling means, rolling volatility and volume features of rates.
+
+    The features of a rate only use the rates before it (and its own end time), so they're known
+    as soon as the previous candle closes and can be used to forecast the rate.
+    Rolling means are computed from cumulative sums and rolling volatility from sliding window views,
+    without Python loops over rates.
+
+    Computed features are cached. Rates not newer than the last cached rate are looked up, and only
+    the features of new rates are computed, from the last few cached rates they depend on.
+    Cached rates are matched by end time, closing price and volume. Rates which don't match the cache
+    (older than it, with end times, prices or volumes it doesn't hold, or new rates which don't start where
+    the last cached rate ends) reset it.
+    """
+
+    DEFAULT_LAGS = (1, 2, 3, 6, 12, 24)
+    DEFAULT_RETURN_PERIODS = (1, 6, 24)
+    DEFAULT_WINDOWS = (6, 24)
+
+    def __init__(self, lags=DEFAULT_LAGS, return_periods=DEFAULT_RETURN_PERIODS, windows=DEFAULT_WINDOWS,
+                 volume=True, end_time=True):
+        """
+        :param lags: lags of closing prices, in rates
+        :param return_periods: periods of returns up to the previous closing price, in rates
+        :param windows: lengths of windows for rolling means and volatility of previous rates
+        :param volume: whether to include the previous volume and its rolling means
+        :param end_time: whether to include the end time of the rate itself
+        """
+        assert all(period > 0 for period in tuple(lags) + tuple(return_periods) + tuple(windows)), \
+            'Lags, return periods and windows need to be positive'
+        self.lags = tuple(lags)
+        self.return_periods = tuple(return_periods)
+        self.windows = tuple(windows)
+        self.volume = volume
+        self.end_time = end_time
+
+        # number of previous rates the features of a rate depend on
+        self.lookback = max([1] + list(self.lags) + [period + 1 for period in self.return_periods] +
+                            [window + 1 for window in self.windows])
+
+        self._end_times = np.empty(0, dtype=np.int64)
+        # closing prices and volumes of cached rates, to tell other rates with the same end times apart
+        self._values = np.empty((0, 2))
+        self._matrix = np.empty((0, len(self.get_feature_names())))
+        self._num_of_rows = 0
+        self._tail = GDAXRateSeries.empty()
+
+    def get_params(self):
+        """
+        :return: dict of parameters, as passed to the constructor
+        """
+        return {'lags': self.lags, 'return_periods': self.return_periods, 'windows': self.windows,
+                'volume': self.volume, 'end_time': self.end_time}
+
+    def get_feature_names(self):
+        """
+        :return: a list of names of feature columns
+        """
+        return ((['end_time'] if self.end_time else []) +
+                ['close_lag_{}'.format(lag) for lag in self.lags] +
+                ['return_{}'.format(period) for period in self.return_periods] +
+                ['close_mean_{}'.format(window) for window in self.windows] +
+                ['volatility_{}'.format(window) for window in self.windows] +
+                (['volume_lag_1'] + ['volume_mean_{}'.format(window) for window in self.windows]
+                 if self.volume else []))
+
+    def transform(self, gdax_rates):
+        """
+        Gets features of rates, computing only those which aren't cached yet.
+
+        :param gdax_rates: list of GDAXRate's or GDAXRateSeries ordered by time
+        :return: float64 array with a row per rate and a column per feature, NaN where previous rates are missing
+        """
+        gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+        cached_end_times = self._end_times[:self._num_of_rows]
+
+        num_of_cached_rates = np.searchsorted(gdax_rates.end_time, cached_end_times[-1], side='right') \
+            if self._num_of_rows else 0
+        positions = np.searchsorted(cached_end_times, gdax_rates.end_time[:num_of_cached_rates])
+        if np.any(cached_end_times[positions] != gdax_rates.end_time[:num_of_cached_rates]) or \
+                np.any(self._values[positions] != _get_values(gdax_rates[:num_of_cached_rates])):
+            self.clear()
+            num_of_cached_rates = 0
+            positions = positions[:0]
+
+        new_rates = gdax_rates[num_of_cached_rates:]
+        if len(new_rates) and len(self._tail) and new_rates.start_time[0] != self._tail.end_time[-1]:
+            # rates are missing between the cache and the new rates, so the cached history doesn't apply
+            self.clear()
+            num_of_cached_rates = 0
+            positions = positions[:0]
+            new_rates = gdax_rates
+
+        if len(new_rates):
+            history = GDAXRateSeries.concatenate([self._tail, new_rates])
+            self._append(new_rates.end_time, _get_values(new_rates),
+                         _compute_features(self, history, len(self._tail)))
+            self._tail = history[-self.lookback:]
+
+        return self._matrix[np.concatenate([positions, np.arange(self._num_of_rows - len(new_rates),
+                                                                 self._num_of_rows)])]
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        self._num_of_rows = 0
+        self._tail = GDAXRateSeries.empty()
+
+    def _append(self, end_times, values, rows):
+        if self._num_of_rows + len(rows) > len(self._end_times):
+            # grow geometrically, so that appending a rate at a time takes amortized constant time
+            capacity = max(2 * len(self._end_times), self._num_of_rows + len(rows))
+            self._end_times = np.concatenate([self._end_times[:self._num_of_rows],
+                                              np.empty(capacity - self._num_of_rows, dtype=np.int64)])
+            self._values = np.concatenate([self._values[:self._num_of_rows],
+                                           np.empty((capacity - self._num_of_rows, 2))])
+            self._matrix = np.concatenate([self._matrix[:self._num_of_rows],
+                                           np.empty((capacity - self._num_of_rows, self._matrix.shape[1]))])
+
+        self._end_times[self._num_of_rows:self._num_of_rows + len(rows)] = end_times
+        self._values[self._num_of_rows:self._num_of_rows + len(rows)] = values
+        self._matrix[self._num_of_rows:self._num_of_rows + len(rows)] = rows
+        self._num_of_rows += len(rows)
+
+
+def _get_values(gdax_rates):
+    """
+    :return: float64 array with closing price and volume of every rate
+    """
+    return np.column_stack([gdax_rates.closing_price, gdax_rates.volume_of_trading])
+
+
+def _compute_features(features, gdax_rates, first_row):
+    """
+    Computes features of rates from first_row on, the rates before are only used as history.
+
+    :param features: BTCFeatures
+    :param gdax_rates: GDAXRateSeries
+    :param first_row: index of the first rate to compute features of
+    :return: float64 array with a row per rate from first_row on and a column per feature
+    """
+    closes = gdax_rates.closing_price
+    volumes = gdax_rates.volume_of_trading
+    rows = np.arange(first_row, len(gdax_rates))
+    close_sums = np.concatenate([[0.0], np.cumsum(closes)])
+    returns = np.concatenate([[np.nan], closes[1:] / closes[:-1] - 1])
+
+    columns = [gdax_rates.end_time[first_row:].astype(np.float64)] if features.end_time else []
+    columns += [_take(closes, rows - lag) for lag in features.lags]
+    columns += [_take(closes, rows - 1) / _take(closes, rows - 1 - period) - 1 for period in features.return_periods]
+    columns += [_rolling_mean(close_sums, rows, window) for window in features.windows]
+    columns += [_rolling_std(returns, rows, window) for window in features.windows]
+    if features.volume:
+        volume_sums = np.concatenate([[0.0], np.cumsum(volumes)])
+        columns += [_take(volumes, rows - 1)]
+        columns += [_rolling_mean(volume_sums, rows, window) for window in features.windows]
+
+    return np.column_stack(columns) if columns else np.empty((len(rows), 0))
+
+
+def _take(values, indices):
+    """
+    :return: values at indices, NaN at negative indices
+    """
+    result = np.full(len(indices), np.nan)
+    is_valid = indices >= 0
+    result[is_valid] = values[indices[is_valid]]
+    return result
+
+
+def _rolling_mean(sums, rows, window):
+    """
+    :param sums: cumulative sums of values, starting with 0
+    :return: means of the window values before each row, NaN where there are fewer values
+    """
+    starts = rows - window
+    result = np.full(len(rows), np.nan)
+    is_valid = starts >= 0
+    result[is_valid] = (sums[rows[is_valid]] - sums[starts[is_valid]]) / window
+    return result
+
+
+def _rolling_std(returns, rows, window):
+    """
+    :param returns: returns of rates, NaN for the first one
+    :return: standard deviations of the window returns before each row, NaN where there are fewer returns
+    """
+    starts = rows - window
+    result = np.full(len(rows), np.nan)
+    is_valid = starts >= 1
+    if len(returns) >= window and np.any(is_valid):
+        result[is_valid] = sliding_window_view(returns, window)[starts[is_valid]].std(axis=1)
+    return result
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class BTCForecastRegistry(object):
+    """
+    Learned forecasts of several products, answering batches of queries at once.
+
+    Queries of the same product are predicted together, in a single call of its forecast,
+    so the overhead of a call is paid once per product rather than once per query.
+    Only forecasts predicting from timestamps (without BTCFeatures) can be registered.
+
+    Usage:
+        registry = BTCForecastRegistry({'BTC-USD': btc_forecast, 'ETH-USD': eth_forecast})
+        results = registry.predict([('BTC-USD', timestamps), ('ETH-USD', other_timestamps)])
+        results[results['product_id'] == 'BTC-USD']['prediction']
+    """
+
+    RESULT_DTYPE = np.dtype([('query', np.int64), ('product_id', 'U16'), ('timestamp', np.int64),
+                             ('prediction', np.float64)])
+
+    def __init__(self, forecasts=None):
+        """
+        :param forecasts: dict of product id -> learned BTCForecast
+        """
+        self._forecasts = {}
+        for product_id, forecast in (forecasts or {}).items():
+            self.register(product_id, forecast)
+
+    @property
+    def product_ids(self):
+        return list(self._forecasts)
+
+    def register(self, product_id, forecast):
+        """
+        Adds or replaces the forecast of a product.
+
+        :param product_id: product e.g. BTC-USD
+        :param forecast: learned BTCForecast
+        """
+        if not forecast.has_learned:
+            raise TypeError('Learning is required before registering a forecast')
+        if forecast.uses_features:
+            raise TypeError('Forecasts learned from features predict from rates, not timestamps')
+        self._forecasts[product_id] = forecast
+
+    def unregister(self, product_id):
+        """
+        Removes the forecast of a product.
+
+        :param product_id: product e.g. BTC-USD
+        """
+        del self._forecasts[product_id]
+
+    def __getitem__(self, product_id):
+        return self._forecasts[product_id]
+
+    def __contains__(self, product_id):
+        return product_id in self._forecasts
+
+    def __len__(self):
+        return len(self._forecasts)
+
+    def predict(self, queries):
+        """
+        Predicts values of products at timestamps.
+
+        Timestamp arrays are used as they are, without copying them, when a product has a single query.
+
+        :param queries: list of (product id, timestamps) tuples, timestamps as an array or a list
+        :return: structured array of RESULT_DTYPE with a row per timestamp, ordered by query
+        """
+        queries = list(queries)
+        timestamps = [np.asarray(query_timestamps) for _, query_timestamps in queries]
+        offsets = np.cumsum([0] + [len(query_timestamps) for query_timestamps in timestamps])
+
+        queries_by_product = {}
+        for query, (product_id, _) in enumerate(queries):
+            if product_id not in self._forecasts:
+                raise KeyError("No forecast registered for product '{}'".format(product_id))
+            queries_by_product.setdefault(product_id, []).append(query)
+
+        results = np.empty(offsets[-1], dtype=BTCForecastRegistry.RESULT_DTYPE)
+        results['query'] = np.repeat(np.arange(len(queries)), np.diff(offsets))
+        for product_id, product_queries in queries_by_product.items():
+            if len(product_queries) == 1:
+                rows = slice(offsets[product_queries[0]], offsets[product_queries[0] + 1])
+                product_timestamps = timestamps[product_queries[0]]
+            else:
+                rows = np.concatenate([np.arange(offsets[query], offsets[query + 1]) for query in product_queries])
+                product_timestamps = np.concatenate([timestamps[query] for query in product_queries])
+
+            results['product_id'][rows] = product_id
+            results['timestamp'][rows] = product_timestamps
+            if len(product_timestamps):
+                results['prediction'][rows] = self._forecasts[product_id].predict(product_timestamps)
+
+        return results
+
+    def predict_horizons(self, timestamp, horizons, product_ids=None):
+        """
+        Predicts values of products at several horizons ahead of a timestamp.
+
+        :param timestamp: epoch seconds to count horizons from, usually the end time of the last rate
+        :param horizons: seconds ahead, e.g. np.arange(1, 25) * 60 * 60 for the next 24 hours
+        :param product_ids: products to predict, all registered products if None
+        :return: structured array of RESULT_DTYPE with a row per product and horizon, a query per product
+        """
+        timestamps = timestamp + np.asarray(horizons, dtype=np.int64)
+        product_ids = self.product_ids if product_ids is None else product_ids
+        return self.predict([(product_id, timestamps) for product_id in product_ids])
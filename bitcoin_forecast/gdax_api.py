@@ -1,9 +1,33 @@
-import requests
 import logging
 import csv
 import os
+import random
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
-from operator import itemgetter
+from email.utils import parsedate_to_datetime
+from itertools import chain, islice
+from bitcoin_forecast.metrics import get_metrics
+
+
+class GDAXApiError(Exception):
+    """
+    GDAX API request failed.
+    """
+
+    def __init__(self, message, status_code=None):
+        super(GDAXApiError, self).__init__(message if status_code is None
+                                           else '{} (status code {})'.format(message, status_code))
+        self.message = message
+        self.status_code = status_code
+
+
+class GDAXRateLimitError(GDAXApiError):
+    """
+    GDAX API kept rejecting requests for exceeding the rate limit.
+    """
 
 
 class GDAXApi(object):
@@ -17,6 +41,47 @@ class GDAXApi(object):
 
     API_URL = 'https://api.gdax.com'
     MAX_NUM_DATA_POINTS_PER_PAGE = 200
+    MAX_REQUESTS_PER_SECOND = 3
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_url=API_URL, max_in_flight=1, requests_per_second=MAX_REQUESTS_PER_SECOND,
+                 session=None, max_retries=5, backoff=0.5, max_backoff=30, timeout=30, cache=None):
+        """
+        Sets up the client.
+
+        :param api_url: base URL of the API
+        :param max_in_flight: maximum number of pages fetched in parallel, 1 fetches them one by one
+        :param requests_per_second: maximum request rate (public endpoints allow 3 per second),
+                                    None disables the limit
+        :param session: requests.Session to use, a keep-alive session with a connection pool is created if None
+        :param max_retries: how many times a request is retried after a 429/5xx response or connection error
+        :param backoff: base delay in seconds of the jittered exponential backoff between retries
+        :param max_backoff: maximum delay in seconds between retries
+        :param timeout: request timeout in seconds
+        :param cache: page cache with get/put methods e.g. GDAXPageCache, None disables caching
+        """
+        assert max_in_flight >= 1, 'max_in_flight needs to be at least 1'
+
+        self.api_url = api_url
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.cache = cache
+        self._token_bucket = TokenBucket(requests_per_second) if requests_per_second else None
+        self._session = session if session is not None else self._create_session(max_in_flight)
+
+    @staticmethod
+    def _create_session(pool_size):
+        # imported only when a client is created, reading rate logs doesn't need requests
+        import requests
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 10))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
     def get_products(self):
         """
@@ -24,10 +89,9 @@ class GDAXApi(object):
 
         :return: list of products e.g. BTC-USD
         """
-        response = requests.get(self.API_URL + '/products')
-        products = response.json()
+        products = self._get('/products')
 
-        logging.getLogger('GDAXApi').debug('products={}'.format(products))
+        logging.getLogger('GDAXApi').debug('products=%s', products)
         return [product['id'] for product in products]
 
     def get_historic_rates(self, product_id, start, end, granularity=60*60):
@@ -35,27 +99,36 @@ class GDAXApi(object):
         Historic rates for a product.
 
         This method paginates automatically over period from start to end, making sure the maximum
-        number of data points is not exceeded.
+        number of data points is not exceeded. Pages are fetched in parallel when max_in_flight > 1.
+        Pages are joined in order, rates repeated at page boundaries are dropped.
 
         :param product_id: product e.g. BTC-USD
         :param start: Start time in ISO 8601
         :param end: End time in ISO 8601
         :param granularity: Desired timeslice in seconds (defaults to 1 hour)
-        :return: a list of GDAXRate objects
+        :return: GDAXRateSeries
         """
 
+        metrics = get_metrics()
+        started = time.perf_counter()
         periods = self._get_data_point_ranges(start, end, granularity)
-        logging.getLogger('GDAXApi').debug('starting pagination | periods={}'.format(periods))
+        logging.getLogger('GDAXApi').debug('starting pagination | periods=%s', periods)
 
-        historic_rates = []
-        for range_start, range_end in periods:
-            raw_partial_rates = self._get_raw_partial_rates(product_id, range_start, range_end, granularity)
-            sorted_raw_partial_rates = sorted(raw_partial_rates, key=itemgetter(0))
+        def get_partial_rates(period):
+            raw_partial_rates = self._get_raw_partial_rates(product_id, period[0], period[1], granularity)
+            return GDAXRateSeries.from_raw_rates(raw_partial_rates, granularity)
 
-            partial_rates = [self._convert_to_rate(raw_rate, granularity) for raw_rate in sorted_raw_partial_rates]
-            historic_rates += partial_rates
+        if self.max_in_flight > 1 and len(periods) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+                historic_rates = list(executor.map(get_partial_rates, periods))
+        else:
+            historic_rates = [get_partial_rates(period) for period in periods]
 
-        return historic_rates
+        gdax_rates = GDAXRateSeries.merge(historic_rates)
+        metrics.observe('gdax_api_fetch_seconds', time.perf_counter() - started)
+        metrics.observe('gdax_api_fetch_pages', len(periods))
+        metrics.observe('gdax_api_fetch_rows', len(gdax_rates))
+        return gdax_rates
 
     def _get_data_point_ranges(self, start, end, granularity):
         """
@@ -97,147 +170,877 @@ class GDAXApi(object):
         If you wish to retrieve fine granularity data over a larger time range,
         you will need to make multiple requests with new start/end ranges.
 
+        Pages are served from the page cache if there is one.
+
         :param product_id: product e.g. BTC-USD
         :param start: Start time in ISO 8601
         :param end: End time in ISO 8601
         :param granularity: Desired timeslice in seconds
         :return: list of rates in format [[time, low, high, open, close, volume],...]
+        :raises GDAXApiError: if the request fails or the response isn't a list of rates
         """
         params = {'start': start, 'end': end, 'granularity': granularity}
-        logging.getLogger('GDAXApi').debug('_get_raw_partial_rates | start={}, end={}, granularity={}'.format(start, end, granularity))
+        logger = logging.getLogger('GDAXApi')
+        logger.debug('_get_raw_partial_rates | start=%s, end=%s, granularity=%s', start, end, granularity)
+
+        if self.cache is not None:
+            raw_partial_rates = self.cache.get(product_id, start, end, granularity)
+            if raw_partial_rates is not None:
+                get_metrics().increment('gdax_api_cache_hits_total')
+                return raw_partial_rates
 
-        response = requests.get('{}/products/{}/candles'.format(self.API_URL, product_id), params=params)
-        raw_partial_rates = response.json()
+        raw_partial_rates = self._get('/products/{}/candles'.format(product_id), params=params)
 
-        logging.getLogger('GDAXApi').debug('response code: {}'.format(response.status_code))
-        logging.getLogger('GDAXApi').debug('raw_partial_rates.count={}'.format(len(raw_partial_rates)))
-        logging.getLogger('GDAXApi').debug('raw_partial_rates={}'.format(raw_partial_rates))
+        # formatted only if debug logging is enabled, a page is thousands of characters
+        logger.debug('raw_partial_rates.count=%s', len(raw_partial_rates))
+        logger.debug('raw_partial_rates=%s', raw_partial_rates)
 
-        if response.status_code != 200:
-            logging.getLogger('GDAXApi').error('error code: {}'.format(response.status_code))
-            if 'message' in raw_partial_rates:
-                logging.getLogger('GDAXApi').error('error message: {}'.format(raw_partial_rates.message))
+        if not isinstance(raw_partial_rates, list):
+            raise GDAXApiError('Unexpected candles response: {}'.format(raw_partial_rates))
+
+        if self.cache is not None:
+            self.cache.put(product_id, start, end, granularity, raw_partial_rates)
 
         return raw_partial_rates
 
-    def _convert_to_rate(self, raw_rate, granularity):
+    def _get(self, path, params=None):
         """
-        Converts raw rate to proper transfer object.
+        GET request with retries.
 
-        :param raw_rate: a list in format [ time, low, high, open, close, volume ]
-        :param granularity: Desired timeslice in seconds
-        :return: GDAXRate object
+        Connection errors, timeouts, responses cut off mid-body and 429/5xx responses are retried with
+        jittered exponential backoff, honouring Retry-After if the response has one. Other request errors
+        fail right away.
+
+        :param path: path relative to the API URL
+        :param params: query parameters
+        :return: decoded JSON response
+        :raises GDAXRateLimitError: if the request is still rate limited after all retries
+        :raises GDAXApiError: if the request fails
+        """
+        import requests
+
+        metrics = get_metrics()
+        for attempt in range(self.max_retries + 1):
+            self._acquire_token()
+            is_last_attempt = attempt == self.max_retries
+
+            started = time.perf_counter()
+            try:
+                response = self._session.get(self.api_url + path, params=params, timeout=self.timeout)
+            except requests.RequestException as error:
+                metrics.increment('gdax_api_requests_total', tags={'status': 'error'})
+                # connections dropped before or while the response is received are transient
+                is_transient = isinstance(error, (requests.ConnectionError, requests.Timeout,
+                                                  requests.exceptions.ChunkedEncodingError,
+                                                  requests.exceptions.ContentDecodingError))
+                if is_last_attempt or not is_transient:
+                    raise GDAXApiError('Request to {} failed: {}'.format(path, error)) from error
+                delay = self._get_backoff(attempt)
+            else:
+                tags = {'status': response.status_code}
+                metrics.observe('gdax_api_request_seconds', time.perf_counter() - started, tags)
+                metrics.increment('gdax_api_requests_total', tags=tags)
+                metrics.increment('gdax_api_response_bytes_total', len(response.content))
+                logging.getLogger('GDAXApi').debug('response code: %s', response.status_code)
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError as error:
+                        raise GDAXApiError('Invalid JSON response from {}'.format(path)) from error
+
+                message = self._get_error_message(response)
+                if response.status_code not in self.RETRY_STATUS_CODES or is_last_attempt:
+                    error_class = GDAXRateLimitError if response.status_code == 429 else GDAXApiError
+                    raise error_class(message, response.status_code)
+                delay = self._get_backoff(attempt, response.headers.get('Retry-After'))
+
+            metrics.increment('gdax_api_retries_total')
+            logging.getLogger('GDAXApi').warning('retrying %s in %.2fs | attempt=%s', path, delay, attempt + 1)
+            time.sleep(delay)
+
+    def _get_backoff(self, attempt, retry_after=None):
+        """
+        Delay before the next attempt.
+
+        :param attempt: number of the failed attempt, starting at 0
+        :param retry_after: value of the Retry-After header, in seconds or as an HTTP date
+        :return: delay in seconds
+        """
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+        # full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _get_error_message(response):
+        try:
+            return response.json()['message']
+        except (ValueError, KeyError, TypeError):
+            return response.text or response.reason
+
+    def _acquire_token(self):
+        if self._token_bucket is not None:
+            self._token_bucket.acquire()
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket limiting the rate of requests.
+
+    Tokens are refilled continuously at the given rate, up to the burst size.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param rate: tokens per second
+        :param burst: bucket size, defaults to the rate (but at least 1)
+        :param clock: monotonic clock in seconds
+        :param sleep: function used to wait for tokens
         """
-        return GDAXRate(raw_rate[0], raw_rate[0] + granularity,
-                        raw_rate[1], raw_rate[2], raw_rate[3], raw_rate[4], raw_rate[5])
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes a token, blocking until one is available.
+        """
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+
+            self._sleep(wait)
 
 
 class GDAXRate(object):
     """
     Transfer object for retrieving rates from GDAX public API.
+
+    Rates are immutable and hashable. Fields are held in __slots__, so a rate carries no __dict__.
+    from_raw_candles() and from_epoch_arrays() create many rates at once, converting whole columns
+    instead of checking and parsing the fields of every rate.
     """
 
+    __slots__ = ('start_time', 'end_time', 'lowest_price', 'highest_price', 'opening_price', 'closing_price',
+                 'volume_of_trading')
+
     def __init__(self, start_time, end_time, lowest_price, highest_price, opening_price, closing_price,
                  volume_of_trading):
         if isinstance(start_time, int):
-            self.start_time = datetime.utcfromtimestamp(start_time)
-        elif isinstance(start_time, date):
-            self.start_time = start_time
+            start_time = datetime.utcfromtimestamp(start_time)
         elif isinstance(start_time, str):
-            self.start_time = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-        else:
+            start_time = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
+        elif not isinstance(start_time, date):
             raise TypeError('start_time "{}" needs to be one of: date, int, str'.format(start_time))
 
         if isinstance(end_time, int):
-            self.end_time = datetime.utcfromtimestamp(end_time)
-        elif isinstance(end_time, date):
-            self.end_time = end_time
+            end_time = datetime.utcfromtimestamp(end_time)
         elif isinstance(end_time, str):
-            self.end_time = datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S")
-        else:
+            end_time = datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S")
+        elif not isinstance(end_time, date):
             raise TypeError('end_time "{}" needs to be one of: date, int, str'.format(end_time))
 
-        self.lowest_price = lowest_price
-        self.highest_price = highest_price
-        self.opening_price = opening_price
-        self.closing_price = closing_price
-        self.volume_of_trading = volume_of_trading
+        for field_name, value in zip(GDAXRate.__slots__, (start_time, end_time, lowest_price, highest_price,
+                                                          opening_price, closing_price, volume_of_trading)):
+            object.__setattr__(self, field_name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('GDAXRate is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('GDAXRate is immutable')
+
+    def __reduce__(self):
+        return GDAXRate, self._fields()
+
+    def _fields(self):
+        return (self.start_time, self.end_time, self.lowest_price, self.highest_price, self.opening_price,
+                self.closing_price, self.volume_of_trading)
+
+    def to_dict(self):
+        """
+        :return: dict of field name -> value
+        """
+        return dict(zip(GDAXRate.__slots__, self._fields()))
 
     def __repr__(self):
-        return "<GDAXRate %s>" % self.__dict__
+        return "<GDAXRate %s>" % self.to_dict()
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        if not isinstance(other, GDAXRate):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
 
     @staticmethod
     def get_field_names():
         return ['start_time', 'end_time', 'lowest_price', 'highest_price',
                 'opening_price', 'closing_price', 'volume_of_trading']
 
+    @staticmethod
+    def from_raw_candles(raw_candles, granularity):
+        """
+        Creates rates from a raw GDAX API response, in the order of the response.
+
+        End times are start times plus granularity.
+
+        :param raw_candles: a list in format [[time, low, high, open, close, volume],...]
+        :param granularity: timeslice in seconds
+        :return: a list of GDAXRate objects
+        """
+        if len(raw_candles) == 0:
+            return []
+
+        raw_candles = np.asarray(raw_candles, dtype=np.float64)
+        start_time = raw_candles[:, 0].astype(np.int64)
+        return GDAXRate.from_epoch_arrays(start_time, start_time + granularity,
+                                          *[raw_candles[:, column] for column in range(1, 6)])
+
+    @staticmethod
+    def from_epoch_arrays(start_time, end_time, lowest_price, highest_price, opening_price, closing_price,
+                          volume_of_trading):
+        """
+        Creates rates from columns, e.g. those of a GDAXRateSeries.
+
+        :param start_time: epoch seconds (UTC)
+        :param end_time: epoch seconds (UTC)
+        :param lowest_price: an array of prices, and so on for the other price columns and volume
+        :return: a list of GDAXRate objects
+        """
+        # datetimes are created once per distinct time and shared, the end time of a rate is usually
+        # the start time of the next one
+        start_times, end_times = _to_shared_datetimes([start_time, end_time])
+        return list(map(_create_rate, start_times, end_times,
+                        *[np.asarray(column, dtype=np.float64).tolist() for column in (lowest_price, highest_price,
+                                                                                       opening_price, closing_price,
+                                                                                       volume_of_trading)]))
+
     @staticmethod
     def to_timestamps(gdax_rates):
         """
-        Gets a list of end times from rates.
+        Gets end times from rates.
 
-        :param gdax_rates: a list of rates
-        :return: a list of end time timestamps
+        :param gdax_rates: a list of rates or GDAXRateSeries
+        :return: an array of end time timestamps (epoch seconds, UTC)
         """
-        return [gdax_rate.end_time.timestamp() for gdax_rate in gdax_rates]
+        if isinstance(gdax_rates, GDAXRateSeries):
+            return gdax_rates.timestamps
+        return _to_epoch_seconds([gdax_rate.end_time for gdax_rate in gdax_rates])
 
     @staticmethod
     def to_dates(gdax_rates):
         """
         Gets a list of end times from rates.
 
-        :param gdax_rates: a list of rates
+        :param gdax_rates: a list of rates or GDAXRateSeries
         :return: a list of end time datetimes
         """
+        if isinstance(gdax_rates, GDAXRateSeries):
+            return gdax_rates.to_dates()
         return [gdax_rate.end_time for gdax_rate in gdax_rates]
 
     @staticmethod
     def to_prices(gdax_rates):
         """
-        Gets a list of closing prices.
+        Gets closing prices.
+
+        :param gdax_rates: a list of rates or GDAXRateSeries
+        :return: an array of closing prices
+        """
+        if isinstance(gdax_rates, GDAXRateSeries):
+            return gdax_rates.prices
+        return np.array([gdax_rate.closing_price for gdax_rate in gdax_rates], dtype=np.float64)
+
+
+def _create_rate_function():
+    """
+    Creates rates setting fields through the slot descriptors of GDAXRate, bypassing its immutability
+    and the type checks of its constructor.
+
+    :return: function creating a rate from fields
+    """
+    (set_start_time, set_end_time, set_lowest_price, set_highest_price, set_opening_price, set_closing_price,
+     set_volume_of_trading) = [getattr(GDAXRate, field_name).__set__ for field_name in GDAXRate.__slots__]
+
+    def create_rate(start_time, end_time, lowest_price, highest_price, opening_price, closing_price,
+                    volume_of_trading, new=object.__new__):
+        rate = new(GDAXRate)
+        set_start_time(rate, start_time)
+        set_end_time(rate, end_time)
+        set_lowest_price(rate, lowest_price)
+        set_highest_price(rate, highest_price)
+        set_opening_price(rate, opening_price)
+        set_closing_price(rate, closing_price)
+        set_volume_of_trading(rate, volume_of_trading)
+        return rate
+
+    return create_rate
+
+
+_create_rate = _create_rate_function()
+
+
+def _to_shared_datetimes(columns):
+    """
+    Converts columns of epoch seconds to lists of naive UTC datetimes, with a single object per distinct time.
+
+    :param columns: a list of arrays of the same length
+    :return: a list of lists of datetimes
+    """
+    timestamps = np.concatenate([np.asarray(column, dtype=np.int64) for column in columns])
+    distinct_timestamps, indices = np.unique(timestamps, return_inverse=True)
+    objects = _from_epoch_seconds(distinct_timestamps)
+    return [[objects[index] for index in column_indices.tolist()]
+            for column_indices in np.split(indices.ravel(), len(columns))]
+
+
+class GDAXRateSeries(object):
+    """
+    Columnar container of rates backed by NumPy arrays.
+
+    Start and end times are held as int64 epoch seconds (UTC), prices and volume as float64.
+    Each column is exposed as an attribute named after the matching GDAXRate field.
+    Rows are converted to GDAXRate objects only when they are asked for.
+    """
+
+    TIME_FIELD_NAMES = ['start_time', 'end_time']
+    VALUE_FIELD_NAMES = ['lowest_price', 'highest_price', 'opening_price', 'closing_price', 'volume_of_trading']
+
+    def __init__(self, start_time, end_time, lowest_price, highest_price, opening_price, closing_price,
+                 volume_of_trading):
+        self.start_time = np.asarray(start_time, dtype=np.int64)
+        self.end_time = np.asarray(end_time, dtype=np.int64)
+        self.lowest_price = np.asarray(lowest_price, dtype=np.float64)
+        self.highest_price = np.asarray(highest_price, dtype=np.float64)
+        self.opening_price = np.asarray(opening_price, dtype=np.float64)
+        self.closing_price = np.asarray(closing_price, dtype=np.float64)
+        self.volume_of_trading = np.asarray(volume_of_trading, dtype=np.float64)
+
+        if len({column.shape for column in self.columns()}) > 1 or self.end_time.ndim != 1:
+            raise ValueError('All columns of GDAXRateSeries need to have the same one-dimensional shape')
+
+    @property
+    def timestamps(self):
+        """
+        End time timestamps as a zero-copy view.
+
+        :return: int64 array of epoch seconds
+        """
+        return self.end_time
+
+    @property
+    def prices(self):
+        """
+        Closing prices as a zero-copy view.
+
+        :return: float64 array
+        """
+        return self.closing_price
+
+    def columns(self):
+        """
+        Gets all columns in the order of GDAXRate.get_field_names().
+
+        :return: a list of arrays
+        """
+        return [getattr(self, field_name) for field_name in GDAXRate.get_field_names()]
+
+    def to_rates(self):
+        """
+        Converts the whole series to GDAXRate objects.
+
+        :return: a list of GDAXRate objects
+        """
+        return GDAXRate.from_epoch_arrays(*self.columns())
+
+    def to_dates(self):
+        """
+        Gets a list of end times.
+
+        :return: a list of end time datetimes
+        """
+        return _from_epoch_seconds(self.end_time)
+
+    def __len__(self):
+        return len(self.end_time)
+
+    def __iter__(self):
+        # rates are created a block at a time, with the bulk constructor
+        for block_start in range(0, len(self), 1024):
+            yield from GDAXRate.from_epoch_arrays(*[column[block_start:block_start + 1024]
+                                                    for column in self.columns()])
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if not -len(self) <= key < len(self):
+                raise IndexError('GDAXRateSeries index {} out of range'.format(key))
+            return self._rate_at(int(key) % len(self))
+        return GDAXRateSeries(*[column[key] for column in self.columns()])
+
+    def _rate_at(self, index):
+        return GDAXRate(int(self.start_time[index]), int(self.end_time[index]),
+                        *[float(getattr(self, field_name)[index]) for field_name in self.VALUE_FIELD_NAMES])
+
+    def __eq__(self, other):
+        if not isinstance(other, GDAXRateSeries):
+            return NotImplemented
+        return len(self) == len(other) and all(np.array_equal(column, other_column) for column, other_column
+                                               in zip(self.columns(), other.columns()))
+
+    __hash__ = None
+
+    def __repr__(self):
+        if len(self) == 0:
+            return '<GDAXRateSeries empty>'
+        first, last = _from_epoch_seconds(self.end_time[[0, -1]])
+        return '<GDAXRateSeries len={} end_time={}..{}>'.format(len(self), first, last)
+
+    @staticmethod
+    def empty():
+        """
+        Creates a series without rows.
+
+        :return: GDAXRateSeries
+        """
+        return GDAXRateSeries(*[[] for _ in GDAXRate.get_field_names()])
+
+    @staticmethod
+    def from_rates(gdax_rates):
+        """
+        Creates a series from GDAXRate objects.
+
+        A GDAXRateSeries passed in is returned as it is.
+
+        :param gdax_rates: a list of GDAXRate objects or GDAXRateSeries
+        :return: GDAXRateSeries
+        """
+        if isinstance(gdax_rates, GDAXRateSeries):
+            return gdax_rates
+
+        return GDAXRateSeries(_to_epoch_seconds([gdax_rate.start_time for gdax_rate in gdax_rates]),
+                              _to_epoch_seconds([gdax_rate.end_time for gdax_rate in gdax_rates]),
+                              *[[getattr(gdax_rate, field_name) for gdax_rate in gdax_rates]
+                                for field_name in GDAXRateSeries.VALUE_FIELD_NAMES])
+
+    @staticmethod
+    def from_raw_rates(raw_rates, granularity):
+        """
+        Creates a series from a raw GDAX API response, sorted by start time.
+
+        :param raw_rates: a list in format [[time, low, high, open, close, volume],...]
+        :param granularity: timeslice in seconds
+        :return: GDAXRateSeries
+        :raises ValueError: if the response isn't a list of candles
+        """
+        if len(raw_rates) == 0:
+            return GDAXRateSeries.empty()
+
+        raw_rates = np.asarray(raw_rates, dtype=np.float64)
+        if raw_rates.ndim != 2 or raw_rates.shape[1] < 6:
+            raise ValueError('Candles need 6 fields, got an array of shape {}'.format(raw_rates.shape))
+        raw_rates = raw_rates[np.argsort(raw_rates[:, 0], kind='stable')]
+        start_time = raw_rates[:, 0].astype(np.int64)
+
+        return GDAXRateSeries(start_time, start_time + granularity, *raw_rates[:, 1:6].T)
+
+    @staticmethod
+    def merge(series_list):
+        """
+        Joins series into one ordered by end time, keeping only the first rate for every end time.
 
-        :param gdax_rates: a list of rates
-        :return: a list of closing prices
+        :param series_list: a list of GDAXRateSeries
+        :return: GDAXRateSeries
         """
-        return [gdax_rate.closing_price for gdax_rate in gdax_rates]
+        gdax_rates = GDAXRateSeries.concatenate(series_list)
+        if np.all(gdax_rates.end_time[1:] > gdax_rates.end_time[:-1]):
+            return gdax_rates
+
+        gdax_rates = gdax_rates[np.argsort(gdax_rates.end_time, kind='stable')]
+        is_first = np.ones(len(gdax_rates), dtype=bool)
+        is_first[1:] = gdax_rates.end_time[1:] != gdax_rates.end_time[:-1]
+        return gdax_rates[is_first]
+
+    @staticmethod
+    def concatenate(series_list):
+        """
+        Joins series one after another.
+
+        :param series_list: a list of GDAXRateSeries
+        :return: GDAXRateSeries
+        """
+        series_list = [GDAXRateSeries.from_rates(series) for series in series_list]
+        if len(series_list) == 0:
+            return GDAXRateSeries.empty()
+        if len(series_list) == 1:
+            return series_list[0]
+
+        return GDAXRateSeries(*[np.concatenate(columns) for columns in
+                                zip(*[series.columns() for series in series_list])])
+
+
+def _to_epoch_seconds(datetimes):
+    """
+    Converts naive UTC datetimes to epoch seconds.
+
+    :param datetimes: a list of datetimes
+    :return: int64 array
+    """
+    return np.array(datetimes, dtype='datetime64[s]').astype(np.int64)
+
+
+def _from_epoch_seconds(timestamps):
+    """
+    Converts epoch seconds to naive UTC datetimes.
+
+    :param timestamps: int64 array
+    :return: a list of datetimes
+    """
+    return np.asarray(timestamps, dtype=np.int64).astype('datetime64[s]').tolist()
+
+
+def _to_timestamp(time):
+    """
+    Converts a single time to epoch seconds.
+
+    :param time: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string
+    :return: int
+    """
+    if isinstance(time, (int, np.integer)):
+        return int(time)
+    elif isinstance(time, date):
+        return int(_to_epoch_seconds([time])[0])
+    elif isinstance(time, str):
+        return int(_to_epoch_seconds([datetime.strptime(time, "%Y-%m-%d %H:%M:%S")])[0])
+    else:
+        raise TypeError('time "{}" needs to be one of: date, int, str'.format(time))
+
+
+def _format_epoch_seconds(timestamps):
+    """
+    Formats epoch seconds as '%Y-%m-%d %H:%M:%S' strings.
+
+    :param timestamps: int64 array
+    :return: a list of strings
+    """
+    formatted = np.datetime_as_string(np.asarray(timestamps, dtype=np.int64).astype('datetime64[s]'))
+    return np.char.replace(formatted, 'T', ' ').tolist()
+
+
+TIMESTAMP_LENGTH = len('YYYY-MM-DD HH:MM:SS')
+
+
+def _parse_csv_rates(lines, field_names):
+    """
+    Parses CSV lines of a rate log into a series in one pass.
+
+    Numbers are parsed by NumPy's C reader. Times in '%Y-%m-%d %H:%M:%S' format are parsed with vectorized
+    arithmetic, see _parse_timestamps().
+
+    :param lines: a list of CSV lines without header
+    :param field_names: column names from the header
+    :return: GDAXRateSeries
+    """
+    missing_field_names = set(GDAXRate.get_field_names()) - set(field_names)
+    if missing_field_names:
+        raise ValueError('Rate log is missing columns: {}'.format(sorted(missing_field_names)))
+    if len(lines) == 0:
+        return GDAXRateSeries.empty()
+
+    use_columns = [field_names.index(field_name) for field_name in GDAXRate.get_field_names()]
+    dtype = [(field_name, 'S{}'.format(TIMESTAMP_LENGTH + 1) if field_name in GDAXRateSeries.TIME_FIELD_NAMES
+              else np.float64) for field_name in GDAXRate.get_field_names()]
+    order = np.argsort(use_columns)
+    rows = np.loadtxt(lines, delimiter=',', usecols=sorted(use_columns), ndmin=1,
+                      dtype=[dtype[index] for index in order])
+
+    return GDAXRateSeries(*[_parse_timestamps(rows[field_name]) for field_name in GDAXRateSeries.TIME_FIELD_NAMES],
+                          *[rows[field_name] for field_name in GDAXRateSeries.VALUE_FIELD_NAMES])
+
+
+def _parse_timestamps(byte_strings):
+    """
+    Parses '%Y-%m-%d %H:%M:%S' UTC times to epoch seconds without calling strptime for each value.
+
+    :param byte_strings: an array of byte strings
+    :return: int64 array
+    """
+    digits = np.ascontiguousarray(byte_strings, dtype='S{}'.format(TIMESTAMP_LENGTH + 1))
+    digits = digits.view(np.uint8).reshape(-1, TIMESTAMP_LENGTH + 1).astype(np.int64)
+
+    separators = digits[:, [4, 7, 10, 13, 16, TIMESTAMP_LENGTH]]
+    if not (separators == np.array([ord('-'), ord('-'), ord(' '), ord(':'), ord(':'), 0])).all():
+        raise ValueError("Times need to be in '%Y-%m-%d %H:%M:%S' format")
+
+    digits -= ord('0')
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+    seconds = (digits[:, 11] * 10 + digits[:, 12]) * 3600 + (digits[:, 14] * 10 + digits[:, 15]) * 60 \
+        + digits[:, 17] * 10 + digits[:, 18]
+
+    # days since epoch from a civil date, see http://howardhinnant.github.io/date_algorithms.html
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+
+    return days * 86400 + seconds
 
 
 class GDAXRateLog(object):
     """
     CSV Log File for storing historical rates.
+
+    gdax_rates holds the rates read last, or the latest TAIL_SIZE rates appended.
     """
+
+    DEFAULT_READ_CHUNK_SIZE = 1000000
+    INDEX_STRIDE = 1024
+    INDEX_CHUNK_SIZE = 64 * 1024 * 1024
+    TAIL_SIZE = 10000
+
     def __init__(self, file_path):
         self.file_path = file_path
-        self.gdax_rates = []
+        self.index_file_path = file_path + '.idx'
+        self.gdax_rates = GDAXRateSeries.empty()
+        # index kept in memory when the sidecar file can't be written
+        self._index = None
 
     def append(self, gdax_rates):
         """
         Append rates to the CSV log. File is created if it doesn't exist.
 
-        :param gdax_rates: a list of GDAXRate objects
+        Rates not newer than the last one in the log are dropped, use merge() to insert older rates.
+        Use GDAXRateLogWriter rather than appending a few rates at a time.
+
+        :param gdax_rates: a list of GDAXRate objects or GDAXRateSeries
+        :return: number of rates appended
+        """
+        with GDAXRateLogWriter(self, tail_size=self.TAIL_SIZE) as writer:
+            num_of_rates = writer.write(gdax_rates)
+
+        self.gdax_rates = GDAXRateSeries.concatenate([self.gdax_rates, writer.tail])[-self.TAIL_SIZE:]
+        return num_of_rates
+
+    def merge(self, gdax_rates):
+        """
+        Merge rates into the CSV log, keeping it in end time order without duplicates.
+
+        Rates newer than the last one in the log are simply appended. Otherwise the merged log is written
+        into a temporary file which atomically replaces the log. Rates already in the log are kept.
+
+        :param gdax_rates: a list of GDAXRate objects or GDAXRateSeries
         """
-        is_existing_file = os.path.isfile(self.file_path)
-        field_names = GDAXRate.get_field_names()
+        gdax_rates = GDAXRateSeries.merge([gdax_rates])
+        if len(gdax_rates) == 0:
+            return
 
-        mode = 'a' if is_existing_file else 'w'
+        last_end_time = self.last_end_time()
+        if last_end_time is None or gdax_rates.end_time[0] > last_end_time:
+            self.append(gdax_rates)
+            return
 
-        with open(self.file_path, mode) as csv_file:
-            writer = csv.DictWriter(csv_file, fieldnames=field_names)
-            if not is_existing_file:
-                writer.writeheader()
-            for rate in gdax_rates:
-                writer.writerow(rate.__dict__)
+        merged_rates = GDAXRateSeries.merge([self.read(), gdax_rates])
+        temporary_file_path = self.file_path + '.tmp'
+        if os.path.isfile(temporary_file_path):
+            os.remove(temporary_file_path)
+        GDAXRateLog(temporary_file_path).append(merged_rates)
+        os.replace(temporary_file_path, self.file_path)
 
-        self.gdax_rates.append(gdax_rates)
+        if self._has_index():
+            self._index = None
+            if os.path.isfile(self.index_file_path):
+                os.remove(self.index_file_path)
+            self.build_index()
+        self.gdax_rates = merged_rates
 
-    def read(self):
+    def last_end_time(self):
+        """
+        Gets end time of the last rate in the CSV log, reading only the end of the file.
+
+        :return: epoch seconds or None if the log is empty or doesn't exist
+        """
+        if not os.path.isfile(self.file_path):
+            return None
+
+        with open(self.file_path, 'rb') as csv_file:
+            header = csv_file.readline()
+            if not header.strip():
+                # a file created but never written to
+                return None
+            file_size = os.path.getsize(self.file_path)
+            tail_size = 4096
+            while True:
+                tail_start = max(len(header), file_size - tail_size)
+                csv_file.seek(tail_start)
+                lines = csv_file.read().decode().splitlines()
+                # the first line is complete only if it starts right after the header
+                if len(lines) >= 2 or tail_start == len(header):
+                    break
+                tail_size *= 2
+
+        last_rate = _parse_csv_rates(lines[-1:], next(csv.reader([header.decode()]), []))
+        return int(last_rate.end_time[0]) if len(last_rate) else None
+
+    def read(self, chunk_size=DEFAULT_READ_CHUNK_SIZE):
         """
         Read rates from the CSV log.
 
-        :return: a list of GDAXRate objects
+        Rows are parsed in bulk, chunk by chunk, straight into typed arrays.
+
+        :param chunk_size: number of rows parsed at once
+        :return: GDAXRateSeries
+        """
+        assert os.path.isfile(self.file_path), "File '{}' doesn't exist.".format(self.file_path)
+
+        metrics = get_metrics()
+        with metrics.timer('gdax_rate_log_read_seconds'), open(self.file_path) as csv_file:
+            gdax_rates = _read_csv_rates(csv_file, chunk_size)
+        metrics.increment('gdax_rate_log_read_rows_total', len(gdax_rates))
+
+        self.gdax_rates = gdax_rates
+        return gdax_rates
+
+    def read_range(self, start, end):
+        """
+        Read rates with end time in [start, end) from the CSV log.
+
+        Only the region of the file holding the requested rates is read, located with a sparse index
+        from end time to byte offset (see build_index()). Rates in the log need to be in end time order.
+
+        :param start: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string
+        :param end: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string
+        :return: GDAXRateSeries
+        """
+        start, end = _to_timestamp(start), _to_timestamp(end)
+        end_times, offsets, covered_bytes = self.build_index()
+        if len(offsets) == 0 or start >= end:
+            return GDAXRateSeries.empty()
+
+        # rows before the first entry end before start, rows from the last entry on end at or after end
+        first = max(np.searchsorted(end_times, start, side='left') - 1, 0)
+        last = np.searchsorted(end_times, end, side='left')
+
+        metrics = get_metrics()
+        with metrics.timer('gdax_rate_log_read_seconds'), open(self.file_path, 'rb') as csv_file:
+            field_names = next(csv.reader([csv_file.readline().decode()]), [])
+            csv_file.seek(offsets[first])
+            size = (offsets[last] if last < len(offsets) else covered_bytes) - offsets[first]
+            lines = csv_file.read(size).decode().splitlines()
+            gdax_rates = _parse_csv_rates(lines, field_names)
+
+        metrics.increment('gdax_rate_log_read_rows_total', len(gdax_rates))
+        return gdax_rates[(gdax_rates.end_time >= start) & (gdax_rates.end_time < end)]
+
+    def build_index(self):
+        """
+        Brings the sparse index of the CSV log up to date.
+
+        The index is kept in a sidecar file next to the log, or in memory if the file can't be written
+        (e.g. a read-only location). It holds end time and byte offset of every INDEX_STRIDE-th row.
+        Rows appended since the index was last written are scanned and added; an index which doesn't match
+        the log any more is rebuilt from scratch. Once the index exists, append() keeps it up to date.
+
+        :return: end times, byte offsets and number of indexed bytes
+        """
+        assert os.path.isfile(self.file_path), "File '{}' doesn't exist.".format(self.file_path)
+
+        stride, covered_rows, covered_bytes, end_times, offsets = self._read_index()
+        file_size = os.path.getsize(self.file_path)
+        if covered_bytes == file_size:
+            return end_times, offsets, covered_bytes
+
+        with open(self.file_path, 'rb') as csv_file:
+            header = csv_file.readline()
+            end_time_column = next(csv.reader([header.decode()])).index('end_time')
+            if stride != self.INDEX_STRIDE or covered_bytes > file_size or covered_bytes < len(header):
+                logging.getLogger('GDAXRateLog').debug('rebuilding index | file_path=%s', self.file_path)
+                covered_rows, covered_bytes = 0, len(header)
+                end_times, offsets = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+            end_times, offsets = [end_times], [offsets]
+
+            csv_file.seek(covered_bytes)
+            remainder = b''
+            for chunk in chain(iter(lambda: csv_file.read(self.INDEX_CHUNK_SIZE), b''), [None]):
+                if chunk is None:
+                    # like read(), a last row without a line break is complete
+                    if not remainder.strip():
+                        break
+                    chunk, remainder, complete_size = remainder + b'\n', b'', len(remainder)
+                else:
+                    chunk = remainder + chunk
+                    complete_size = chunk.rfind(b'\n') + 1
+                    chunk, remainder = chunk[:complete_size], chunk[complete_size:]
+
+                line_ends = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord('\n')) + 1
+                line_starts = np.concatenate([[0], line_ends[:-1]]).astype(np.int64)
+                indexed = line_starts[(covered_rows + np.arange(len(line_starts))) % self.INDEX_STRIDE == 0]
+
+                end_times.append(_parse_timestamps([chunk[line_start:chunk.index(b'\n', line_start)]
+                                                   .split(b',')[end_time_column].strip()
+                                                    for line_start in indexed.tolist()]))
+                offsets.append(covered_bytes + indexed)
+                covered_rows += len(line_starts)
+                covered_bytes += complete_size
+
+        end_times, offsets = np.concatenate(end_times), np.concatenate(offsets)
+        self._write_index(covered_rows, covered_bytes, end_times, offsets)
+        return end_times, offsets, covered_bytes
+
+    def _has_index(self):
+        return self._index is not None or os.path.isfile(self.index_file_path)
+
+    def _read_index(self):
+        if not os.path.isfile(self.index_file_path):
+            if self._index is not None:
+                return self._index
+            return self.INDEX_STRIDE, 0, 0, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        index = np.fromfile(self.index_file_path, dtype=np.int64)
+        entries = index[3:].reshape(-1, 2)
+        return int(index[0]), int(index[1]), int(index[2]), entries[:, 0], entries[:, 1]
+
+    def _write_index(self, covered_rows, covered_bytes, end_times, offsets):
+        index = np.concatenate([[self.INDEX_STRIDE, covered_rows, covered_bytes],
+                                np.column_stack([end_times, offsets]).ravel()]).astype(np.int64)
+        temporary_file_path = self.index_file_path + '.tmp'
+        try:
+            index.tofile(temporary_file_path)
+            os.replace(temporary_file_path, self.index_file_path)
+        except OSError as error:
+            logging.getLogger('GDAXRateLog').debug('index kept in memory | file_path=%s, error=%s',
+                                                   self.index_file_path, error)
+            self._index = self.INDEX_STRIDE, covered_rows, covered_bytes, end_times, offsets
+
+    def _read_rows(self):
+        """
+        Read rates from the CSV log row by row.
+
+        This is the reference implementation for read(). It is much slower and kept for benchmarking.
+
+        :return: GDAXRateSeries
         """
         assert os.path.isfile(self.file_path), "File '{}' doesn't exist.".format(self.file_path)
 
@@ -245,23 +1048,169 @@ class GDAXRateLog(object):
             reader = csv.DictReader(csv_file)
             gdax_rates = []
             for row in reader:
-                    rate = GDAXRate(row['start_time'],
-                                    row['end_time'],
-                                    float(row['lowest_price']),
-                                    float(row['highest_price']),
-                                    float(row['opening_price']),
-                                    float(row['closing_price']),
-                                    float(row['volume_of_trading']))
+                rate = GDAXRate(row['start_time'],
+                                row['end_time'],
+                                float(row['lowest_price']),
+                                float(row['highest_price']),
+                                float(row['opening_price']),
+                                float(row['closing_price']),
+                                float(row['volume_of_trading']))
 
-                    gdax_rates.append(rate)
+                gdax_rates.append(rate)
 
-        self.gdax_rates = gdax_rates
-        return gdax_rates
+        return GDAXRateSeries.from_rates(gdax_rates)
 
     def timestamps(self):
         """
-        Gets a list of end times from this log.
+        Gets end times from this log.
 
-        :return: a list of timestamps
+        :return: an array of timestamps
         """
         return GDAXRate.to_timestamps(self.gdax_rates)
+
+
+class GDAXRateLogWriter(object):
+    """
+    Long-lived writer appending rates to a CSV log, e.g. for a streaming ingester.
+
+    The log file stays open between writes. Rates are buffered and serialized a batch at a time, once
+    buffer_size rates are buffered, once the oldest buffered rate has waited flush_interval seconds (checked
+    on write), and on flush() and close(). With fsync, every flush forces the rates to disk as well.
+
+    Rates not newer than the last rate in the log, written or buffered, are dropped, so candles repeated
+    by overlapping pages are written once. The latest tail_size rates written are kept as tail.
+    The log mustn't be merged into while a writer is open, as merging replaces the file.
+
+    Usage:
+        with GDAXRateLogWriter(GDAXRateLog('btc_usd_minutes.csv'), flush_interval=60) as writer:
+            writer.write(rates)
+    """
+
+    DEFAULT_BUFFER_SIZE = 10000
+    DEFAULT_TAIL_SIZE = 10000
+
+    def __init__(self, log, buffer_size=DEFAULT_BUFFER_SIZE, flush_interval=None, fsync=False,
+                 tail_size=DEFAULT_TAIL_SIZE, clock=time.monotonic):
+        """
+        :param log: GDAXRateLog
+        :param buffer_size: number of buffered rates which are flushed
+        :param flush_interval: seconds rates are buffered for at most, None to flush on buffer_size only
+        :param fsync: whether to fsync the file on every flush
+        :param tail_size: number of latest rates kept in memory
+        :param clock: monotonic time in seconds
+        """
+        self.log = log
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.tail_size = tail_size
+        self.tail = GDAXRateSeries.empty()
+        self.last_end_time = log.last_end_time()
+        self._buffer = []
+        self._num_of_buffered_rates = 0
+        self._buffered_since = None
+        self._file = None
+        self._csv_writer = None
+        self._clock = clock
+
+    def write(self, gdax_rates):
+        """
+        Buffers rates newer than the last one, flushing the buffer if it's due.
+
+        :param gdax_rates: a list of GDAXRate objects or GDAXRateSeries, in any order
+        :return: number of rates accepted
+        """
+        gdax_rates = GDAXRateSeries.merge([GDAXRateSeries.from_rates(gdax_rates)])
+        if self.last_end_time is not None:
+            gdax_rates = gdax_rates[gdax_rates.end_time > self.last_end_time]
+
+        if len(gdax_rates):
+            if not self._buffer:
+                self._buffered_since = self._clock()
+            self._buffer.append(gdax_rates)
+            self._num_of_buffered_rates += len(gdax_rates)
+            self.last_end_time = int(gdax_rates.end_time[-1])
+            self.tail = GDAXRateSeries.concatenate([self.tail, gdax_rates[-self.tail_size:]])[-self.tail_size:]
+
+        if self._num_of_buffered_rates >= self.buffer_size or (
+                self.flush_interval is not None and self._buffer and
+                self._clock() - self._buffered_since >= self.flush_interval):
+            self.flush()
+        return len(gdax_rates)
+
+    def flush(self):
+        """
+        Writes buffered rates to the log file.
+        """
+        if not self._buffer:
+            if self._file is None and not os.path.isfile(self.log.file_path):
+                # a log without rates is created with its header
+                self._open()
+                self._file.flush()
+            return
+
+        gdax_rates = GDAXRateSeries.concatenate(self._buffer)
+        metrics = get_metrics()
+        with metrics.timer('gdax_rate_log_write_seconds'):
+            if self._file is None:
+                self._open()
+            _write_csv_rows(self._csv_writer, gdax_rates)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        metrics.increment('gdax_rate_log_write_rows_total', len(gdax_rates))
+
+        self._buffer = []
+        self._num_of_buffered_rates = 0
+        self._buffered_since = None
+
+        if self.log._has_index():
+            self.log.build_index()
+
+    def _open(self):
+        self._file = open(self.log.file_path, 'a')
+        self._csv_writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._csv_writer.writerow(GDAXRate.get_field_names())
+
+    def close(self):
+        """
+        Flushes buffered rates and closes the log file.
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _read_csv_rates(csv_file, chunk_size):
+    """
+    Reads a CSV rate log, parsing rows in bulk chunk by chunk.
+
+    :param csv_file: text file positioned at the header
+    :param chunk_size: number of rows parsed at once
+    :return: GDAXRateSeries
+    """
+    field_names = next(csv.reader([csv_file.readline()]), [])
+    chunks = []
+    for lines in iter(lambda: list(islice(csv_file, chunk_size)), []):
+        chunks.append(_parse_csv_rates(lines, field_names))
+    return GDAXRateSeries.concatenate(chunks)
+
+
+def _write_csv_rows(csv_writer, gdax_rates):
+    """
+    Writes rates as rows of a CSV rate log, formatting whole columns at once.
+
+    :param csv_writer: csv.writer
+    :param gdax_rates: GDAXRateSeries
+    """
+    csv_writer.writerows(zip(_format_epoch_seconds(gdax_rates.start_time), _format_epoch_seconds(gdax_rates.end_time),
+                             *[getattr(gdax_rates, field_name).tolist()
+                               for field_name in GDAXRateSeries.VALUE_FIELD_NAMES]))
@@ -0,0 +1,239 @@
+import logging
+import os
+import numpy as np
+from bitcoin_forecast import GDAXRate, GDAXRateSeries, GDAXRateLog
+from bitcoin_forecast.gdax_api import _to_timestamp
+
+
+class GDAXBinaryRateLog(object):
+    """
+    Binary Log File for storing historical rates.
+
+    A fixed size header (product, granularity, schema version and record count) is followed by packed
+    fixed-width records in end time order. The file is read through np.memmap, so opening it costs next to
+    nothing and only the pages which are actually touched get loaded.
+
+    Appends are atomic: records are written past the committed ones first and become visible only once
+    the record count in the header is updated.
+    """
+
+    MAGIC = b'GDAXRLOG'
+    SCHEMA_VERSION = 1
+    HEADER_DTYPE = np.dtype([('magic', 'S8'), ('schema_version', '<u4'), ('granularity', '<u4'),
+                             ('record_count', '<u8'), ('product_id', 'S40')])
+    RECORD_DTYPE = np.dtype([(field_name, '<i8' if field_name in GDAXRateSeries.TIME_FIELD_NAMES else '<f8')
+                             for field_name in GDAXRate.get_field_names()])
+
+    def __init__(self, file_path, product_id=None, granularity=None):
+        """
+        Opens an existing log or prepares a new one.
+
+        :param file_path: path to the log file
+        :param product_id: product e.g. BTC-USD, required for a new log
+        :param granularity: timeslice in seconds, required for a new log
+        """
+        self.file_path = file_path
+
+        if os.path.isfile(file_path):
+            header = self._read_header()
+            stored_product_id = header['product_id'].decode('ascii')
+            stored_granularity = int(header['granularity'])
+
+            if product_id is not None and product_id != stored_product_id:
+                raise ValueError("Log '{}' holds '{}' rates, not '{}'".format(file_path, stored_product_id,
+                                                                               product_id))
+            if granularity is not None and granularity != stored_granularity:
+                raise ValueError("Log '{}' holds rates with granularity {}, not {}".format(file_path,
+                                                                                        stored_granularity,
+                                                                                        granularity))
+            product_id, granularity = stored_product_id, stored_granularity
+        else:
+            assert product_id is not None and granularity is not None, \
+                "product_id and granularity are required to create '{}'".format(file_path)
+
+        self.product_id = product_id
+        self.granularity = granularity
+
+    def __len__(self):
+        if not os.path.isfile(self.file_path):
+            return 0
+        return int(self._read_header()['record_count'])
+
+    def append(self, gdax_rates):
+        """
+        Append rates to the log. File is created if it doesn't exist.
+
+        Rates newer than the last one in the log are appended in place. Anything older is merged into
+        the log, which is then rewritten into a temporary file and atomically moved into place.
+        Rates with an end time already in the log are skipped.
+
+        :param gdax_rates: a list of GDAXRate objects or GDAXRateSeries
+        """
+        gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+        records = self._to_records(gdax_rates)
+        records = records[np.argsort(records['end_time'], kind='stable')]
+
+        existing_records = self._memmap()
+        is_in_order = len(existing_records) == 0 or len(records) == 0 \
+            or records['end_time'][0] > existing_records['end_time'][-1]
+
+        if is_in_order:
+            records = records[_first_occurrences(records['end_time'])]
+            if os.path.isfile(self.file_path):
+                self._append_records(records, len(existing_records))
+            else:
+                self._write_records(records)
+        else:
+            merged_records = np.concatenate([existing_records, records])
+            merged_records = merged_records[np.argsort(merged_records['end_time'], kind='stable')]
+            merged_records = merged_records[_first_occurrences(merged_records['end_time'])]
+            del existing_records
+            self._write_records(merged_records)
+
+        logging.getLogger('GDAXBinaryRateLog').debug('appended | file_path=%s, count=%s', self.file_path,
+                                                     len(records))
+
+    def merge(self, gdax_rates):
+        """
+        Merge rates into the log, same as append().
+
+        :param gdax_rates: a list of GDAXRate objects or GDAXRateSeries
+        """
+        self.append(gdax_rates)
+
+    def read(self):
+        """
+        Read rates from the log.
+
+        Columns of the returned series are views on the memory mapped file.
+
+        :return: GDAXRateSeries
+        """
+        assert os.path.isfile(self.file_path), "File '{}' doesn't exist.".format(self.file_path)
+
+        records = self._memmap()
+        if len(records) == 0:
+            return GDAXRateSeries.empty()
+        return GDAXRateSeries(*[records[field_name] for field_name in GDAXRate.get_field_names()])
+
+    def read_range(self, start, end):
+        """
+        Read rates with end time in [start, end) from the log.
+
+        The range is found with a binary search on the memory mapped end times.
+
+        :param start: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string
+        :param end: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string
+        :return: GDAXRateSeries
+        """
+        gdax_rates = self.read()
+        first, last = np.searchsorted(gdax_rates.end_time, [_to_timestamp(start), _to_timestamp(end)], side='left')
+        return gdax_rates[first:max(first, last)]
+
+    def timestamps(self):
+        """
+        Gets end times from this log.
+
+        :return: an array of timestamps
+        """
+        return self.read().timestamps
+
+    def to_csv(self, csv_file_path):
+        """
+        Writes all rates into a new CSV log.
+
+        :param csv_file_path: path to the CSV log, mustn't exist yet
+        :return: GDAXRateLog
+        """
+        assert not os.path.isfile(csv_file_path), "File '{}' already exists.".format(csv_file_path)
+
+        csv_log = GDAXRateLog(csv_file_path)
+        csv_log.append(self.read())
+        return csv_log
+
+    @staticmethod
+    def from_csv(csv_file_path, file_path, product_id, granularity=None):
+        """
+        Converts a CSV log into a new binary log.
+
+        :param csv_file_path: path to the CSV log
+        :param file_path: path to the binary log, mustn't exist yet
+        :param product_id: product e.g. BTC-USD
+        :param granularity: timeslice in seconds, taken from the first rate if not given
+        :return: GDAXBinaryRateLog
+        """
+        assert not os.path.isfile(file_path), "File '{}' already exists.".format(file_path)
+
+        gdax_rates = GDAXRateLog(csv_file_path).read()
+        if granularity is None:
+            assert len(gdax_rates) > 0, "Granularity of empty log '{}' is unknown".format(csv_file_path)
+            granularity = int(gdax_rates.end_time[0] - gdax_rates.start_time[0])
+
+        log = GDAXBinaryRateLog(file_path, product_id, granularity)
+        log.append(gdax_rates)
+        return log
+
+    def _to_records(self, gdax_rates):
+        records = np.empty(len(gdax_rates), dtype=self.RECORD_DTYPE)
+        for field_name, column in zip(GDAXRate.get_field_names(), gdax_rates.columns()):
+            records[field_name] = column
+        return records
+
+    def _header(self, record_count):
+        return np.array([(self.MAGIC, self.SCHEMA_VERSION, self.granularity, record_count,
+                          self.product_id.encode('ascii'))], dtype=self.HEADER_DTYPE)
+
+    def _read_header(self):
+        with open(self.file_path, 'rb') as log_file:
+            header = np.fromfile(log_file, dtype=self.HEADER_DTYPE, count=1)
+
+        if len(header) == 0 or header[0]['magic'] != self.MAGIC:
+            raise ValueError("File '{}' is not a binary rate log".format(self.file_path))
+        if header[0]['schema_version'] != self.SCHEMA_VERSION:
+            raise ValueError("Binary rate log '{}' has unsupported schema version {}".format(
+                self.file_path, header[0]['schema_version']))
+        return header[0]
+
+    def _memmap(self):
+        record_count = len(self)
+        if record_count == 0:
+            return np.empty(0, dtype=self.RECORD_DTYPE)
+        return np.memmap(self.file_path, dtype=self.RECORD_DTYPE, mode='r', offset=self.HEADER_DTYPE.itemsize,
+                         shape=(record_count,))
+
+    def _append_records(self, records, record_count):
+        with open(self.file_path, 'r+b') as log_file:
+            # anything past the committed records is left over from an interrupted append
+            log_file.seek(self.HEADER_DTYPE.itemsize + record_count * self.RECORD_DTYPE.itemsize)
+            log_file.write(records.tobytes())
+            log_file.truncate()
+            log_file.flush()
+            os.fsync(log_file.fileno())
+
+            # commit
+            log_file.seek(0)
+            log_file.write(self._header(record_count + len(records)).tobytes())
+            log_file.flush()
+            os.fsync(log_file.fileno())
+
+    def _write_records(self, records):
+        temporary_file_path = self.file_path + '.tmp'
+        with open(temporary_file_path, 'wb') as log_file:
+            log_file.write(self._header(len(records)).tobytes())
+            log_file.write(records.tobytes())
+            log_file.flush()
+            os.fsync(log_file.fileno())
+
+        os.replace(temporary_file_path, self.file_path)
+
+
+def _first_occurrences(sorted_values):
+    """
+    Mask of the first occurrence of every value in a sorted array.
+
+    :param sorted_values: sorted array
+    :return: boolean array
+    """
+    mask = np.ones(len(sorted_values), dtype=bool)
+    mask[1:] = sorted_values[1:] != sorted_values[:-1]
+    return mask
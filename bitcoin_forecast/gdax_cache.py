@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from bitcoin_forecast.gdax_api import _to_timestamp
+
+
+class GDAXPageCache(object):
+    """
+    On-disk cache of candle pages returned by GDAX API.
+
+    Pages are stored as JSON files named after a SHA-256 hash of the request (product, start, end,
+    granularity). Pages of windows which haven't closed yet are never cached, as they still change.
+    When the cache grows over its size limit, the least recently used pages are evicted.
+
+    Any object with the same get/put methods can be plugged into GDAXApi instead.
+    """
+
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, clock=time.time):
+        """
+        :param directory: cache directory, created if it doesn't exist
+        :param max_bytes: maximum total size of cached pages
+        :param clock: current time in epoch seconds
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._sizes = {}
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith('.json'):
+                self._sizes[entry.path] = entry.stat().st_size
+
+    @property
+    def size(self):
+        """
+        Total size of cached pages in bytes.
+        """
+        return sum(self._sizes.values())
+
+    def get(self, product_id, start, end, granularity):
+        """
+        Gets a cached page.
+
+        :param product_id: product e.g. BTC-USD
+        :param start: Start time of the page
+        :param end: End time of the page
+        :param granularity: timeslice in seconds
+        :return: list of rates in format [[time, low, high, open, close, volume],...] or None
+        """
+        file_path = self._get_file_path(product_id, start, end, granularity)
+        try:
+            with open(file_path) as page_file:
+                raw_rates = json.load(page_file)
+            # last access time for LRU eviction
+            os.utime(file_path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return raw_rates
+
+    def put(self, product_id, start, end, granularity, raw_rates):
+        """
+        Caches a page, unless its window is still open.
+
+        :param product_id: product e.g. BTC-USD
+        :param start: Start time of the page
+        :param end: End time of the page
+        :param granularity: timeslice in seconds
+        :param raw_rates: list of rates in format [[time, low, high, open, close, volume],...]
+        :return: True if the page was cached
+        """
+        # the candle starting at the end of the page needs to be closed too
+        if _parse_time(end) + granularity > self._clock():
+            return False
+
+        file_path = self._get_file_path(product_id, start, end, granularity)
+        temporary_file_path = '{}.{}.tmp'.format(file_path, threading.get_ident())
+        with open(temporary_file_path, 'w') as page_file:
+            json.dump(raw_rates, page_file)
+        os.replace(temporary_file_path, file_path)
+
+        with self._lock:
+            self._sizes[file_path] = os.path.getsize(file_path)
+            if sum(self._sizes.values()) > self.max_bytes:
+                self._evict()
+        return True
+
+    def clear(self):
+        """
+        Removes all cached pages and resets counters.
+        """
+        with self._lock:
+            for file_path in list(self._sizes):
+                self._remove(file_path)
+            self.hits = 0
+            self.misses = 0
+
+    def _evict(self):
+        def last_access(file_path):
+            try:
+                return os.path.getmtime(file_path)
+            except OSError:
+                return 0
+
+        total_size = sum(self._sizes.values())
+        for file_path in sorted(self._sizes, key=last_access):
+            if total_size <= self.max_bytes:
+                break
+            total_size -= self._sizes[file_path]
+            self._remove(file_path)
+            logging.getLogger('GDAXPageCache').debug('evicted | file_path=%s', file_path)
+
+    def _remove(self, file_path):
+        del self._sizes[file_path]
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+    def _get_file_path(self, product_id, start, end, granularity):
+        key = json.dumps([product_id, _parse_time(start), _parse_time(end), int(granularity)])
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+
+def _parse_time(time_value):
+    """
+    Parses page bounds given as '%Y-%m-%d %H:%M:%S' or ISO 8601 '%Y-%m-%dT%H:%M:%S.%fZ' strings.
+
+    :param time_value: UTC time string
+    :return: epoch seconds
+    """
+    return _to_timestamp(time_value.replace('T', ' ')[:len('YYYY-MM-DD HH:MM:SS')])
@@ -0,0 +1,84 @@
+import numpy as np
+from bitcoin_forecast import GDAXRateSeries
+
+
+def resample(gdax_rates, granularity):
+    """
+    Builds coarser candles from fine-grained rates in one vectorized pass.
+
+    Candles are aligned to multiples of granularity since the epoch (e.g. daily candles start at midnight UTC).
+    Open is the first opening price, close the last closing price, low the minimum, high the maximum and
+    volume the sum of volumes of base candles in each bucket. Buckets without any base candle are skipped,
+    a bucket with only some of its base candles is still returned.
+
+    :param gdax_rates: GDAXRateSeries ordered by start time
+    :param granularity: timeslice in seconds, a multiple of the base granularity
+    :return: GDAXRateSeries
+    """
+    gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+    if len(gdax_rates) == 0:
+        return GDAXRateSeries.empty()
+
+    base_granularity = int(gdax_rates.end_time[0] - gdax_rates.start_time[0])
+    if granularity % base_granularity != 0:
+        raise ValueError('Granularity {} is not a multiple of base granularity {}'.format(granularity,
+                                                                                         base_granularity))
+
+    bucket_start_time = gdax_rates.start_time // granularity * granularity
+    firsts = np.concatenate([[0], np.flatnonzero(np.diff(bucket_start_time)) + 1])
+    lasts = np.concatenate([firsts[1:], [len(gdax_rates)]]) - 1
+
+    start_time = bucket_start_time[firsts]
+    return GDAXRateSeries(start_time, start_time + granularity,
+                          np.minimum.reduceat(gdax_rates.lowest_price, firsts),
+                          np.maximum.reduceat(gdax_rates.highest_price, firsts),
+                          gdax_rates.opening_price[firsts],
+                          gdax_rates.closing_price[lasts],
+                          np.add.reduceat(gdax_rates.volume_of_trading, firsts))
+
+
+class GDAXRateResampler(object):
+    """
+    Incrementally maintained coarser candles of a growing fine-grained rate log.
+
+    Only base candles of the last bucket are kept, so updates recompute just the buckets touched by
+    newly appended base candles.
+    """
+
+    def __init__(self, granularity, gdax_rates=None):
+        """
+        :param granularity: timeslice in seconds of the resampled candles
+        :param gdax_rates: base rates to start with
+        """
+        self.granularity = granularity
+        self.gdax_rates = GDAXRateSeries.empty()
+        self._tail = GDAXRateSeries.empty()
+
+        if gdax_rates is not None:
+            self.update(gdax_rates)
+
+    def update(self, gdax_rates):
+        """
+        Adds new base candles.
+
+        :param gdax_rates: GDAXRateSeries ordered by start time, not older than the last bucket
+        :return: GDAXRateSeries of resampled candles which were added or changed
+        """
+        gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+        if len(gdax_rates) == 0:
+            return GDAXRateSeries.empty()
+
+        if len(self._tail) > 0:
+            tail_start_time = self.gdax_rates.start_time[-1]
+            if gdax_rates.start_time[0] < tail_start_time:
+                raise ValueError('Base candles older than the last bucket can only be resampled from scratch')
+
+            gdax_rates = GDAXRateSeries.merge([self._tail, gdax_rates])
+            self.gdax_rates = self.gdax_rates[:-1]
+
+        changed_rates = resample(gdax_rates, self.granularity)
+        self.gdax_rates = GDAXRateSeries.concatenate([self.gdax_rates, changed_rates])
+
+        last_bucket_start_time = changed_rates.start_time[-1]
+        self._tail = gdax_rates[np.searchsorted(gdax_rates.start_time, last_bucket_start_time):]
+        return changed_rates
@@ -0,0 +1,270 @@
+import csv
+import gzip
+import json
+import logging
+import lzma
+import os
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from bitcoin_forecast.gdax_api import GDAXRate, GDAXRateLog, GDAXRateSeries, _read_csv_rates, _write_csv_rows, \
+    _to_timestamp
+from bitcoin_forecast.metrics import get_metrics
+
+
+class GDAXRateStore(object):
+    """
+    Rates of many products in a directory tree, partitioned by product, granularity and month.
+
+    Layout:
+        <directory>/manifest.json
+        <directory>/<product id>/<granularity>/<YYYY-MM>.csv[.gz|.xz]  compacted partition, ordered by end time
+        <directory>/<product id>/<granularity>/<YYYY-MM>.<n>.csv        append fragments
+
+    Rates belong to the month they start in. append() writes a small fragment for every month it touches,
+    so appending never rewrites a partition. The manifest holds the number of rows and the first and last
+    end time of every file, so that read() and scan() prune files by product and time range without opening
+    them, then read the remaining files in parallel on a pool of max_workers threads.
+
+    compact() merges the fragments of a month into a single partition ordered by end time, without duplicates,
+    and compresses partitions of months which ended more than cold_after seconds ago.
+
+    Files are written to temporary files which are renamed, and so is the manifest. A store is meant to be
+    written by a single process at a time.
+
+    Usage:
+        store = GDAXRateStore('rates')
+        store.append('BTC-USD', 60, rates)
+        store.compact()
+        may_rates = store.read('BTC-USD', 60, '2017-05-01 00:00:00', '2017-06-01 00:00:00')
+    """
+
+    MANIFEST_FILE_NAME = 'manifest.json'
+    FORMAT_VERSION = 1
+    COMPRESSION_EXTENSIONS = {None: '', 'gzip': '.gz', 'lzma': '.xz'}
+    DEFAULT_COLD_AFTER = 7 * 24 * 60 * 60
+
+    def __init__(self, directory, max_workers=4, compression='gzip', cold_after=DEFAULT_COLD_AFTER,
+                 clock=time.time):
+        """
+        :param directory: root of the store, created if it doesn't exist
+        :param max_workers: number of threads reading or compacting files
+        :param compression: 'gzip', 'lzma' or None, used for cold partitions
+        :param cold_after: seconds after the end of a month its partition is compressed by compact()
+        :param clock: current time in epoch seconds
+        """
+        assert compression in GDAXRateStore.COMPRESSION_EXTENSIONS, \
+            "Compression '{}' is not supported".format(compression)
+        self.directory = directory
+        self.max_workers = max_workers
+        self.compression = compression
+        self.cold_after = cold_after
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._manifest = self._read_manifest()
+
+    def get_product_ids(self):
+        """
+        :return: sorted list of products in the store
+        """
+        return sorted({entry['product_id'] for entry in self._manifest['files'].values()})
+
+    def get_files(self, product_id=None, granularity=None, start=None, end=None):
+        """
+        Finds files which may hold rates with end time in [start, end), from the manifest only.
+
+        :param product_id: product e.g. BTC-USD, None for all
+        :param granularity: timeslice in seconds, None for all
+        :param start: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string, None for no lower bound
+        :param end: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string, None for no upper bound
+        :return: a list of manifest entries with the file path relative to the store, in read order
+        """
+        start = None if start is None else _to_timestamp(start)
+        end = None if end is None else _to_timestamp(end)
+
+        entries = [dict(entry, file=file) for file, entry in self._manifest['files'].items()
+                   if (product_id is None or entry['product_id'] == product_id) and
+                   (granularity is None or entry['granularity'] == granularity) and
+                   (start is None or entry['last_end_time'] >= start) and
+                   (end is None or entry['first_end_time'] < end)]
+        # compacted partitions first, then fragments in the order they were appended
+        return sorted(entries, key=lambda entry: (entry['product_id'], entry['granularity'], entry['month'],
+                                                  -1 if entry['fragment'] is None else entry['fragment']))
+
+    def append(self, product_id, granularity, gdax_rates):
+        """
+        Adds rates as a new fragment of every month they start in.
+
+        :param product_id: product e.g. BTC-USD
+        :param granularity: timeslice in seconds
+        :param gdax_rates: a list of GDAXRate objects or GDAXRateSeries
+        :return: number of fragments written
+        """
+        gdax_rates = GDAXRateSeries.merge([GDAXRateSeries.from_rates(gdax_rates)])
+        if len(gdax_rates) == 0:
+            return 0
+
+        months = gdax_rates.start_time.astype('datetime64[s]').astype('datetime64[M]')
+        boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+        new_entries = {}
+        for first, last in zip(np.concatenate([[0], boundaries]), np.concatenate([boundaries, [len(months)]])):
+            month = str(months[first])
+            with self._lock:
+                fragment = self._manifest['next_fragment']
+                self._manifest['next_fragment'] += 1
+            file = self._get_file(product_id, granularity, '{}.{}.csv'.format(month, fragment))
+            new_entries[file] = self._write_file(file, gdax_rates[first:last], product_id, granularity, month,
+                                                 fragment)
+
+        self._update_manifest(new_entries)
+        logging.getLogger('GDAXRateStore').debug('append | product_id=%s, granularity=%s, fragments=%s',
+                                                 product_id, granularity, len(new_entries))
+        return len(new_entries)
+
+    def read(self, product_id, granularity, start=None, end=None):
+        """
+        Reads rates of a product with end time in [start, end).
+
+        :param product_id: product e.g. BTC-USD
+        :param granularity: timeslice in seconds
+        :param start: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string, None for no lower bound
+        :param end: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string, None for no upper bound
+        :return: GDAXRateSeries ordered by end time, without duplicates
+        """
+        return self.scan([product_id], granularity, start, end)[product_id]
+
+    def scan(self, product_ids, granularity, start=None, end=None):
+        """
+        Reads rates of several products with end time in [start, end), reading all their files in parallel.
+
+        :param product_ids: a list of products, None for all
+        :param granularity: timeslice in seconds
+        :param start: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string, None for no lower bound
+        :param end: epoch seconds, naive UTC datetime or '%Y-%m-%d %H:%M:%S' string, None for no upper bound
+        :return: dict of product id -> GDAXRateSeries ordered by end time, without duplicates
+        """
+        product_ids = self.get_product_ids() if product_ids is None else list(product_ids)
+        entries = [entry for entry in self.get_files(granularity=granularity, start=start, end=end)
+                   if entry['product_id'] in product_ids]
+
+        metrics = get_metrics()
+        with metrics.timer('gdax_rate_store_scan_seconds'):
+            series_list = self._map(lambda entry: self._read_file(entry['file']), entries)
+
+            start = np.iinfo(np.int64).min if start is None else _to_timestamp(start)
+            end = np.iinfo(np.int64).max if end is None else _to_timestamp(end)
+            results = {}
+            for product_id in product_ids:
+                gdax_rates = GDAXRateSeries.merge([series for entry, series in zip(entries, series_list)
+                                                   if entry['product_id'] == product_id])
+                results[product_id] = gdax_rates[(gdax_rates.end_time >= start) & (gdax_rates.end_time < end)]
+        metrics.increment('gdax_rate_store_files_read_total', len(entries))
+        metrics.increment('gdax_rate_store_files_pruned_total',
+                          sum(1 for entry in self._manifest['files'].values()
+                              if entry['product_id'] in product_ids and entry['granularity'] == granularity) -
+                          len(entries))
+        return results
+
+    def compact(self):
+        """
+        Merges fragments of every month into its partition, and compresses cold partitions.
+
+        :return: number of partitions written
+        """
+        partitions = {}
+        for entry in self.get_files():
+            partitions.setdefault((entry['product_id'], entry['granularity'], entry['month']), []).append(entry)
+
+        tasks = []
+        for (product_id, granularity, month), entries in partitions.items():
+            month_end = int((np.datetime64(month, 'M') + 1).astype('datetime64[s]').astype(np.int64))
+            compression = self.compression if month_end + self.cold_after <= self._clock() else None
+            file = self._get_file(product_id, granularity,
+                                  month + '.csv' + GDAXRateStore.COMPRESSION_EXTENSIONS[compression])
+            if len(entries) > 1 or entries[0]['fragment'] is not None or entries[0]['file'] != file:
+                tasks.append((entries, file))
+
+        new_entries = self._map(lambda task: self._compact_partition(*task), tasks)
+        for (entries, file), new_entry in zip(tasks, new_entries):
+            self._update_manifest({file: new_entry}, [entry['file'] for entry in entries if entry['file'] != file])
+            for entry in entries:
+                if entry['file'] != file:
+                    os.remove(os.path.join(self.directory, entry['file']))
+
+        logging.getLogger('GDAXRateStore').debug('compact | partitions=%s', len(tasks))
+        return len(tasks)
+
+    def _compact_partition(self, entries, file):
+        gdax_rates = GDAXRateSeries.merge([self._read_file(entry['file']) for entry in entries])
+        return self._write_file(file, gdax_rates, entries[0]['product_id'], entries[0]['granularity'],
+                                entries[0]['month'], None)
+
+    def _map(self, function, items):
+        if self.max_workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                return list(executor.map(function, items))
+        return [function(item) for item in items]
+
+    def _get_file(self, product_id, granularity, file_name):
+        return '/'.join([product_id, str(granularity), file_name])
+
+    def _read_file(self, file):
+        with _open(os.path.join(self.directory, file), 'rt') as csv_file:
+            return _read_csv_rates(csv_file, GDAXRateLog.DEFAULT_READ_CHUNK_SIZE)
+
+    def _write_file(self, file, gdax_rates, product_id, granularity, month, fragment):
+        file_path = os.path.join(self.directory, file)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temporary_file_path = file_path + '.tmp'
+        with _open(temporary_file_path, 'wt', file_path) as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(GDAXRate.get_field_names())
+            _write_csv_rows(csv_writer, gdax_rates)
+        os.replace(temporary_file_path, file_path)
+
+        return {'product_id': product_id, 'granularity': granularity, 'month': month, 'fragment': fragment,
+                'rows': len(gdax_rates), 'first_end_time': int(gdax_rates.end_time[0]),
+                'last_end_time': int(gdax_rates.end_time[-1])}
+
+    def _read_manifest(self):
+        manifest_file_path = os.path.join(self.directory, GDAXRateStore.MANIFEST_FILE_NAME)
+        if not os.path.isfile(manifest_file_path):
+            return {'format_version': GDAXRateStore.FORMAT_VERSION, 'next_fragment': 0, 'files': {}}
+
+        with open(manifest_file_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest['format_version'] != GDAXRateStore.FORMAT_VERSION:
+            raise ValueError("Store '{}' has format version {}, expected {}".format(
+                self.directory, manifest['format_version'], GDAXRateStore.FORMAT_VERSION))
+        return manifest
+
+    def _update_manifest(self, new_entries, removed_files=()):
+        with self._lock:
+            for file in removed_files:
+                del self._manifest['files'][file]
+            self._manifest['files'].update(new_entries)
+
+            manifest_file_path = os.path.join(self.directory, GDAXRateStore.MANIFEST_FILE_NAME)
+            with open(manifest_file_path + '.tmp', 'w') as manifest_file:
+                json.dump(self._manifest, manifest_file, indent=1, sort_keys=True)
+            os.replace(manifest_file_path + '.tmp', manifest_file_path)
+
+
+def _open(file_path, mode, name=None):
+    """
+    Opens a file, compressed according to the extension of its name.
+
+    :param file_path: file to open
+    :param mode: 'rt' or 'wt'
+    :param name: name of the file deciding compression, file_path if None
+    :return: text file object
+    """
+    name = name or file_path
+    if name.endswith('.gz'):
+        return gzip.open(file_path, mode)
+    if name.endswith('.xz'):
+        return lzma.open(file_path, mode)
+    return open(file_path, mode)
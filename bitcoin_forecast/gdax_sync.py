@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import time
+import numpy as np
+from datetime import datetime
+
+
+class GDAXRateLogSync(object):
+    """
+    Keeps a rate log in sync with GDAX, fetching only the candles it doesn't hold yet.
+
+    Missing candles are found from end times already in the log, so gaps left by outages in the middle
+    of the log are filled as well as new candles at its end. Fetched rates are merged into the log in
+    chunks of a few pages; an interrupted sync simply picks up the remaining gaps when run again.
+
+    GDAX doesn't return candles for periods without trades. Such periods are remembered in a small
+    state file next to the log (<log>.sync) so that they aren't requested over and over again.
+    GDAX also publishes candles with a delay, so candles which closed less than settle_time seconds ago
+    are never remembered as empty; they're requested again by the next sync.
+    """
+
+    DEFAULT_PAGES_PER_CHUNK = 10
+    DEFAULT_SETTLE_TIME = 60 * 60
+
+    def __init__(self, api, log, pages_per_chunk=DEFAULT_PAGES_PER_CHUNK, settle_time=DEFAULT_SETTLE_TIME,
+                 clock=time.time):
+        """
+        :param api: GDAXApi
+        :param log: GDAXRateLog or GDAXBinaryRateLog
+        :param pages_per_chunk: number of API pages fetched before they're merged into the log
+        :param settle_time: seconds after its close a missing candle is considered empty
+        :param clock: current time in epoch seconds
+        """
+        self.api = api
+        self.log = log
+        self.pages_per_chunk = pages_per_chunk
+        self.settle_time = settle_time
+        self.state_file_path = log.file_path + '.sync'
+        self._clock = clock
+
+    def sync(self, product_id, start, end, granularity=60*60):
+        """
+        Fetches candles missing in the log and merges them into it.
+
+        Only candles which have already closed are fetched.
+
+        :param product_id: product e.g. BTC-USD
+        :param start: start of the target range, epoch seconds
+        :param end: end of the target range (exclusive), epoch seconds
+        :param granularity: timeslice in seconds
+        :return: number of rates added to the log
+        """
+        empty_ranges = self._read_state(product_id, granularity)
+        gaps = self.find_gaps(start, end, granularity, empty_ranges)
+        logging.getLogger('GDAXRateLogSync').debug('sync | product_id=%s, gaps=%s', product_id, gaps)
+
+        chunk_size = self.pages_per_chunk * self.api.MAX_NUM_DATA_POINTS_PER_PAGE * granularity
+        # missing candles starting after this may still be published
+        settled_start_time = int(self._clock()) - self.settle_time - granularity
+        num_of_rates = 0
+        for gap_start, gap_end in gaps:
+            for chunk_start in range(gap_start, gap_end, chunk_size):
+                chunk_end = min(chunk_start + chunk_size, gap_end)
+                gdax_rates = self._fetch(product_id, chunk_start, chunk_end, granularity)
+                self.log.merge(gdax_rates)
+                num_of_rates += len(gdax_rates)
+
+                missing_start_times = np.setdiff1d(np.arange(chunk_start, chunk_end, granularity),
+                                                   gdax_rates.start_time)
+                missing_start_times = missing_start_times[missing_start_times < settled_start_time]
+                if len(missing_start_times):
+                    empty_ranges += _to_ranges(missing_start_times, granularity)
+                    self._write_state(product_id, granularity, empty_ranges)
+
+        return num_of_rates
+
+    def find_gaps(self, start, end, granularity, empty_ranges=()):
+        """
+        Finds candles in the target range which are neither in the log nor known to be empty.
+
+        :param start: start of the target range, epoch seconds
+        :param end: end of the target range (exclusive), epoch seconds
+        :param granularity: timeslice in seconds
+        :param empty_ranges: [start, end) ranges of start times known to have no candles
+        :return: a list of [start, end) ranges of candle start times
+        """
+        first_start_time = -(-int(start) // granularity) * granularity
+        # only candles which have closed
+        stop_time = min(int(end), int(self._clock()) - granularity + 1)
+        start_times = np.arange(first_start_time, stop_time, granularity, dtype=np.int64)
+        if len(start_times) == 0:
+            return []
+
+        if os.path.isfile(self.log.file_path):
+            existing_rates = self.log.read_range(first_start_time + granularity, stop_time + granularity)
+            start_times = np.setdiff1d(start_times, existing_rates.start_time, assume_unique=True)
+
+        for empty_start, empty_end in empty_ranges:
+            start_times = start_times[(start_times < empty_start) | (start_times >= empty_end)]
+
+        return _to_ranges(start_times, granularity)
+
+    def _fetch(self, product_id, start, end, granularity):
+        gdax_rates = self.api.get_historic_rates(product_id, _format_iso(start), _format_iso(end), granularity)
+
+        # the candle starting at the end of the request is included in the response
+        return gdax_rates[(gdax_rates.start_time >= start) & (gdax_rates.start_time < end)]
+
+    def _read_state(self, product_id, granularity):
+        if not os.path.isfile(self.state_file_path):
+            return []
+
+        with open(self.state_file_path) as state_file:
+            state = json.load(state_file)
+
+        if state['product_id'] != product_id or state['granularity'] != granularity:
+            raise ValueError("Log '{}' is synced with {} candles of {}s, not {} candles of {}s".format(
+                self.log.file_path, state['product_id'], state['granularity'], product_id, granularity))
+        return [tuple(empty_range) for empty_range in state['empty_ranges']]
+
+    def _write_state(self, product_id, granularity, empty_ranges):
+        state = {'product_id': product_id, 'granularity': granularity,
+                 'empty_ranges': [list(empty_range) for empty_range in sorted(empty_ranges)]}
+
+        temporary_file_path = self.state_file_path + '.tmp'
+        with open(temporary_file_path, 'w') as state_file:
+            json.dump(state, state_file)
+        os.replace(temporary_file_path, self.state_file_path)
+
+
+def _to_ranges(start_times, granularity):
+    """
+    Groups sorted candle start times into contiguous ranges.
+
+    :param start_times: sorted int64 array
+    :param granularity: timeslice in seconds
+    :return: a list of [start, end) ranges
+    """
+    if len(start_times) == 0:
+        return []
+
+    breaks = np.flatnonzero(np.diff(start_times) != granularity) + 1
+    firsts = np.concatenate([[0], breaks])
+    lasts = np.concatenate([breaks, [len(start_times)]]) - 1
+    return [(int(start_times[first]), int(start_times[last]) + granularity) for first, last in zip(firsts, lasts)]
+
+
+def _format_iso(timestamp):
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%dT%H:%M:%S.000Z')
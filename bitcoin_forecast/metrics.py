@@ -0,0 +1,267 @@
+"""
+    Metrics of the hot paths: timers, counters and histograms.
+
+    GDAXApi, GDAXRateLog and BTCForecast report to the metrics set with set_metrics().
+    The default Metrics does nothing, so instrumentation costs a method call when it isn't used.
+
+    Reported metrics:
+    - gdax_api_requests_total, gdax_api_request_seconds (tags: status), gdax_api_response_bytes_total,
+      gdax_api_retries_total
+    - gdax_api_fetch_seconds, gdax_api_fetch_pages, gdax_api_fetch_rows, gdax_api_cache_hits_total
+    - gdax_rate_log_read_seconds, gdax_rate_log_read_rows_total,
+      gdax_rate_log_write_seconds, gdax_rate_log_write_rows_total
+    - gdax_rate_store_scan_seconds, gdax_rate_store_files_read_total, gdax_rate_store_files_pruned_total
+    - btc_forecast_learn_seconds, btc_forecast_learn_samples_total,
+      btc_forecast_predict_seconds, btc_forecast_predict_samples_total (tags: model_type),
+      btc_forecast_partial_learn_seconds, btc_forecast_partial_learn_samples_total
+    - btc_trainer_jobs_total (tags: status)
+    - btc_forecast_daemon_cycle_seconds, btc_forecast_daemon_candles_total, btc_forecast_daemon_errors_total
+
+    Throughput follows from counters and timers, e.g. rows/s of log reads is
+    gdax_rate_log_read_rows_total / gdax_rate_log_read_seconds_sum.
+"""
+
+import bisect
+import logging
+import math
+import socket
+import threading
+import time
+
+
+class Metrics(object):
+    """
+    Metrics which aren't recorded anywhere, and the interface of metrics exporters.
+    """
+
+    def increment(self, name, value=1, tags=None):
+        """
+        Adds to a counter.
+
+        :param name: metric name
+        :param value: amount to add
+        :param tags: dict of tag name -> value
+        """
+        pass
+
+    def observe(self, name, value, tags=None):
+        """
+        Records a value in a histogram, e.g. a duration in seconds or a size.
+
+        :param name: metric name
+        :param value: observed value
+        :param tags: dict of tag name -> value
+        """
+        pass
+
+    def timer(self, name, tags=None):
+        """
+        Context manager observing its duration in seconds.
+
+        :param name: metric name, ending with _seconds
+        :param tags: dict of tag name -> value
+        :return: context manager
+        """
+        return _NULL_TIMER
+
+
+class Timer(object):
+    """
+    Observes the seconds spent in a with block.
+    """
+
+    def __init__(self, metrics, name, tags=None):
+        self.metrics = metrics
+        self.name = name
+        self.tags = tags
+        self.elapsed = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed = time.perf_counter() - self._start
+        self.metrics.observe(self.name, self.elapsed, self.tags)
+
+
+class _NullTimer(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class PrometheusMetrics(Metrics):
+    """
+    Metrics kept in memory and rendered in the Prometheus text exposition format.
+
+    Histograms of metrics named *_seconds use TIME_BUCKETS, other histograms SIZE_BUCKETS.
+    render() can be served from any HTTP endpoint scraped by Prometheus.
+    """
+
+    TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+    def __init__(self, prefix=''):
+        """
+        :param prefix: prepended to metric names e.g. 'forecaster_'
+        """
+        self.prefix = prefix
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, tags=None):
+        key = (name, _to_tag_tuple(tags))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, tags=None):
+        key = (name, _to_tag_tuple(tags))
+        buckets = self.TIME_BUCKETS if name.endswith('_seconds') else self.SIZE_BUCKETS
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # counts per bucket (the last one is +Inf), sum
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            histogram[0][bisect.bisect_left(buckets, value)] += 1
+            histogram[1] += value
+
+    def timer(self, name, tags=None):
+        return Timer(self, name, tags)
+
+    def get_counter(self, name, tags=None):
+        """
+        :return: current value of a counter, 0 if it was never incremented
+        """
+        with self._lock:
+            return self._counters.get((name, _to_tag_tuple(tags)), 0)
+
+    def get_histogram(self, name, tags=None):
+        """
+        :return: count and sum of observed values, (0, 0.0) if nothing was observed
+        """
+        with self._lock:
+            histogram = self._histograms.get((name, _to_tag_tuple(tags)))
+            return (sum(histogram[0]), histogram[1]) if histogram else (0, 0.0)
+
+    def render(self):
+        """
+        :return: all metrics in the Prometheus text format
+        """
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append('# TYPE {}{} counter'.format(self.prefix, name))
+                for (counter_name, tags), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append('{}{}{} {}'.format(self.prefix, name, _format_labels(tags), _format_value(value)))
+
+            for name in sorted({name for name, _ in self._histograms}):
+                buckets = self.TIME_BUCKETS if name.endswith('_seconds') else self.SIZE_BUCKETS
+                lines.append('# TYPE {}{} histogram'.format(self.prefix, name))
+                for (histogram_name, tags), (counts, total) in sorted(self._histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    cumulative_count = 0
+                    for bucket, count in zip(list(buckets) + [math.inf], counts):
+                        cumulative_count += count
+                        lines.append('{}{}_bucket{} {}'.format(self.prefix, name,
+                                                               _format_labels(tags + (('le', _format_value(bucket)),)),
+                                                               cumulative_count))
+                    lines.append('{}{}_sum{} {}'.format(self.prefix, name, _format_labels(tags), _format_value(total)))
+                    lines.append('{}{}_count{} {}'.format(self.prefix, name, _format_labels(tags), cumulative_count))
+
+        return '\n'.join(lines) + '\n'
+
+
+class StatsDMetrics(Metrics):
+    """
+    Metrics sent as StatsD datagrams over UDP, with DogStatsD style tags.
+
+    Counters are sent as 'name:value|c', durations of *_seconds metrics as 'name:milliseconds|ms'
+    and other observations as 'name:value|h'. Sending never blocks nor raises.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='bitcoin_forecast.'):
+        """
+        :param host: StatsD host
+        :param port: StatsD UDP port
+        :param prefix: prepended to metric names
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def increment(self, name, value=1, tags=None):
+        self._send('{}{}:{}|c{}'.format(self.prefix, name, _format_value(value), _format_statsd_tags(tags)))
+
+    def observe(self, name, value, tags=None):
+        if name.endswith('_seconds'):
+            line = '{}{}:{}|ms'.format(self.prefix, name[:-len('_seconds')], _format_value(round(value * 1000, 3)))
+        else:
+            line = '{}{}:{}|h'.format(self.prefix, name, _format_value(value))
+        self._send(line + _format_statsd_tags(tags))
+
+    def timer(self, name, tags=None):
+        return Timer(self, name, tags)
+
+    def close(self):
+        self._socket.close()
+
+    def _send(self, line):
+        try:
+            self._socket.sendto(line.encode(), self.address)
+        except OSError as error:
+            logging.getLogger('StatsDMetrics').debug('sending failed | error=%s', error)
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """
+    :return: metrics the hot paths report to
+    """
+    return _metrics
+
+
+def set_metrics(metrics):
+    """
+    Sets metrics the hot paths report to.
+
+    :param metrics: Metrics, PrometheusMetrics, StatsDMetrics or None to stop reporting
+    :return: previous metrics
+    """
+    global _metrics
+    previous_metrics = _metrics
+    _metrics = metrics if metrics is not None else Metrics()
+    return previous_metrics
+
+
+def _to_tag_tuple(tags):
+    return tuple(sorted((str(name), str(value)) for name, value in tags.items())) if tags else ()
+
+
+def _format_labels(tags):
+    if not tags:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"'))
+                          for name, value in tags) + '}'
+
+
+def _format_statsd_tags(tags):
+    return '|#' + ','.join('{}:{}'.format(name, value) for name, value in _to_tag_tuple(tags)) if tags else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
@@ -0,0 +1,204 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from bitcoin_forecast import GDAXRate, GDAXRateSeries
+
+# arrays and rates by product shared with a worker process, attached once by its pool initializer
+_worker_shared_arrays = None
+_worker_rates = None
+
+
+class SharedArrays(object):
+    """
+    NumPy arrays copied once into a single block of shared memory.
+
+    Worker processes attach to the block by its descriptor and get zero-copy views of the arrays,
+    so large inputs don't need to be pickled for every task sent to a process pool.
+
+    The creating process owns the block and unlinks it on close(). Views handed out by the block
+    mustn't be used after it's closed.
+
+    Usage:
+        with SharedArrays({'x': x, 'y': y}) as shared_arrays:
+            pool = ProcessPoolExecutor(initializer=attach, initargs=(shared_arrays.descriptor,))
+        ...
+        # in a worker process
+        arrays = SharedArrays.attach(descriptor).arrays
+    """
+
+    ALIGNMENT = 64
+
+    def __init__(self, arrays=None, descriptor=None):
+        """
+        :param arrays: dict of name -> array to copy into a new block
+        :param descriptor: descriptor of an existing block to attach to, see SharedArrays.attach
+        """
+        assert (arrays is None) != (descriptor is None), 'Either arrays or a descriptor is required'
+
+        if arrays is not None:
+            arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+            layout = []
+            size = 0
+            for name, array in arrays.items():
+                offset = -(-size // SharedArrays.ALIGNMENT) * SharedArrays.ALIGNMENT
+                layout.append((name, array.dtype.str, array.shape, offset))
+                size = offset + array.nbytes
+
+            self._shared_memory = SharedMemory(create=True, size=max(size, 1))
+            self._is_owner = True
+            self.descriptor = (self._shared_memory.name, layout)
+            self.arrays = _get_views(self._shared_memory, layout)
+            for name, array in arrays.items():
+                self.arrays[name][...] = array
+        else:
+            name, layout = descriptor
+            self._shared_memory = SharedMemory(name=name)
+            self._is_owner = False
+            self.descriptor = descriptor
+            self.arrays = _get_views(self._shared_memory, layout)
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        Attaches to a block created by another process.
+
+        :param descriptor: descriptor of the block
+        :return: SharedArrays
+        """
+        return SharedArrays(descriptor=descriptor)
+
+    def close(self):
+        """
+        Releases the views and the block, which is removed if it's owned by this process.
+        """
+        if self._shared_memory is None:
+            return
+
+        self.arrays = None
+        self._shared_memory.close()
+        if self._is_owner:
+            self._shared_memory.unlink()
+        self._shared_memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SharedRatesExecutor(object):
+    """
+    Runs functions of the same rates on a process pool, with the rates in shared memory.
+
+    The rates are copied once into SharedArrays, which every worker attaches to when it starts,
+    so tasks only carry their own arguments. With one worker, tasks run in the calling process.
+
+    Usage:
+        with SharedRatesExecutor(gdax_rates, max_workers=4) as executor:
+            results = executor.map(evaluate, [(0, 100), (100, 200)])  # evaluate(gdax_rates, start, end)
+    """
+
+    def __init__(self, gdax_rates, max_workers=None):
+        """
+        :param gdax_rates: list of GDAXRate's or GDAXRateSeries
+        :param max_workers: number of worker processes, None for the number of CPUs
+        """
+        self.gdax_rates = GDAXRateSeries.from_rates(gdax_rates)
+        self.max_workers = max_workers or os.cpu_count()
+        self._shared_arrays = None
+        self._executor = None
+
+        if self.max_workers != 1:
+            # the rates are shared as those of a single product without an id
+            self._shared_arrays = SharedArrays(get_rate_arrays({None: self.gdax_rates}))
+            self._executor = ProcessPoolExecutor(self.max_workers, initializer=attach_worker_rates,
+                                                 initargs=(self._shared_arrays.descriptor, [None]))
+
+    def map(self, function, tasks):
+        """
+        Calls function(gdax_rates, *task) for each task.
+
+        :param function: module level function, so that it can be sent to worker processes
+        :param tasks: list of argument tuples
+        :return: a list of results in the order of tasks
+        """
+        if self._executor is None:
+            return [function(self.gdax_rates, *task) for task in tasks]
+        # a few chunks per worker, so that many short tasks don't pay a round trip each
+        chunk_size = max(1, len(tasks) // (4 * self.max_workers))
+        return list(self._executor.map(_call_with_worker_rates, [(function, task) for task in tasks],
+                                       chunksize=chunk_size))
+
+    def shutdown(self):
+        """
+        Stops the worker processes and releases the shared memory.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._shared_arrays is not None:
+            self._shared_arrays.close()
+            self._shared_arrays = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+def get_rate_arrays(rates_by_product):
+    """
+    Lays out rates of products as named arrays for SharedArrays, see attach_worker_rates.
+
+    :param rates_by_product: dict of product id -> GDAXRateSeries
+    :return: dict of '<product id>/<field name>' -> column
+    """
+    return {_get_rate_array_name(product_id, field_name): column
+            for product_id, gdax_rates in rates_by_product.items()
+            for field_name, column in zip(GDAXRate.get_field_names(), gdax_rates.columns())}
+
+
+def attach_worker_rates(descriptor, product_ids):
+    """
+    Pool initializer attaching a worker process to shared arrays holding rates laid out by get_rate_arrays.
+
+    :param descriptor: descriptor of the SharedArrays block
+    :param product_ids: products whose rates are in the block
+    """
+    global _worker_shared_arrays, _worker_rates
+    _worker_shared_arrays = SharedArrays.attach(descriptor)
+    arrays = _worker_shared_arrays.arrays
+    _worker_rates = {product_id: GDAXRateSeries(*[arrays[_get_rate_array_name(product_id, field_name)]
+                                                  for field_name in GDAXRate.get_field_names()])
+                     for product_id in product_ids}
+
+
+def get_worker_arrays():
+    """
+    :return: dict of name -> view of every array shared with this worker process
+    """
+    return _worker_shared_arrays.arrays
+
+
+def get_worker_rates():
+    """
+    :return: dict of product id -> GDAXRateSeries shared with this worker process
+    """
+    return _worker_rates
+
+
+def _call_with_worker_rates(function_and_task):
+    function, task = function_and_task
+    return function(_worker_rates[None], *task)
+
+
+def _get_rate_array_name(product_id, field_name):
+    return '{}/{}'.format(product_id, field_name)
+
+
+def _get_views(shared_memory, layout):
+    return {name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shared_memory.buf, offset=offset)
+            for name, dtype, shape, offset in layout}
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubGDAXServer(object):
+    """
+    Local stand-in for the GDAX public API.
+
+    Serves /products and canned /products/{id}/candles responses built from GDAXRateSeries,
+    newest candle first like the real API. Candles starting in [start, end] are returned.
+
+    Usage:
+        with StubGDAXServer({'BTC-USD': rates}) as server:
+            api = GDAXApi(server.url)
+    """
+
+    def __init__(self, rates_by_product, delay=0.0):
+        """
+        :param rates_by_product: dict of product id -> GDAXRateSeries
+        :param delay: seconds to wait before answering every request
+        """
+        self.rates_by_product = rates_by_product
+        self.delay = delay
+        self.requests = []
+        self.connections = set()
+        self.failures = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self._server.server_address[1])
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def fail_next(self, status, count=1, headers=None, body=None):
+        """
+        Answers the next requests with an error.
+
+        :param status: HTTP status code
+        :param count: number of requests to fail
+        :param headers: dict of response headers e.g. Retry-After
+        :param body: JSON body, {'message': ...} if None
+        """
+        with self._lock:
+            self.failures += [(status, headers or {}, body or {'message': 'Stub error {}'.format(status)})] * count
+
+    def candles(self, product_id, start, end, granularity):
+        """
+        Raw candles as served by the API.
+
+        :return: status code, JSON body
+        """
+        if product_id not in self.rates_by_product:
+            return 404, {'message': 'NotFound'}
+
+        rates = self.rates_by_product[product_id]
+        if len(rates) and int(rates.end_time[0] - rates.start_time[0]) != granularity:
+            return 400, {'message': 'Unsupported granularity'}
+
+        rates = rates[(rates.start_time >= start) & (rates.start_time <= end)][::-1]
+        return 200, [list(row) for row in zip(rates.start_time.tolist(), rates.lowest_price.tolist(),
+                                              rates.highest_price.tolist(), rates.opening_price.tolist(),
+                                              rates.closing_price.tolist(), rates.volume_of_trading.tolist())]
+
+    def _respond(self, path, query):
+        parts = path.strip('/').split('/')
+        if parts == ['products']:
+            return 200, [{'id': product_id} for product_id in self.rates_by_product]
+        if len(parts) == 3 and parts[0] == 'products' and parts[2] == 'candles':
+            return self.candles(parts[1], _parse_time(query['start'][0]), _parse_time(query['end'][0]),
+                                int(query['granularity'][0]))
+        return 404, {'message': 'NotFound'}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                with server._lock:
+                    server.requests.append(url.path + '?' + url.query)
+                    server.connections.add(self.client_address)
+                    server._in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server._in_flight)
+                    failure = server.failures.pop(0) if server.failures else None
+                try:
+                    time.sleep(server.delay)
+                    if failure is None:
+                        status, body = server._respond(url.path, parse_qs(url.query))
+                        headers = {}
+                    else:
+                        status, headers, body = failure
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _parse_time(value):
+    time_value = datetime.fromisoformat(value.replace(' ', 'T'))
+    if time_value.tzinfo is None:
+        time_value = time_value.replace(tzinfo=timezone.utc)
+    return int(time_value.timestamp())
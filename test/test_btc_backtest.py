@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+from bitcoin_forecast import GDAXRateLog, BTCForecast
+from bitcoin_forecast.btc_backtest import backtest
+
+
+class TestBTCBacktest(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv'
+
+    @classmethod
+    def setUpClass(cls):
+        TestBTCBacktest.rates = GDAXRateLog(TestBTCBacktest.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    def test_backtest(self):
+        result = backtest(self.rates, retrain_interval=24, horizon=48, train_size=168)
+
+        # split points from rate 168 to the last rate, every 24 rates
+        self.assertListEqual(list(range(168, 694, 24)), list(result['split_points']))
+        self.assertEqual((22, 48), result['predictions'].shape)
+        self.assertEqual((48,), result['mae_by_step'].shape)
+        self.assertGreater(result['windows_per_second'], 0)
+        self.assertGreater(result['elapsed'], 0)
+
+        # the first window matches learning and predicting by hand
+        forecast = BTCForecast()
+        forecast.learn(self.rates[:168])
+        expected = forecast.predict(self.rates[168:216])
+        np.testing.assert_allclose(expected, result['predictions'][0])
+        np.testing.assert_array_equal(self.rates.prices[168:216], result['actual'][0])
+
+        # the last window reaches past the last rate
+        self.assertEqual(694 - 672, np.count_nonzero(~np.isnan(result['predictions'][-1])))
+
+        errors = result['predictions'] - result['actual']
+        self.assertAlmostEqual(np.nanmean(np.abs(errors)), result['mae'])
+        self.assertAlmostEqual(np.sqrt(np.nanmean(errors ** 2)), result['rmse'])
+        self.assertTrue(0 <= result['directional_accuracy'] <= 1)
+
+    def test_expanding_window(self):
+        result = backtest(self.rates, 'NYSTROEM', {'n_components': 50}, retrain_interval=100, horizon=10)
+
+        self.assertListEqual([347, 447, 547, 647], list(result['split_points']))
+        forecast = BTCForecast('NYSTROEM', {'n_components': 50})
+        forecast.learn(self.rates[:447])
+        np.testing.assert_allclose(forecast.predict(self.rates[447:457]), result['predictions'][1])
+
+    def test_backtest_in_process_pool(self):
+        result = backtest(self.rates, retrain_interval=48, horizon=24, train_size=168, max_workers=2)
+
+        expected = backtest(self.rates, retrain_interval=48, horizon=24, train_size=168, max_workers=1)
+        np.testing.assert_allclose(expected['predictions'], result['predictions'])
+        self.assertAlmostEqual(expected['rmse'], result['rmse'])
+
+    def test_not_enough_rates(self):
+        with self.assertRaises(ValueError):
+            backtest(self.rates[:100], train_size=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
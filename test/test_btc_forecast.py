@@ -1,7 +1,11 @@
 import unittest
 import logging
+import os
+import pickle
 import sys
 from bitcoin_forecast import GDAXRateLog, BTCForecast, GDAXRate
+from bitcoin_forecast.features import BTCFeatures
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
@@ -9,6 +13,7 @@ import matplotlib.dates as mdates
 class TestBTCForecast(unittest.TestCase):
 
     EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv'
+    MODEL_FILE_PATH = 'test_model.pickle'
 
     @classmethod
     def setUpClass(cls):
@@ -27,6 +32,10 @@ class TestBTCForecast(unittest.TestCase):
     def tearDownClass(cls):
         pass
 
+    def tearDown(self):
+        if os.path.isfile(self.MODEL_FILE_PATH):
+            os.remove(self.MODEL_FILE_PATH)
+
     def test_setup(self):
         self.assertEqual(694, len(TestBTCForecast.rates))
         self.assertEqual(625, len(TestBTCForecast.rates_train))
@@ -52,7 +61,7 @@ class TestBTCForecast(unittest.TestCase):
         # learning set values shouldn't be modified
         log = GDAXRateLog(TestBTCForecast.EXISTING_RATE_LOG_FILE_PATH)
         fresh_rates = log.read()
-        self.assertListEqual(fresh_rates, TestBTCForecast.rates)
+        self.assertEqual(fresh_rates, TestBTCForecast.rates)
 
     def test_predict(self):
         forecast = BTCForecast()
@@ -74,6 +83,176 @@ class TestBTCForecast(unittest.TestCase):
         # dates = GDAXRate.to_dates(TestBTCForecast.rates)
         # TestBTCForecast._plot_simple_rates(dates, simple_rates, predicted_past, predicted_future)
 
+    def test_unsupported_model(self):
+        with self.assertRaises(AssertionError):
+            BTCForecast('LSTM')
+
+    def test_model_params(self):
+        forecast = BTCForecast('SVR', {'c': 10})
+
+        self.assertEqual(10, forecast._model.C)
+        self.assertEqual(100, forecast._model.gamma)
+        self.assertEqual(100, BTCForecast.DEFAULT_SVR_MODEL_PARAMS['c'])
+        self.assertEqual('SVR', forecast.model_type)
+        self.assertEqual(10, forecast.model_params['c'])
+        self.assertFalse(forecast.uses_features)
+        self.assertTrue(BTCForecast('SVR', features=BTCFeatures()).uses_features)
+
+    def test_learn_nystroem(self):
+        forecast = BTCForecast('NYSTROEM')
+        score = forecast.learn(TestBTCForecast.rates_train)
+
+        # we expect accuracy over 90%
+        self.assertGreater(score, 0.9)
+        self.assertEqual(69, len(forecast.predict(TestBTCForecast.rates_test)))
+
+    def test_learn_from_list_of_rates(self):
+        forecast = BTCForecast()
+        score = forecast.learn(TestBTCForecast.rates_train.to_rates())
+
+        self.assertAlmostEqual(BTCForecast().learn(TestBTCForecast.rates_train), score)
+
+    def test_predict_from_rate_series(self):
+        forecast = BTCForecast()
+        forecast.learn(TestBTCForecast.rates_train)
+
+        predicted = forecast.predict(TestBTCForecast.rates_test)
+        expected = forecast.predict(list(GDAXRate.to_timestamps(TestBTCForecast.rates_test)))
+        self.assertListEqual(list(expected), list(predicted))
+
+    def test_learn_online(self):
+        forecast = BTCForecast('ONLINE')
+        score = forecast.learn(TestBTCForecast.rates_train)
+
+        # we expect accuracy over 90%
+        self.assertGreater(score, 0.9)
+        self.assertEqual(69, len(forecast.predict(TestBTCForecast.rates_test)))
+
+    def test_partial_learn(self):
+        forecast = BTCForecast('ONLINE', {'window_size': 300})
+        forecast.learn(TestBTCForecast.rates_train[:100])
+
+        num_of_rates = 0
+        for i in range(100, len(TestBTCForecast.rates), 10):
+            num_of_rates += forecast.partial_learn(TestBTCForecast.rates[i - 5:i + 10])
+        self.assertEqual(len(TestBTCForecast.rates) - 100, num_of_rates)
+
+        # bounded window of the latest rates
+        self.assertEqual(TestBTCForecast.rates[-300:], forecast._window)
+
+        # incremental updates match learning the window from scratch
+        predicted = forecast.predict(TestBTCForecast.rates_test)
+        forecast._fit_window()
+        expected = forecast.predict(TestBTCForecast.rates_test)
+        for p, e in zip(predicted, expected):
+            self.assertAlmostEqual(e, p, delta=0.01)
+
+    def test_partial_learn_nothing_new(self):
+        forecast = BTCForecast('ONLINE', {'window_size': 300})
+        forecast.partial_learn(TestBTCForecast.rates_train)
+        predicted = forecast.predict(TestBTCForecast.rates_test.timestamps)
+
+        # an empty batch, or rates learned already
+        self.assertEqual(0, forecast.partial_learn([]))
+        self.assertEqual(0, forecast.partial_learn(TestBTCForecast.rates_train[-50:]))
+        self.assertEqual(TestBTCForecast.rates_train[-300:], forecast._window)
+        self.assertListEqual(list(predicted), list(forecast.predict(TestBTCForecast.rates_test.timestamps)))
+
+    def test_save_and_load(self):
+        forecast = BTCForecast('NYSTROEM', {'n_components': 100})
+        with self.assertRaises(TypeError):
+            forecast.save(self.MODEL_FILE_PATH)
+
+        forecast.learn(TestBTCForecast.rates_train)
+        forecast.save(self.MODEL_FILE_PATH, {'product_id': 'BTC-USD'})
+
+        metadata = BTCForecast.load_metadata(self.MODEL_FILE_PATH)
+        self.assertEqual('NYSTROEM', metadata['model_type'])
+        self.assertEqual({'product_id': 'BTC-USD'}, metadata['labels'])
+
+        loaded = BTCForecast.load(self.MODEL_FILE_PATH)
+        self.assertTrue(loaded.has_learned)
+        self.assertEqual(100, loaded._model_params['n_components'])
+        self.assertListEqual(list(forecast.predict(TestBTCForecast.rates_test)),
+                             list(loaded.predict(TestBTCForecast.rates_test)))
+
+    def test_learn_or_load(self):
+        score = BTCForecast().learn_or_load(TestBTCForecast.rates_train, self.MODEL_FILE_PATH)
+        self.assertTrue(os.path.isfile(self.MODEL_FILE_PATH))
+
+        # same rates and model, learning is skipped
+        forecast = BTCForecast()
+        forecast.learn = None
+        self.assertEqual(score, forecast.learn_or_load(TestBTCForecast.rates_train.to_rates(),
+                                                       self.MODEL_FILE_PATH))
+        self.assertTrue(forecast.has_learned)
+
+        # different rates or parameters, learned again
+        for forecast, rates in [(BTCForecast(), TestBTCForecast.rates), (BTCForecast('SVR', {'c': 10}),
+                                                                           TestBTCForecast.rates_train)]:
+            mtime = os.path.getmtime(self.MODEL_FILE_PATH)
+            os.utime(self.MODEL_FILE_PATH, (mtime - 10, mtime - 10))
+            forecast.learn_or_load(rates, self.MODEL_FILE_PATH)
+            self.assertEqual(BTCForecast.fingerprint(rates), BTCForecast.load(self.MODEL_FILE_PATH)._fingerprint)
+            self.assertGreater(os.path.getmtime(self.MODEL_FILE_PATH), mtime - 10)
+
+    def test_learn_or_load_unusable_file(self):
+        BTCForecast().learn_or_load(TestBTCForecast.rates_train, self.MODEL_FILE_PATH)
+        with open(self.MODEL_FILE_PATH, 'rb') as model_file:
+            content = model_file.read()
+
+        # truncated, corrupt or another format, learned again
+        for corrupt_content in [content[:len(content) // 2], b'\x00' * 100, pickle.dumps(['not', 'a', 'model'])]:
+            with open(self.MODEL_FILE_PATH, 'wb') as model_file:
+                model_file.write(corrupt_content)
+
+            forecast = BTCForecast()
+            with self.assertLogs('BTCForecast', 'WARNING'):
+                forecast.learn_or_load(TestBTCForecast.rates_train, self.MODEL_FILE_PATH)
+            self.assertTrue(forecast.has_learned)
+            self.assertTrue(BTCForecast.load(self.MODEL_FILE_PATH).has_learned)
+
+    def test_fingerprint(self):
+        fingerprint = BTCForecast.fingerprint(TestBTCForecast.rates_train)
+
+        self.assertEqual(625, fingerprint['num_of_rates'])
+        self.assertEqual(int(TestBTCForecast.rates_train.start_time[0]), fingerprint['start_time'])
+        self.assertEqual(int(TestBTCForecast.rates_train.end_time[-1]), fingerprint['end_time'])
+        self.assertEqual(fingerprint, BTCForecast.fingerprint(TestBTCForecast.rates_train.to_rates()))
+        self.assertNotEqual(fingerprint['sha256'], BTCForecast.fingerprint(TestBTCForecast.rates_test)['sha256'])
+
+    def test_learn_from_features(self):
+        forecast = BTCForecast('SVR', {'gamma': 0.01}, BTCFeatures())
+        score = forecast.learn(TestBTCForecast.rates_train)
+
+        # we expect accuracy over 90%
+        self.assertGreater(score, 0.9)
+
+        # features of the test rates come from the cached training rates before them
+        predicted = forecast.predict(TestBTCForecast.rates_test)
+        self.assertEqual(69, len(predicted))
+        self.assertFalse(np.isnan(predicted).any())
+        self.assertListEqual(list(predicted), list(forecast.predict(TestBTCForecast.rates_test.to_rates())))
+
+        with self.assertRaises(TypeError):
+            forecast.predict(TestBTCForecast.rates_test.timestamps)
+
+    def test_predict_from_features_after_gap(self):
+        features = BTCFeatures()
+        forecast = BTCForecast('SVR', {'gamma': 0.01}, features)
+        forecast.learn(TestBTCForecast.rates_train)
+
+        # without the rates between the training and test rates, the first test rates lack history
+        predicted = forecast.predict(TestBTCForecast.rates_test[30:])
+        self.assertTrue(np.isnan(predicted[:features.lookback]).all())
+        self.assertFalse(np.isnan(predicted[features.lookback:]).any())
+
+    def test_partial_learn_unsupported(self):
+        forecast = BTCForecast('SVR')
+
+        with self.assertRaises(TypeError):
+            forecast.partial_learn(TestBTCForecast.rates_train)
+
     @staticmethod
     def _plot_simple_rates(dates, rates, predicted_past, predicted_future):
         predicted_past = [p for p in predicted_past]
@@ -0,0 +1,49 @@
+import unittest
+from bitcoin_forecast import GDAXRateLog, BTCForecast
+
+
+class TestBTCSearch(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv'
+    PARAM_GRID = {'c': [10, 100], 'gamma': [1, 10, 100]}
+
+    @classmethod
+    def setUpClass(cls):
+        TestBTCSearch.rates = GDAXRateLog(TestBTCSearch.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    def test_search(self):
+        result = BTCForecast.search(self.rates, self.PARAM_GRID, num_of_folds=5)
+
+        self.assertIn(result['best_params'], [{'c': c, 'gamma': gamma} for c in [10, 100] for gamma in [1, 10, 100]])
+        self.assertGreater(result['best_rmse'], 0)
+
+        # 6 candidates on windows of 115 rates, 2 on windows of 345 rates, 1 on all rates before each split
+        self.assertEqual(5 * (6 + 2 + 1), len(result['folds']))
+        self.assertEqual([0, 1, 2], sorted({fold['round'] for fold in result['folds']}))
+        last_round = [fold for fold in result['folds'] if fold['round'] == 2]
+        self.assertEqual([694 - 115 * (5 - i) for i in range(5)], [fold['train_size'] for fold in last_round])
+        for fold in last_round:
+            self.assertEqual(result['best_params'], fold['params'])
+            self.assertGreater(fold['fit_time'], 0)
+            self.assertGreater(fold['predict_time'], 0)
+
+    def test_search_in_process_pool(self):
+        result = BTCForecast.search(self.rates, self.PARAM_GRID, max_workers=2)
+
+        expected = BTCForecast.search(self.rates, self.PARAM_GRID, max_workers=1)
+        self.assertEqual(expected['best_params'], result['best_params'])
+        self.assertAlmostEqual(expected['best_rmse'], result['best_rmse'])
+
+    def test_without_halving(self):
+        result = BTCForecast.search(self.rates, {'gamma': [10, 100], 'n_components': [50]}, 'NYSTROEM',
+                                    num_of_folds=3, min_train_size=len(self.rates))
+
+        self.assertEqual(2 * 3, len(result['folds']))
+
+    def test_not_enough_rates(self):
+        with self.assertRaises(ValueError):
+            BTCForecast.search(self.rates[:5], self.PARAM_GRID, num_of_folds=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
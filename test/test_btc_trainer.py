@@ -0,0 +1,72 @@
+import unittest
+import time
+import numpy as np
+from bitcoin_forecast import GDAXRateLog, GDAXRateSeries
+from bitcoin_forecast.btc_trainer import train
+
+
+class TestBTCTrainer(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATHS = {'BTC-USD': '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv',
+                                    'ETH-USD': '../bitcoin_forecast/resources/test_rate_log_2017_05.csv'}
+    JOBS = [('BTC-USD', 'NYSTROEM', {'n_components': 50}), ('ETH-USD', 'NYSTROEM', {'n_components': 50}),
+            ('BTC-USD', 'SVR', None), ('ETH-USD', 'ONLINE', {'window_size': 500, 'n_components': 50})]
+
+    @classmethod
+    def setUpClass(cls):
+        TestBTCTrainer.rates_by_product = {product_id: GDAXRateLog(file_path).read() for product_id, file_path
+                                           in TestBTCTrainer.EXISTING_RATE_LOG_FILE_PATHS.items()}
+
+    def test_train(self):
+        results = train(self.rates_by_product, self.JOBS, max_workers=1)
+
+        self.assertListEqual([job[:2] for job in self.JOBS],
+                             [(result['product_id'], result['model_type']) for result in results])
+        for result in results:
+            self.assertIsNone(result['error'])
+            self.assertTrue(result['forecast'].has_learned)
+            self.assertGreater(result['score'], 0.8)
+            self.assertGreater(result['fit_time'], 0)
+
+    def test_train_in_process_pool(self):
+        results = train(self.rates_by_product, self.JOBS, max_workers=2)
+        expected_results = train(self.rates_by_product, self.JOBS, max_workers=1)
+
+        for result, expected_result in zip(results, expected_results):
+            timestamps = self.rates_by_product[result['product_id']].timestamps[:20]
+            self.assertIsNone(result['error'])
+            self.assertAlmostEqual(expected_result['score'], result['score'])
+            np.testing.assert_allclose(expected_result['forecast'].predict(timestamps),
+                                       result['forecast'].predict(timestamps))
+
+    def test_failed_job(self):
+        results = train(self.rates_by_product, [('BTC-USD', 'NYSTROEM', {'n_components': 0}),
+                                                ('ETH-USD', 'NYSTROEM', {'n_components': 50})], max_workers=2)
+
+        self.assertIsNotNone(results[0]['error'])
+        self.assertIsNone(results[0]['forecast'])
+        self.assertIsNone(results[1]['error'])
+
+        with self.assertRaises(KeyError):
+            train(self.rates_by_product, [('LTC-USD', 'SVR', None)])
+
+    def test_timeout(self):
+        # exact SVR of tens of thousands of rates takes far longer than the timeout
+        rates = self.rates_by_product['BTC-USD']
+        many_rates = GDAXRateSeries.concatenate([GDAXRateSeries(rates.start_time + offset, rates.end_time + offset,
+                                                                *rates.columns()[2:])
+                                                 for offset in range(0, 40 * 700 * 60 * 60, 700 * 60 * 60)])
+        rates_by_product = dict(self.rates_by_product, **{'BTC-EUR': many_rates})
+        jobs = [('BTC-EUR', 'SVR', None)] + self.JOBS
+
+        started = time.perf_counter()
+        results = train(rates_by_product, jobs, max_workers=2, timeout=2)
+
+        self.assertLess(time.perf_counter() - started, 30)
+        self.assertEqual('Timed out after 2s', results[0]['error'])
+        for result in results[1:]:
+            self.assertIsNone(result['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import unittest
+import json
+import os
+import socket
+import tempfile
+from bitcoin_forecast import GDAXApi, GDAXRateLog, BTCForecast, BTCForecastDaemon
+from .gdax_stub_server import StubGDAXServer
+
+
+class FakeClock(object):
+    """
+    Clock which moves forward only when slept on, stopping the daemon after a number of sleeps.
+    """
+
+    def __init__(self, now, daemon_stops_after=None, on_sleep=None):
+        self.now = now
+        self.sleeps = []
+        self.daemon = None
+        self.daemon_stops_after = daemon_stops_after
+        self.on_sleep = on_sleep
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        if self.on_sleep is not None:
+            self.on_sleep(len(self.sleeps))
+        if len(self.sleeps) == self.daemon_stops_after:
+            self.daemon.stop()
+
+
+class TestBTCForecastDaemon(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_05.csv'
+    RATE_LOG_FILE_PATH = 'test_rate_log_daemon.csv'
+    OUTPUT_FILE_PATH = 'test_daemon_predictions.json'
+    MODEL_FILE_PATH = 'test_daemon_model.pkl'
+
+    MODEL_PARAMS = {'window_size': 100, 'n_components': 50}
+
+    @classmethod
+    def setUpClass(cls):
+        TestBTCForecastDaemon.rates = GDAXRateLog(TestBTCForecastDaemon.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    def tearDown(self):
+        for file_path in [self.RATE_LOG_FILE_PATH, self.RATE_LOG_FILE_PATH + '.idx', self.OUTPUT_FILE_PATH,
+                          self.MODEL_FILE_PATH]:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def _create_daemon(self, server, clock, **kwargs):
+        api = GDAXApi(server.url, requests_per_second=None, backoff=0.01, max_retries=0)
+        daemon = BTCForecastDaemon(api, self.RATE_LOG_FILE_PATH, model_params=self.MODEL_PARAMS, horizons=3,
+                                   settle_delay=5, clock=clock, sleep=clock.sleep, **kwargs)
+        clock.daemon = daemon
+        return daemon
+
+    def test_get_next_wakeup(self):
+        daemon = BTCForecastDaemon(GDAXApi(), self.RATE_LOG_FILE_PATH, settle_delay=5)
+
+        self.assertEqual(3600 * 10 + 5, daemon.get_next_wakeup(3600 * 10 - 1))
+        self.assertEqual(3600 * 10 + 5, daemon.get_next_wakeup(3600 * 10))
+        self.assertEqual(3600 * 11 + 5, daemon.get_next_wakeup(3600 * 10 + 5))
+        self.assertEqual(3600 * 11 + 5, daemon.get_next_wakeup(3600 * 10 + 6))
+
+    def test_run(self):
+        # half an hour after the candle ending at rates.end_time[299] closed
+        clock = FakeClock(int(self.rates.end_time[299]) + 30 * 60, daemon_stops_after=3)
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            daemon = self._create_daemon(server, clock, output_file_path=self.OUTPUT_FILE_PATH)
+            daemon.run()
+
+            # wakes up at the next three candle boundaries, fetching the latest candle only
+            self.assertListEqual([30 * 60 + 5, 60 * 60, 60 * 60], clock.sleeps)
+            # at most a window of candles is fetched at start up, and kept by the forecast
+            self.assertEqual(self.rates[200:302], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+            self.assertEqual(self.rates[202:302], daemon.forecast._window)
+            self.assertEqual(3, len(server.requests))
+
+        with open(self.OUTPUT_FILE_PATH) as output_file:
+            prediction = json.load(output_file)
+        self.assertEqual('BTC-USD', prediction['product_id'])
+        self.assertEqual(int(self.rates.end_time[301]), prediction['last_end_time'])
+        self.assertListEqual([int(self.rates.end_time[301]) + hours * 60 * 60 for hours in [1, 2, 3]],
+                             prediction['timestamps'])
+        self.assertListEqual(daemon.forecast.predict(prediction['timestamps']).tolist(), prediction['predictions'])
+
+    def test_run_fetches_new_candles_only(self):
+        GDAXRateLog(self.RATE_LOG_FILE_PATH).append(self.rates[:300])
+        clock = FakeClock(int(self.rates.end_time[301]) + 5, daemon_stops_after=1)
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            daemon = self._create_daemon(server, clock)
+            daemon.run()
+
+            self.assertEqual(self.rates[:302], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+            self.assertEqual(1, len(server.requests))
+            self.assertEqual(int(self.rates.end_time[301]), daemon.prediction['last_end_time'])
+
+    def test_run_retries_unpublished_candles(self):
+        GDAXRateLog(self.RATE_LOG_FILE_PATH).append(self.rates[:300])
+
+        with StubGDAXServer({'BTC-USD': self.rates[:300]}) as server:
+            def publish(num_of_sleeps):
+                if num_of_sleeps == 3:
+                    server.rates_by_product['BTC-USD'] = self.rates
+
+            clock = FakeClock(int(self.rates.end_time[300]) + 5, daemon_stops_after=5, on_sleep=publish)
+            daemon = self._create_daemon(server, clock)
+            server.fail_next(500)
+            server.fail_next(200, body=[[1493596800, 1.0]])
+            daemon.run()
+
+            # the candle is published late, and requested again with backoff rather than at the next boundary
+            self.assertListEqual([5, 10, 20, 60 * 60 - 35, 60 * 60], clock.sleeps)
+            self.assertEqual(self.rates[:302], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+            self.assertEqual(5, len(server.requests))
+
+    def test_run_retries_until_next_boundary(self):
+        GDAXRateLog(self.RATE_LOG_FILE_PATH).append(self.rates[:300])
+        clock = FakeClock(int(self.rates.end_time[300]) + 5, daemon_stops_after=63)
+
+        with StubGDAXServer({'BTC-USD': self.rates[:300]}) as server:
+            daemon = self._create_daemon(server, clock)
+            daemon.run()
+
+            # backoff is bounded, and retries end at the next candle boundary
+            self.assertListEqual([5, 10, 20, 40] + [60] * 58, clock.sleeps[:62])
+            self.assertEqual(int(self.rates.end_time[301]) + 5, clock.now)
+
+    def test_stop_saves_model(self):
+        GDAXRateLog(self.RATE_LOG_FILE_PATH).append(self.rates[:300])
+        clock = FakeClock(int(self.rates.end_time[299]) + 5, daemon_stops_after=2)
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            daemon = self._create_daemon(server, clock, model_file_path=self.MODEL_FILE_PATH)
+            daemon.run()
+
+            forecast = BTCForecast.load(self.MODEL_FILE_PATH)
+            self.assertListEqual(daemon.forecast.predict(self.rates.timestamps[:10]).tolist(),
+                                 forecast.predict(self.rates.timestamps[:10]).tolist())
+
+            # a restarted daemon picks up the saved model, and carries on from the log
+            restarted_daemon = self._create_daemon(server, FakeClock(clock.now, daemon_stops_after=1),
+                                                   model_file_path=self.MODEL_FILE_PATH)
+            self.assertEqual(int(self.rates.end_time[300]), restarted_daemon.forecast._window.end_time[-1])
+            restarted_daemon.run()
+            self.assertEqual(int(self.rates.end_time[301]), restarted_daemon.forecast._window.end_time[-1])
+            self.assertEqual(self.rates[:302], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+    def test_model_file_is_validated(self):
+        forecast = BTCForecast('ONLINE', self.MODEL_PARAMS)
+        forecast.partial_learn(self.rates[:200])
+        nystroem_forecast = BTCForecast('NYSTROEM', {'n_components': 50})
+        nystroem_forecast.learn(self.rates[:200])
+
+        # another model type, product or granularity, or saved without them
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            for model_forecast, labels in [(nystroem_forecast, {'product_id': 'BTC-USD', 'granularity': 3600}),
+                                           (forecast, {'product_id': 'ETH-USD', 'granularity': 3600}),
+                                           (forecast, {'product_id': 'BTC-USD', 'granularity': 60}),
+                                           (forecast, None)]:
+                model_forecast.save(self.MODEL_FILE_PATH, labels)
+
+                with self.assertRaises(ValueError):
+                    self._create_daemon(server, FakeClock(0), model_file_path=self.MODEL_FILE_PATH)
+
+    def test_publish_to_socket(self):
+        GDAXRateLog(self.RATE_LOG_FILE_PATH).append(self.rates[:300])
+        clock = FakeClock(int(self.rates.end_time[299]) + 5, daemon_stops_after=2)
+
+        with tempfile.TemporaryDirectory() as directory, \
+                socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as receiver, \
+                StubGDAXServer({'BTC-USD': self.rates}) as server:
+            socket_path = os.path.join(directory, 'predictions.sock')
+            receiver.bind(socket_path)
+            receiver.settimeout(5)
+
+            daemon = self._create_daemon(server, clock, socket_path=socket_path)
+            daemon.run()
+
+            # published at start up, then for the new candle
+            self.assertEqual(int(self.rates.end_time[299]), json.loads(receiver.recv(65536))['last_end_time'])
+            self.assertEqual(int(self.rates.end_time[300]), json.loads(receiver.recv(65536))['last_end_time'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+from unittest import mock
+from bitcoin_forecast import features as features_module
+from bitcoin_forecast import GDAXRateLog, GDAXRateSeries
+from bitcoin_forecast.features import BTCFeatures
+
+
+class TestBTCFeatures(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv'
+
+    @classmethod
+    def setUpClass(cls):
+        TestBTCFeatures.rates = GDAXRateLog(TestBTCFeatures.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    def test_features(self):
+        features = BTCFeatures(lags=(1, 3), return_periods=(2,), windows=(4,))
+        matrix = features.transform(self.rates)
+
+        self.assertListEqual(['end_time', 'close_lag_1', 'close_lag_3', 'return_2', 'close_mean_4', 'volatility_4',
+                              'volume_lag_1', 'volume_mean_4'], features.get_feature_names())
+        self.assertEqual((694, 8), matrix.shape)
+
+        # features of a rate only come from rates before it
+        closes = self.rates.closing_price
+        volumes = self.rates.volume_of_trading
+        i = 100
+        expected = [self.rates.end_time[i], closes[i - 1], closes[i - 3], closes[i - 1] / closes[i - 3] - 1,
+                    np.mean(closes[i - 4:i]), np.std(closes[i - 4:i] / closes[i - 5:i - 1] - 1),
+                    volumes[i - 1], np.mean(volumes[i - 4:i])]
+        np.testing.assert_allclose(expected, matrix[i])
+
+        # not enough previous rates
+        self.assertEqual(5, features.lookback)
+        self.assertTrue(np.isnan(matrix[:5]).any(axis=1).all())
+        self.assertFalse(np.isnan(matrix[5:]).any())
+
+    def test_incremental(self):
+        expected = BTCFeatures().transform(self.rates)
+
+        features = BTCFeatures()
+        matrices = [features.transform(self.rates[:100])]
+        for i in range(100, len(self.rates), 7):
+            matrices.append(features.transform(self.rates[i:i + 7]))
+        np.testing.assert_allclose(expected, np.concatenate(matrices), rtol=1e-9)
+
+        # cached rates are looked up, with the history before them
+        np.testing.assert_allclose(expected[50:700], features.transform(self.rates[50:700]), rtol=1e-9)
+        self.assertEqual(694, features._num_of_rows)
+
+    def test_only_new_rates_are_computed(self):
+        features = BTCFeatures()
+        features.transform(self.rates[:600])
+
+        with mock.patch.object(features_module, '_compute_features',
+                               wraps=features_module._compute_features) as compute_features:
+            features.transform(self.rates[550:610])
+
+        # 10 new rates, with 25 previous rates as history
+        _, history, first_row = compute_features.call_args[0]
+        self.assertEqual(25, first_row)
+        self.assertEqual(self.rates[575:610], history)
+        self.assertEqual(610, features._num_of_rows)
+
+    def test_cache_is_reset(self):
+        features = BTCFeatures()
+        features.transform(self.rates[100:200])
+
+        # older rates than cached
+        matrix = features.transform(self.rates[:150])
+        np.testing.assert_allclose(BTCFeatures().transform(self.rates[:150]), matrix)
+        self.assertEqual(150, features._num_of_rows)
+
+        # rates missing in the cache
+        features = BTCFeatures()
+        features.transform(self.rates[::2][:50])
+        matrix = features.transform(self.rates[:120])
+        np.testing.assert_allclose(BTCFeatures().transform(self.rates[:120]), matrix)
+        self.assertEqual(120, features._num_of_rows)
+
+        # rates missing between the cache and the new rates
+        features = BTCFeatures()
+        features.transform(self.rates[:300])
+        matrix = features.transform(self.rates[400:410])
+        np.testing.assert_allclose(BTCFeatures().transform(self.rates[400:410]), matrix)
+        self.assertTrue(np.isnan(matrix).any(axis=1).all())
+        self.assertEqual(10, features._num_of_rows)
+
+        # rates with the same end times, but other prices e.g. of another product
+        features = BTCFeatures()
+        features.transform(self.rates[:300])
+        other_rates = GDAXRateSeries(self.rates.start_time, self.rates.end_time, self.rates.lowest_price * 2,
+                                     self.rates.highest_price * 2, self.rates.opening_price * 2,
+                                     self.rates.closing_price * 2, self.rates.volume_of_trading)
+        matrix = features.transform(other_rates[100:200])
+        np.testing.assert_allclose(BTCFeatures().transform(other_rates[100:200]), matrix)
+        self.assertEqual(100, features._num_of_rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
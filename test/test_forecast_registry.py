@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from bitcoin_forecast import GDAXRateLog, BTCForecast, BTCForecastRegistry
+from bitcoin_forecast.features import BTCFeatures
+
+
+class TestBTCForecastRegistry(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATHS = ['../bitcoin_forecast/resources/test_rate_log_2017_05.csv',
+                                    '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv']
+
+    @classmethod
+    def setUpClass(cls):
+        forecasts = {}
+        for product_id, file_path in zip(['ETH-USD', 'BTC-USD'], cls.EXISTING_RATE_LOG_FILE_PATHS):
+            forecasts[product_id] = BTCForecast('NYSTROEM', {'n_components': 100})
+            forecasts[product_id].learn(GDAXRateLog(file_path).read())
+        TestBTCForecastRegistry.forecasts = forecasts
+
+    def test_predict(self):
+        registry = BTCForecastRegistry(self.forecasts)
+        btc_timestamps = np.arange(1506380400, 1506380400 + 10 * 3600, 3600)
+        eth_timestamps = [1494000000, 1494003600]
+
+        results = registry.predict([('BTC-USD', btc_timestamps), ('ETH-USD', eth_timestamps),
+                                    ('BTC-USD', btc_timestamps[:3])])
+
+        self.assertEqual(BTCForecastRegistry.RESULT_DTYPE, results.dtype)
+        self.assertEqual(15, len(results))
+        self.assertListEqual([0] * 10 + [1] * 2 + [2] * 3, list(results['query']))
+        self.assertListEqual(['BTC-USD'] * 10 + ['ETH-USD'] * 2 + ['BTC-USD'] * 3, list(results['product_id']))
+        self.assertListEqual(list(btc_timestamps) + eth_timestamps + list(btc_timestamps[:3]),
+                             list(results['timestamp']))
+
+        np.testing.assert_allclose(self.forecasts['BTC-USD'].predict(btc_timestamps), results['prediction'][:10])
+        np.testing.assert_allclose(self.forecasts['ETH-USD'].predict(eth_timestamps), results['prediction'][10:12])
+        np.testing.assert_allclose(results['prediction'][:3], results['prediction'][12:])
+
+    def test_predict_horizons(self):
+        registry = BTCForecastRegistry(self.forecasts)
+        horizons = np.arange(1, 25) * 3600
+
+        results = registry.predict_horizons(1506380400, horizons, ['BTC-USD'])
+        self.assertEqual(24, len(results))
+        self.assertListEqual(list(1506380400 + horizons), list(results['timestamp']))
+        np.testing.assert_allclose(self.forecasts['BTC-USD'].predict(1506380400 + horizons), results['prediction'])
+
+        self.assertEqual(2 * 24, len(registry.predict_horizons(1506380400, horizons)))
+
+    def test_registry(self):
+        registry = BTCForecastRegistry()
+        registry.register('BTC-USD', self.forecasts['BTC-USD'])
+
+        self.assertIn('BTC-USD', registry)
+        self.assertEqual(1, len(registry))
+        self.assertIs(self.forecasts['BTC-USD'], registry['BTC-USD'])
+        self.assertEqual(0, len(registry.predict([('BTC-USD', [])])))
+
+        with self.assertRaises(KeyError):
+            registry.predict([('LTC-USD', [1506380400])])
+        with self.assertRaises(TypeError):
+            registry.register('LTC-USD', BTCForecast())
+        with self.assertRaises(TypeError):
+            forecast = BTCForecast('SVR', {'gamma': 0.01}, BTCFeatures())
+            forecast.learn(GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATHS[1]).read())
+            registry.register('LTC-USD', forecast)
+
+        registry.unregister('BTC-USD')
+        self.assertNotIn('BTC-USD', registry)
+
+
+if __name__ == '__main__':
+    unittest.main()
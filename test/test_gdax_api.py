@@ -3,8 +3,15 @@ import logging
 import sys
 import csv
 import os
-from bitcoin_forecast import GDAXApi, GDAXRate, GDAXRateLog
+import pickle
+import time
+from unittest import mock
+from bitcoin_forecast import GDAXApi, GDAXApiError, GDAXRateLimitError, GDAXRate, GDAXRateSeries, GDAXRateLog, \
+    GDAXRateLogWriter
+from bitcoin_forecast.gdax_api import TokenBucket
+import numpy as np
 from datetime import datetime
+from .gdax_stub_server import StubGDAXServer
 
 
 class TestGDAXApi(unittest.TestCase):
@@ -70,8 +77,8 @@ class TestGDAXApi(unittest.TestCase):
         rates = api.get_historic_rates(product_id, start, end, granularity)
 
         self.assertEqual(num_of_periods, len(rates))
-        self.assertEqual(self.FIRST_RATE_IN_RANGE, rates[0].__dict__)
-        self.assertEqual(self.LAST_RATE_IN_RANGE, rates[num_of_periods - 1].__dict__)
+        self.assertEqual(self.FIRST_RATE_IN_RANGE, rates[0].to_dict())
+        self.assertEqual(self.LAST_RATE_IN_RANGE, rates[num_of_periods - 1].to_dict())
 
     def test_gdax_rate_log_create(self):
         product_id = 'BTC-USD'
@@ -116,7 +123,8 @@ class TestGDAXApi(unittest.TestCase):
             row_count = sum(1 for row in csv_file)
 
         self.assertListEqual(headers, self.LOG_HEADERS)
-        self.assertEqual(2 * num_of_periods, row_count)
+        # rates already in the log aren't appended again
+        self.assertEqual(num_of_periods, row_count)
 
         os.remove(self.RATE_LOG_HOURLY_FILE_PATH_2)
 
@@ -162,6 +170,554 @@ class TestGDAXApi(unittest.TestCase):
                             4135, 4160.72, 4160.03, 4156.99, 263.30476701999953)
 
         self.assertEqual(rate_end, rates[693])
+        self.assertEqual(rate_end, rates[-1])
+
+
+class TestGDAXApiStub(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_05.csv'
+
+    @classmethod
+    def setUpClass(cls):
+        TestGDAXApiStub.rates = GDAXRateLog(TestGDAXApiStub.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    def test_get_products(self):
+        with StubGDAXServer({'BTC-USD': self.rates, 'ETH-USD': self.rates}) as server:
+            self.assertListEqual(['BTC-USD', 'ETH-USD'], GDAXApi(server.url).get_products())
+
+    def test_get_historic_rates(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            api = GDAXApi(server.url, requests_per_second=None)
+            rates = api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-06-01T00:00:00.000Z')
+
+            # page boundaries overlap, repeated rates are dropped
+            self.assertEqual(self.rates, rates)
+            self.assertEqual(4, len(server.requests))
+            self.assertEqual(TestGDAXApi.FIRST_RATE_IN_RANGE, rates[0].to_dict())
+            self.assertEqual(TestGDAXApi.LAST_RATE_IN_RANGE, rates[-1].to_dict())
+
+    def test_get_historic_rates_concurrently(self):
+        with StubGDAXServer({'BTC-USD': self.rates}, delay=0.05) as server:
+            api = GDAXApi(server.url, max_in_flight=3, requests_per_second=None)
+            rates = api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-06-01T00:00:00.000Z',
+                                           granularity=60 * 60)
+
+            self.assertEqual(self.rates, rates)
+            self.assertEqual(3, server.max_in_flight)
+
+    def test_get_historic_rates_small_pages(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            api = GDAXApi(server.url, max_in_flight=4, requests_per_second=None)
+            api.MAX_NUM_DATA_POINTS_PER_PAGE = 7
+            rates = api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-05-10T00:00:00.000Z')
+
+            # the candle starting at end is included
+            self.assertEqual(self.rates[:9 * 24 + 1], rates)
+            self.assertLessEqual(server.max_in_flight, 4)
+
+    def test_requests_per_second(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            api = GDAXApi(server.url, max_in_flight=4, requests_per_second=20)
+            api.MAX_NUM_DATA_POINTS_PER_PAGE = 24
+
+            started = time.monotonic()
+            api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-05-31T00:00:00.000Z')
+
+            # 30 pages, a burst of 20 and then 20 per second
+            self.assertEqual(30, len(server.requests))
+            self.assertGreaterEqual(time.monotonic() - started, 0.45)
+
+    def test_connections_are_reused(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            api = GDAXApi(server.url, requests_per_second=None)
+            api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-06-01T00:00:00.000Z')
+
+            self.assertEqual(4, len(server.requests))
+            self.assertEqual(1, len(server.connections))
+
+    def test_retry_after_rate_limit(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            server.fail_next(429, count=2, headers={'Retry-After': '0.05'})
+            api = GDAXApi(server.url, requests_per_second=None, backoff=10)
+
+            started = time.monotonic()
+            rates = api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-05-02T00:00:00.000Z')
+
+            self.assertEqual(self.rates[:25], rates)
+            self.assertEqual(3, len(server.requests))
+            self.assertLess(time.monotonic() - started, 1)
+
+    def test_retry_server_errors(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            server.fail_next(503, count=2)
+            api = GDAXApi(server.url, requests_per_second=None, backoff=0.01)
+
+            self.assertEqual(self.rates[:25], api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z',
+                                                                     '2017-05-02T00:00:00.000Z'))
+
+    def test_errors(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            api = GDAXApi(server.url, requests_per_second=None, max_retries=2, backoff=0.01)
+
+            server.fail_next(429, count=3, headers={'Retry-After': '0'})
+            with self.assertRaises(GDAXRateLimitError) as context:
+                api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-05-02T00:00:00.000Z')
+            self.assertEqual(429, context.exception.status_code)
+
+            with self.assertRaises(GDAXApiError) as context:
+                api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-05-02T00:00:00.000Z',
+                                       granularity=60)
+            self.assertEqual(400, context.exception.status_code)
+            self.assertEqual('Unsupported granularity', context.exception.message)
+
+            # client errors aren't retried
+            self.assertEqual(4, len(server.requests))
+
+            server.fail_next(200, body={'message': 'not a page'})
+            with self.assertRaises(GDAXApiError):
+                api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-05-02T00:00:00.000Z')
+
+    def test_connection_errors(self):
+        api = GDAXApi('http://127.0.0.1:1', requests_per_second=None, max_retries=1, backoff=0.01)
+
+        with self.assertRaises(GDAXApiError):
+            api.get_products()
+
+    def test_request_errors(self):
+        import requests
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            api = GDAXApi(server.url, requests_per_second=None, max_retries=1, backoff=0.01)
+            get = api._session.get
+            calls = []
+
+            def drop_first_connection(*args, **kwargs):
+                calls.append(args)
+                if len(calls) == 1:
+                    raise requests.exceptions.ChunkedEncodingError('Connection dropped mid-body')
+                return get(*args, **kwargs)
+
+            # a connection dropped while the response is received is retried
+            with mock.patch.object(api._session, 'get', side_effect=drop_first_connection):
+                self.assertEqual(self.rates[:25], api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z',
+                                                                         '2017-05-02T00:00:00.000Z'))
+            self.assertEqual(2, len(calls))
+
+            # other request errors fail right away, as GDAXApiError
+            with mock.patch.object(api._session, 'get', side_effect=requests.TooManyRedirects('Loop')) as patched:
+                with self.assertRaises(GDAXApiError):
+                    api.get_products()
+            self.assertEqual(1, patched.call_count)
+
+    def test_token_bucket(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(2, burst=3, clock=lambda: now[0], sleep=sleep)
+        for _ in range(5):
+            bucket.acquire()
+
+        self.assertEqual(2, len(sleeps))
+        self.assertAlmostEqual(1.0, now[0])
+
+
+class TestGDAXRate(unittest.TestCase):
+
+    RAW_CANDLES = [[1493604000, 1382.72, 1396, 1382.95, 1389.1, 638.9534048599972],
+                   [1493596800, 1370.98, 1397.9, 1384.55, 1382.96, 1071.6502117499967]]
+
+    FIRST_RATE = GDAXRate(datetime(2017, 5, 1, 2, 0), datetime(2017, 5, 1, 3, 0),
+                          1382.72, 1396, 1382.95, 1389.1, 638.9534048599972)
+
+    def test_constructor(self):
+        self.assertEqual(self.FIRST_RATE, GDAXRate(1493604000, 1493607600, 1382.72, 1396, 1382.95, 1389.1,
+                                                   638.9534048599972))
+        self.assertEqual(self.FIRST_RATE, GDAXRate('2017-05-01 02:00:00', '2017-05-01 03:00:00', 1382.72, 1396,
+                                                   1382.95, 1389.1, 638.9534048599972))
+        with self.assertRaises(TypeError):
+            GDAXRate(1493604000.0, 1493607600, 1, 1, 1, 1, 1)
+
+    def test_immutable_and_hashable(self):
+        rate = GDAXRate(*self.FIRST_RATE.to_dict().values())
+
+        self.assertFalse(hasattr(rate, '__dict__'))
+        with self.assertRaises(AttributeError):
+            rate.closing_price = 1
+        with self.assertRaises(AttributeError):
+            del rate.closing_price
+        self.assertEqual(hash(self.FIRST_RATE), hash(rate))
+        self.assertEqual(1, len({self.FIRST_RATE, rate}))
+        self.assertNotEqual(self.FIRST_RATE, GDAXRate(rate.start_time, rate.end_time, 1, 1, 1, 1, 1))
+        self.assertEqual(self.FIRST_RATE, pickle.loads(pickle.dumps(rate)))
+
+    def test_to_dict(self):
+        rate_dict = self.FIRST_RATE.to_dict()
+
+        self.assertListEqual(GDAXRate.get_field_names(), list(rate_dict))
+        self.assertEqual(datetime(2017, 5, 1, 2, 0), rate_dict['start_time'])
+        self.assertEqual(1389.1, rate_dict['closing_price'])
+
+    def test_from_raw_candles(self):
+        rates = GDAXRate.from_raw_candles(self.RAW_CANDLES, 60 * 60)
+
+        self.assertEqual(2, len(rates))
+        self.assertEqual(self.FIRST_RATE, rates[0])
+        self.assertEqual(datetime(2017, 5, 1, 1, 0), rates[1].end_time)
+        self.assertIs(float, type(rates[0].highest_price))
+        self.assertListEqual([], GDAXRate.from_raw_candles([], 60 * 60))
+
+    def test_from_epoch_arrays(self):
+        series = GDAXRateSeries([1493600400, 1493604000], [1493604000, 1493607600], [1370.98, 1382.72],
+                                [1397.9, 1396], [1384.55, 1382.95], [1382.96, 1389.1],
+                                [1071.6502117499967, 638.9534048599972])
+        rates = GDAXRate.from_epoch_arrays(*series.columns())
+
+        self.assertListEqual([series[0], series[1]], rates)
+        self.assertEqual(self.FIRST_RATE, rates[1])
+        # the end time of a rate is the start time of the next one
+        self.assertIs(rates[0].end_time, rates[1].start_time)
+
+
+class TestGDAXRateSeries(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv'
+    RATE_LOG_FILE_PATH = 'test_rate_log_series.csv'
+
+    FIRST_RATE = GDAXRate(datetime(2017, 5, 1, 0, 0), datetime(2017, 5, 1, 1, 0),
+                          1370.98, 1397.9, 1384.55, 1382.96, 1071.6502117499967)
+
+    @classmethod
+    def setUpClass(cls):
+        TestGDAXRateSeries.rates = GDAXRateLog(TestGDAXRateSeries.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.isfile(TestGDAXRateSeries.RATE_LOG_FILE_PATH):
+            os.remove(TestGDAXRateSeries.RATE_LOG_FILE_PATH)
+
+    def test_columns(self):
+        rates = TestGDAXRateSeries.rates
+
+        self.assertEqual(np.int64, rates.start_time.dtype)
+        self.assertEqual(np.int64, rates.end_time.dtype)
+        self.assertEqual(np.float64, rates.closing_price.dtype)
+        self.assertEqual(1504227600, rates.timestamps[0])
+        self.assertEqual(4765.49, rates.prices[0])
+
+    def test_views_are_zero_copy(self):
+        rates = TestGDAXRateSeries.rates
+
+        self.assertTrue(np.shares_memory(rates.timestamps, rates.end_time))
+        self.assertTrue(np.shares_memory(rates[10:20].prices, rates.closing_price))
+
+    def test_slice_and_concatenate(self):
+        rates = TestGDAXRateSeries.rates
+        joined = GDAXRateSeries.concatenate([rates[:100], rates[100:]])
+
+        self.assertEqual(100, len(rates[:100]))
+        self.assertEqual(rates, joined)
+        self.assertEqual(0, len(GDAXRateSeries.concatenate([])))
+
+    def test_rates_round_trip(self):
+        rates = TestGDAXRateSeries.rates[:50]
+        gdax_rates = rates.to_rates()
+
+        self.assertEqual(50, len(gdax_rates))
+        self.assertEqual(gdax_rates[0], rates[0])
+        self.assertEqual(gdax_rates, list(rates))
+        self.assertEqual(rates, GDAXRateSeries.from_rates(gdax_rates))
+        self.assertListEqual(GDAXRate.to_dates(gdax_rates), GDAXRate.to_dates(rates))
+        self.assertListEqual(list(GDAXRate.to_timestamps(gdax_rates)), list(GDAXRate.to_timestamps(rates)))
+
+    def test_from_raw_rates(self):
+        raw_rates = [[1493604000, 1382.72, 1396, 1382.95, 1389.1, 638.9534048599972],
+                     [1493596800, 1370.98, 1397.9, 1384.55, 1382.96, 1071.6502117499967]]
+        rates = GDAXRateSeries.from_raw_rates(raw_rates, 60 * 60)
+
+        self.assertEqual(2, len(rates))
+        self.assertEqual(self.FIRST_RATE, rates[0])
+
+    def test_log_append_and_read(self):
+        rates = TestGDAXRateSeries.rates
+
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        log.append(rates[:10])
+        log.append(rates[10:20].to_rates())
+
+        self.assertEqual(rates[:20], log.gdax_rates)
+        self.assertEqual(rates[:20], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+        os.remove(self.RATE_LOG_FILE_PATH)
+
+
+class TestGDAXRateLog(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv'
+    RATE_LOG_FILE_PATH = 'test_rate_log_read.csv'
+
+    @classmethod
+    def tearDownClass(cls):
+        for file_path in [TestGDAXRateLog.RATE_LOG_FILE_PATH, TestGDAXRateLog.RATE_LOG_FILE_PATH + '.idx']:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def test_bulk_read_matches_row_reader(self):
+        log = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH)
+
+        self.assertEqual(log._read_rows(), log.read())
+        self.assertEqual(log._read_rows(), log.read(chunk_size=100))
+
+    def test_read_reordered_columns(self):
+        with open(self.RATE_LOG_FILE_PATH, 'w') as csv_file:
+            csv_file.write('end_time,volume_of_trading,start_time,closing_price,opening_price,'
+                           'highest_price,lowest_price\n')
+            csv_file.write('2017-09-01 01:00:00,532.0765854100013,2017-09-01 00:00:00,4765.49,4743.94,'
+                           '4765.49,4743.93\n')
+
+        rates = GDAXRateLog(self.RATE_LOG_FILE_PATH).read()
+
+        self.assertEqual(GDAXRate('2017-09-01 00:00:00', '2017-09-01 01:00:00',
+                                  4743.93, 4765.49, 4743.94, 4765.49, 532.0765854100013), rates[0])
+        os.remove(self.RATE_LOG_FILE_PATH)
+
+    def test_read_empty_log(self):
+        with open(self.RATE_LOG_FILE_PATH, 'w') as csv_file:
+            csv_file.write(','.join(GDAXRate.get_field_names()) + '\n')
+
+        self.assertEqual(0, len(GDAXRateLog(self.RATE_LOG_FILE_PATH).read()))
+        os.remove(self.RATE_LOG_FILE_PATH)
+
+    def test_read_invalid_time(self):
+        with open(self.RATE_LOG_FILE_PATH, 'w') as csv_file:
+            csv_file.write(','.join(GDAXRate.get_field_names()) + '\n')
+            csv_file.write('2017-09-01T00:00:00,2017-09-01T01:00:00,1,1,1,1,1\n')
+
+        with self.assertRaises(ValueError):
+            GDAXRateLog(self.RATE_LOG_FILE_PATH).read()
+        os.remove(self.RATE_LOG_FILE_PATH)
+
+    def test_read_range(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        log.INDEX_STRIDE = 16
+        log.append(rates)
+
+        september = log.read_range('2017-09-10 00:00:00', datetime(2017, 9, 12))
+        self.assertEqual(48, len(september))
+        self.assertEqual(datetime(2017, 9, 10), september[0].end_time)
+        self.assertEqual(datetime(2017, 9, 11, 23), september[-1].end_time)
+
+        for start, end in [(0, 1), (0, 2 ** 40), (rates.end_time[0], rates.end_time[1]),
+                           (rates.end_time[17] + 1, rates.end_time[500]), (rates.end_time[-1], 2 ** 40)]:
+            expected = rates[(rates.end_time >= start) & (rates.end_time < end)]
+            self.assertEqual(expected, log.read_range(start, end))
+
+        self.assertTrue(os.path.isfile(log.index_file_path))
+        os.remove(self.RATE_LOG_FILE_PATH)
+        os.remove(log.index_file_path)
+
+    def test_read_range_last_row_without_line_break(self):
+        with open(self.EXISTING_RATE_LOG_FILE_PATH) as csv_file:
+            content = csv_file.read().rstrip('\n')
+        with open(self.RATE_LOG_FILE_PATH, 'w') as csv_file:
+            csv_file.write(content)
+
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        rates = log.read()
+        self.assertEqual(rates, log.read_range(0, 2 ** 40))
+        self.assertEqual(rates[-1:], log.read_range(rates.end_time[-1], 2 ** 40))
+
+        os.remove(self.RATE_LOG_FILE_PATH)
+        os.remove(log.index_file_path)
+
+    def test_merge(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        self.assertIsNone(log.last_end_time())
+
+        log.merge(rates[300:400])
+        log.merge(rates[350:])
+        log.build_index()
+        log.merge(rates[:310])
+
+        self.assertEqual(rates, GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+        self.assertEqual(rates[100:200], log.read_range(rates.end_time[100], rates.end_time[200]))
+        self.assertEqual(rates.end_time[-1], log.last_end_time())
+
+        os.remove(self.RATE_LOG_FILE_PATH)
+        os.remove(log.index_file_path)
+
+    def test_index_is_updated_on_append(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        log.INDEX_STRIDE = 16
+        log.append(rates[:100])
+        log.build_index()
+        log.append(rates[100:])
+
+        stride, covered_rows, covered_bytes, end_times, offsets = log._read_index()
+        self.assertEqual(len(rates), covered_rows)
+        self.assertEqual(os.path.getsize(self.RATE_LOG_FILE_PATH), covered_bytes)
+        self.assertListEqual(list(rates.end_time[::16]), list(end_times))
+        self.assertEqual(rates[600:], log.read_range(rates.end_time[600], 2 ** 40))
+
+        # index of a log rewritten behind our back is rebuilt
+        os.remove(self.RATE_LOG_FILE_PATH)
+        log.append(rates[:10])
+        self.assertEqual(rates[5:10], log.read_range(rates.end_time[5], 2 ** 40))
+
+        os.remove(self.RATE_LOG_FILE_PATH)
+        os.remove(log.index_file_path)
+
+    def test_index_in_memory_when_read_only(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        log = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH)
+        log.INDEX_STRIDE = 16
+        # the sidecar file can't be written
+        log.index_file_path = os.path.join('missing_directory', 'test_rate_log.idx')
+
+        self.assertEqual(rates[100:200], log.read_range(rates.end_time[100], rates.end_time[200]))
+        self.assertFalse(os.path.isfile(log.index_file_path))
+        self.assertListEqual(list(rates.end_time[::16]), list(log._read_index()[3]))
+        self.assertEqual(rates[600:], log.read_range(rates.end_time[600], 2 ** 40))
+
+    def test_append_drops_old_rates(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+
+        self.assertEqual(100, log.append(rates[:100]))
+        self.assertEqual(50, log.append(rates[50:150]))
+        self.assertEqual(0, log.append(rates[:150]))
+
+        self.assertEqual(rates[:150], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+        os.remove(self.RATE_LOG_FILE_PATH)
+
+    def test_append_nothing_creates_log(self):
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+
+        self.assertEqual(0, log.append([]))
+        self.assertTrue(os.path.isfile(self.RATE_LOG_FILE_PATH))
+        self.assertEqual(0, len(GDAXRateLog(self.RATE_LOG_FILE_PATH).read()))
+        self.assertIsNone(log.last_end_time())
+        os.remove(self.RATE_LOG_FILE_PATH)
+
+    def test_append_keeps_tail(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        log.TAIL_SIZE = 100
+
+        for start in range(0, len(rates), 30):
+            log.append(rates[start:start + 30])
+
+        self.assertEqual(rates[-100:], log.gdax_rates)
+        os.remove(self.RATE_LOG_FILE_PATH)
+
+
+class TestGDAXRateLogWriter(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv'
+    RATE_LOG_FILE_PATH = 'test_rate_log_writer.csv'
+
+    @classmethod
+    def setUpClass(cls):
+        TestGDAXRateLogWriter.rates = GDAXRateLog(TestGDAXRateLogWriter.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    def tearDown(self):
+        for file_path in [self.RATE_LOG_FILE_PATH, self.RATE_LOG_FILE_PATH + '.idx']:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def _count_rows(self):
+        if not os.path.isfile(self.RATE_LOG_FILE_PATH):
+            return 0
+        with open(self.RATE_LOG_FILE_PATH) as csv_file:
+            return sum(1 for _ in csv_file) - 1
+
+    def test_write_overlapping_pages(self):
+        rates = self.rates
+        with GDAXRateLogWriter(GDAXRateLog(self.RATE_LOG_FILE_PATH)) as writer:
+            self.assertEqual(100, writer.write(rates[:100]))
+            self.assertEqual(100, writer.write(rates[50:200]))
+            self.assertEqual(0, writer.write(rates[150:200].to_rates()))
+            # pages of the API come newest first
+            self.assertEqual(10, writer.write(rates[190:210][::-1]))
+            self.assertEqual(rates.end_time[209], writer.last_end_time)
+
+        self.assertEqual(rates[:210], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+        # candles already in the log aren't written by a new writer either
+        with GDAXRateLogWriter(GDAXRateLog(self.RATE_LOG_FILE_PATH)) as writer:
+            self.assertEqual(10, writer.write(rates[200:220]))
+        self.assertEqual(rates[:220], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+    def test_flush_on_buffer_size(self):
+        with GDAXRateLogWriter(GDAXRateLog(self.RATE_LOG_FILE_PATH), buffer_size=50) as writer:
+            writer.write(self.rates[:30])
+            self.assertEqual(0, self._count_rows())
+            writer.write(self.rates[30:60])
+            self.assertEqual(60, self._count_rows())
+            writer.write(self.rates[60:70])
+            self.assertEqual(60, self._count_rows())
+            writer.flush()
+            self.assertEqual(70, self._count_rows())
+
+    def test_flush_on_interval(self):
+        now = [0]
+        with GDAXRateLogWriter(GDAXRateLog(self.RATE_LOG_FILE_PATH), flush_interval=60,
+                               clock=lambda: now[0]) as writer:
+            writer.write(self.rates[:1])
+            now[0] = 59
+            writer.write(self.rates[1:2])
+            self.assertEqual(0, self._count_rows())
+            now[0] = 60
+            writer.write(self.rates[2:3])
+            self.assertEqual(3, self._count_rows())
+
+            # nothing to flush, the interval starts with the next buffered rate
+            now[0] = 200
+            writer.write(self.rates[:3])
+            writer.write(self.rates[3:4])
+            self.assertEqual(3, self._count_rows())
+
+        self.assertEqual(self.rates[:4], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+    def test_fsync(self):
+        with mock.patch('os.fsync') as fsync:
+            with GDAXRateLogWriter(GDAXRateLog(self.RATE_LOG_FILE_PATH), buffer_size=10, fsync=True) as writer:
+                writer.write(self.rates[:25])
+                writer.write(self.rates[25:30])
+            self.assertEqual(2, fsync.call_count)
+
+            with GDAXRateLogWriter(GDAXRateLog(self.RATE_LOG_FILE_PATH)) as writer:
+                writer.write(self.rates[30:40])
+            self.assertEqual(2, fsync.call_count)
+
+    def test_tail_is_bounded(self):
+        with GDAXRateLogWriter(GDAXRateLog(self.RATE_LOG_FILE_PATH), buffer_size=100, tail_size=50) as writer:
+            for start in range(0, len(self.rates), 7):
+                writer.write(self.rates[start:start + 7])
+                self.assertLessEqual(len(writer.tail), 50)
+
+            self.assertEqual(self.rates[-50:], writer.tail)
+        self.assertEqual(self.rates, GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+    def test_index_is_updated_on_flush(self):
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        log.INDEX_STRIDE = 16
+        log.append(self.rates[:100])
+        log.build_index()
+
+        with GDAXRateLogWriter(log, buffer_size=100) as writer:
+            writer.write(self.rates[100:300])
+            self.assertEqual(self.rates[250:300], log.read_range(self.rates.end_time[250], 2 ** 40))
+            writer.write(self.rates[300:])
+
+        self.assertEqual(self.rates[600:], log.read_range(self.rates.end_time[600], 2 ** 40))
+
 
 if __name__ == '__main__':
     unittest.main()
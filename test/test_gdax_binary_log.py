@@ -0,0 +1,91 @@
+import unittest
+import os
+import numpy as np
+from bitcoin_forecast import GDAXBinaryRateLog, GDAXRateLog
+
+
+class TestGDAXBinaryRateLog(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATHS = ['../bitcoin_forecast/resources/test_rate_log_2017_05.csv',
+                                    '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv']
+    BINARY_RATE_LOG_FILE_PATH = 'test_rate_log.bin'
+    CSV_RATE_LOG_FILE_PATH = 'test_rate_log_from_binary.csv'
+
+    @classmethod
+    def setUpClass(cls):
+        TestGDAXBinaryRateLog.rates = GDAXRateLog(TestGDAXBinaryRateLog.EXISTING_RATE_LOG_FILE_PATHS[1]).read()
+
+    def tearDown(self):
+        for file_path in [self.BINARY_RATE_LOG_FILE_PATH, self.BINARY_RATE_LOG_FILE_PATH + '.tmp',
+                          self.CSV_RATE_LOG_FILE_PATH]:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def test_csv_round_trip(self):
+        for csv_file_path in self.EXISTING_RATE_LOG_FILE_PATHS:
+            log = GDAXBinaryRateLog.from_csv(csv_file_path, self.BINARY_RATE_LOG_FILE_PATH, 'BTC-USD')
+            log.to_csv(self.CSV_RATE_LOG_FILE_PATH)
+
+            original_rates = GDAXRateLog(csv_file_path).read()
+            self.assertEqual(60 * 60, log.granularity)
+            self.assertEqual(original_rates, log.read())
+            self.assertEqual(original_rates, GDAXRateLog(self.CSV_RATE_LOG_FILE_PATH).read())
+
+            self.tearDown()
+
+    def test_header(self):
+        GDAXBinaryRateLog(self.BINARY_RATE_LOG_FILE_PATH, 'ETH-USD', 60).append(self.rates[:3])
+
+        log = GDAXBinaryRateLog(self.BINARY_RATE_LOG_FILE_PATH)
+        self.assertEqual('ETH-USD', log.product_id)
+        self.assertEqual(60, log.granularity)
+        self.assertEqual(3, len(log))
+        self.assertEqual(GDAXBinaryRateLog.HEADER_DTYPE.itemsize + 3 * GDAXBinaryRateLog.RECORD_DTYPE.itemsize,
+                         os.path.getsize(self.BINARY_RATE_LOG_FILE_PATH))
+
+        with self.assertRaises(ValueError):
+            GDAXBinaryRateLog(self.BINARY_RATE_LOG_FILE_PATH, 'BTC-USD')
+
+    def test_read_is_memory_mapped(self):
+        log = GDAXBinaryRateLog(self.BINARY_RATE_LOG_FILE_PATH, 'BTC-USD', 60 * 60)
+        log.append(self.rates)
+
+        rates = log.read()
+        self.assertIsInstance(rates.timestamps.base, np.memmap)
+        self.assertEqual(self.rates, rates)
+
+    def test_append_keeps_end_time_order(self):
+        log = GDAXBinaryRateLog(self.BINARY_RATE_LOG_FILE_PATH, 'BTC-USD', 60 * 60)
+        log.append(self.rates[100:200])
+        log.append(self.rates[200:])
+        log.append(self.rates[:150])
+
+        self.assertEqual(self.rates, log.read())
+        self.assertFalse(os.path.isfile(self.BINARY_RATE_LOG_FILE_PATH + '.tmp'))
+
+    def test_read_range(self):
+        log = GDAXBinaryRateLog(self.BINARY_RATE_LOG_FILE_PATH, 'BTC-USD', 60 * 60)
+        log.append(self.rates)
+
+        september = log.read_range('2017-09-10 00:00:00', '2017-09-12 00:00:00')
+        self.assertEqual(48, len(september))
+        self.assertEqual(self.rates[(self.rates.end_time >= 1505001600) & (self.rates.end_time < 1505174400)],
+                         september)
+        self.assertEqual(0, len(log.read_range(1505174400, 1505001600)))
+
+    def test_interrupted_append_is_invisible(self):
+        log = GDAXBinaryRateLog(self.BINARY_RATE_LOG_FILE_PATH, 'BTC-USD', 60 * 60)
+        log.append(self.rates[:10])
+
+        # records written, but the header was never updated
+        with open(self.BINARY_RATE_LOG_FILE_PATH, 'ab') as log_file:
+            log_file.write(log._to_records(self.rates[10:20]).tobytes()[:-7])
+
+        self.assertEqual(self.rates[:10], log.read())
+
+        log.append(self.rates[10:30])
+        self.assertEqual(self.rates[:30], log.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
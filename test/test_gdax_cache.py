@@ -0,0 +1,74 @@
+import unittest
+import os
+import shutil
+from bitcoin_forecast import GDAXApi, GDAXPageCache, GDAXRateLog
+from .gdax_stub_server import StubGDAXServer
+
+
+class TestGDAXPageCache(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_05.csv'
+    CACHE_DIRECTORY = 'test_page_cache'
+
+    START = '2017-05-01T00:00:00.000Z'
+    END = '2017-06-01T00:00:00.000Z'
+    NOW = 1500000000
+
+    @classmethod
+    def setUpClass(cls):
+        TestGDAXPageCache.rates = GDAXRateLog(TestGDAXPageCache.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    def tearDown(self):
+        shutil.rmtree(self.CACHE_DIRECTORY, ignore_errors=True)
+
+    def test_repeated_fetch_uses_cache(self):
+        cache = GDAXPageCache(self.CACHE_DIRECTORY, clock=lambda: self.NOW)
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            api = GDAXApi(server.url, requests_per_second=None, cache=cache)
+            rates = api.get_historic_rates('BTC-USD', self.START, self.END)
+            self.assertEqual(4, len(server.requests))
+            self.assertEqual((0, 4), (cache.hits, cache.misses))
+
+            # a new process with the same cache directory
+            api = GDAXApi(server.url, requests_per_second=None, cache=GDAXPageCache(self.CACHE_DIRECTORY))
+            self.assertEqual(rates, api.get_historic_rates('BTC-USD', self.START, self.END))
+            self.assertEqual(4, len(server.requests))
+            self.assertEqual((4, 0), (api.cache.hits, api.cache.misses))
+
+    def test_open_window_is_not_cached(self):
+        # 2017-05-26 00:30:00, the last page ends with an open candle
+        cache = GDAXPageCache(self.CACHE_DIRECTORY, clock=lambda: 1495758600)
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            api = GDAXApi(server.url, requests_per_second=None, cache=cache)
+            api.get_historic_rates('BTC-USD', self.START, '2017-05-26T00:00:00.000Z')
+            api.get_historic_rates('BTC-USD', self.START, '2017-05-26T00:00:00.000Z')
+
+            self.assertEqual(2, len(os.listdir(self.CACHE_DIRECTORY)))
+            self.assertEqual(3 + 1, len(server.requests))
+            self.assertEqual((2, 4), (cache.hits, cache.misses))
+
+    def test_eviction(self):
+        cache = GDAXPageCache(self.CACHE_DIRECTORY, clock=lambda: self.NOW)
+        page = [[1493596800 + 60 * index, 1, 2, 1, 2, 10] for index in range(100)]
+
+        cache.put('BTC-USD', '2017-05-01 00:00:00', '2017-05-01 01:00:00', 60, page)
+        page_size = cache.size
+        cache.max_bytes = 2 * page_size
+        cache.put('BTC-USD', '2017-05-01 01:00:00', '2017-05-01 02:00:00', 60, page)
+        os.utime(cache._get_file_path('BTC-USD', '2017-05-01 01:00:00', '2017-05-01 02:00:00', 60), (0, 0))
+        cache.put('BTC-USD', '2017-05-01 02:00:00', '2017-05-01 03:00:00', 60, page)
+
+        self.assertEqual(2 * page_size, cache.size)
+        self.assertEqual(page, cache.get('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-05-01T01:00:00.000Z', 60))
+        self.assertIsNone(cache.get('BTC-USD', '2017-05-01 01:00:00', '2017-05-01 02:00:00', 60))
+        self.assertEqual(page, cache.get('BTC-USD', '2017-05-01 02:00:00', '2017-05-01 03:00:00', 60))
+
+        cache.clear()
+        self.assertEqual(0, cache.size)
+        self.assertEqual([], os.listdir(self.CACHE_DIRECTORY))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import calendar
+from bitcoin_forecast import GDAXRate, GDAXRateLog, GDAXRateResampler
+from bitcoin_forecast.gdax_resample import resample
+
+
+class TestGDAXRateResampler(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv'
+
+    @classmethod
+    def setUpClass(cls):
+        TestGDAXRateResampler.rates = GDAXRateLog(TestGDAXRateResampler.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    @staticmethod
+    def _resample_rows(gdax_rates, granularity):
+        buckets = {}
+        for rate in gdax_rates:
+            start_time = calendar.timegm(rate.start_time.utctimetuple())
+            buckets.setdefault(start_time // granularity * granularity, []).append(rate)
+
+        return [GDAXRate(start_time, start_time + granularity,
+                         min(rate.lowest_price for rate in rates), max(rate.highest_price for rate in rates),
+                         rates[0].opening_price, rates[-1].closing_price,
+                         sum(rate.volume_of_trading for rate in rates))
+                for start_time, rates in sorted(buckets.items())]
+
+    def test_resample(self):
+        for granularity in [60 * 60, 6 * 60 * 60, 24 * 60 * 60]:
+            expected = self._resample_rows(self.rates, granularity)
+            actual = resample(self.rates, granularity).to_rates()
+
+            self.assertEqual(len(expected), len(actual))
+            for expected_rate, actual_rate in zip(expected, actual):
+                self.assertEqual(expected_rate.start_time, actual_rate.start_time)
+                self.assertEqual(expected_rate.end_time, actual_rate.end_time)
+                self.assertEqual(expected_rate.closing_price, actual_rate.closing_price)
+                self.assertAlmostEqual(expected_rate.volume_of_trading, actual_rate.volume_of_trading)
+
+        daily_rates = resample(self.rates, 24 * 60 * 60)
+        self.assertEqual(29, len(daily_rates))
+        self.assertEqual(4743.94, daily_rates[0].opening_price)
+        self.assertEqual(self.rates.prices[-1], daily_rates[-1].closing_price)
+
+    def test_granularity_needs_to_be_a_multiple(self):
+        with self.assertRaises(ValueError):
+            resample(self.rates, 90 * 60)
+
+    def test_incremental_update(self):
+        granularity = 6 * 60 * 60
+        resampler = GDAXRateResampler(granularity, self.rates[:100])
+
+        for start in range(100, len(self.rates), 7):
+            changed_rates = resampler.update(self.rates[start:start + 7])
+            self.assertLessEqual(len(changed_rates), 3)
+
+        self.assertEqual(resample(self.rates, granularity), resampler.gdax_rates)
+        self.assertLessEqual(len(resampler._tail), 6)
+
+        with self.assertRaises(ValueError):
+            resampler.update(self.rates[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()
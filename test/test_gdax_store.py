@@ -0,0 +1,134 @@
+import unittest
+import os
+import shutil
+from bitcoin_forecast import GDAXRateLog, GDAXRateSeries, GDAXRateStore
+from bitcoin_forecast.metrics import PrometheusMetrics, set_metrics
+
+
+class TestGDAXRateStore(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATHS = ['../bitcoin_forecast/resources/test_rate_log_2017_05.csv',
+                                    '../bitcoin_forecast/resources/test_rate_log_2017_sep.csv']
+    STORE_DIRECTORY = 'test_rate_store'
+
+    # 2017-06-01 00:00:00
+    JUNE = 1496275200
+    NOW = 1510000000
+
+    @classmethod
+    def setUpClass(cls):
+        TestGDAXRateStore.rates = GDAXRateSeries.concatenate([GDAXRateLog(file_path).read() for file_path
+                                                              in TestGDAXRateStore.EXISTING_RATE_LOG_FILE_PATHS])
+
+    def tearDown(self):
+        if os.path.isdir(self.STORE_DIRECTORY):
+            shutil.rmtree(self.STORE_DIRECTORY)
+
+    def _create_store(self, **kwargs):
+        return GDAXRateStore(self.STORE_DIRECTORY, clock=lambda: self.NOW, **kwargs)
+
+    def test_append_and_read(self):
+        store = self._create_store()
+
+        self.assertEqual(2, store.append('BTC-USD', 60 * 60, self.rates))
+        store.append('ETH-USD', 60 * 60, self.rates[:100])
+
+        self.assertEqual(self.rates, store.read('BTC-USD', 60 * 60))
+        self.assertEqual(self.rates[:100], store.read('ETH-USD', 60 * 60))
+        self.assertEqual(0, len(store.read('BTC-USD', 60)))
+        self.assertListEqual(['BTC-USD', 'ETH-USD'], store.get_product_ids())
+        self.assertTrue(os.path.isfile(os.path.join(self.STORE_DIRECTORY, 'BTC-USD', '3600', '2017-05.0.csv')))
+
+        # the manifest is read by a new store
+        self.assertEqual(self.rates[:100], GDAXRateStore(self.STORE_DIRECTORY).read('ETH-USD', 60 * 60))
+
+    def test_rates_belong_to_month_they_start_in(self):
+        store = self._create_store()
+        store.append('BTC-USD', 60 * 60, self.rates)
+
+        may = store.get_files('BTC-USD', 60 * 60, end=self.JUNE)
+        self.assertEqual(1, len(may))
+        self.assertEqual('2017-05', may[0]['month'])
+        self.assertEqual(self.JUNE, may[0]['last_end_time'])
+        self.assertEqual(744, may[0]['rows'])
+
+    def test_read_prunes_files(self):
+        metrics = PrometheusMetrics()
+        previous_metrics = set_metrics(metrics)
+        try:
+            store = self._create_store()
+            store.append('BTC-USD', 60 * 60, self.rates)
+            store.append('ETH-USD', 60 * 60, self.rates)
+
+            september = store.read('BTC-USD', 60 * 60, '2017-09-10 00:00:00', '2017-09-12 00:00:00')
+        finally:
+            set_metrics(previous_metrics)
+
+        self.assertEqual(48, len(september))
+        self.assertEqual(self.rates[(self.rates.end_time >= september.end_time[0]) &
+                                    (self.rates.end_time <= september.end_time[-1])], september)
+        self.assertEqual(1, metrics.get_counter('gdax_rate_store_files_read_total'))
+        self.assertEqual(1, metrics.get_counter('gdax_rate_store_files_pruned_total'))
+
+    def test_scan(self):
+        store = self._create_store(max_workers=4)
+        for product_id in ['BTC-USD', 'BTC-EUR', 'ETH-USD', 'LTC-USD']:
+            store.append(product_id, 60 * 60, self.rates)
+
+        results = store.scan(['BTC-USD', 'ETH-USD', 'LTC-USD'], 60 * 60, self.JUNE)
+        self.assertListEqual(['BTC-USD', 'ETH-USD', 'LTC-USD'], list(results))
+        for gdax_rates in results.values():
+            self.assertEqual(self.rates[self.rates.end_time >= self.JUNE], gdax_rates)
+
+        self.assertEqual(4, len(store.scan(None, 60 * 60)))
+
+    def test_overlapping_fragments(self):
+        store = self._create_store()
+        store.append('BTC-USD', 60 * 60, self.rates[:500])
+        store.append('BTC-USD', 60 * 60, self.rates[400:900])
+        store.append('BTC-USD', 60 * 60, self.rates[850:])
+
+        self.assertEqual(1 + 2 + 1, len(store.get_files()))
+        self.assertEqual(self.rates, store.read('BTC-USD', 60 * 60))
+        self.assertEqual(self.rates[450:460], store.read('BTC-USD', 60 * 60, self.rates.end_time[450],
+                                                         self.rates.end_time[460]))
+
+    def test_compact(self):
+        store = self._create_store(compression='lzma')
+        store.append('BTC-USD', 60 * 60, self.rates[:500])
+        store.append('BTC-USD', 60 * 60, self.rates[400:900])
+        store.append('BTC-USD', 60 * 60, self.rates[850:])
+
+        self.assertEqual(2, store.compact())
+        self.assertListEqual(['BTC-USD/3600/2017-05.csv.xz', 'BTC-USD/3600/2017-09.csv.xz'],
+                             [entry['file'] for entry in store.get_files()])
+        self.assertListEqual(['2017-05.csv.xz', '2017-09.csv.xz'],
+                             sorted(os.listdir(os.path.join(self.STORE_DIRECTORY, 'BTC-USD', '3600'))))
+        self.assertEqual(self.rates, store.read('BTC-USD', 60 * 60))
+        self.assertEqual(self.rates, GDAXRateStore(self.STORE_DIRECTORY).read('BTC-USD', 60 * 60))
+
+        # nothing left to do
+        self.assertEqual(0, store.compact())
+
+    def test_compact_keeps_recent_partitions_uncompressed(self):
+        store = self._create_store()
+        store.append('BTC-USD', 60 * 60, self.rates[:500])
+        store.append('BTC-USD', 60 * 60, self.rates[500:])
+
+        # a day after September ended, it isn't cold yet
+        store._clock = lambda: 1506816000 + 24 * 60 * 60
+        self.assertEqual(2, store.compact())
+        self.assertListEqual(['BTC-USD/3600/2017-05.csv.gz', 'BTC-USD/3600/2017-09.csv'],
+                             [entry['file'] for entry in store.get_files()])
+
+        # new fragments are merged into the partition, which is compressed once it's cold
+        store.append('BTC-USD', 60 * 60, self.rates[-10:])
+        store._clock = lambda: self.NOW
+        self.assertEqual(1, store.compact())
+        self.assertListEqual(['BTC-USD/3600/2017-05.csv.gz', 'BTC-USD/3600/2017-09.csv.gz'],
+                             [entry['file'] for entry in store.get_files()])
+        self.assertEqual(self.rates, store.read('BTC-USD', 60 * 60))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import os
+from bitcoin_forecast import GDAXApi, GDAXApiError, GDAXRateLog, GDAXRateLogSync, GDAXBinaryRateLog
+from .gdax_stub_server import StubGDAXServer
+
+
+class TestGDAXRateLogSync(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_05.csv'
+    RATE_LOG_FILE_PATH = 'test_rate_log_sync.csv'
+    BINARY_RATE_LOG_FILE_PATH = 'test_rate_log_sync.bin'
+
+    # 2017-05-01 00:00:00 .. 2017-06-01 00:00:00
+    START = 1493596800
+    END = 1496275200
+    NOW = 1500000000
+
+    @classmethod
+    def setUpClass(cls):
+        TestGDAXRateLogSync.rates = GDAXRateLog(TestGDAXRateLogSync.EXISTING_RATE_LOG_FILE_PATH).read()
+
+    def tearDown(self):
+        for file_path in [self.RATE_LOG_FILE_PATH, self.BINARY_RATE_LOG_FILE_PATH]:
+            for suffix in ['', '.idx', '.sync', '.tmp']:
+                if os.path.isfile(file_path + suffix):
+                    os.remove(file_path + suffix)
+
+    def _create_sync(self, server, log=None, **kwargs):
+        api = GDAXApi(server.url, requests_per_second=None, backoff=0.01, max_retries=0)
+        api.MAX_NUM_DATA_POINTS_PER_PAGE = 24
+        return GDAXRateLogSync(api, log or GDAXRateLog(self.RATE_LOG_FILE_PATH), clock=lambda: self.NOW, **kwargs)
+
+    def test_sync_empty_log(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            sync = self._create_sync(server)
+
+            self.assertEqual(len(self.rates), sync.sync('BTC-USD', self.START, self.END))
+            self.assertEqual(self.rates, GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+            self.assertEqual(31, len(server.requests))
+
+    def test_sync_empty_file(self):
+        open(self.RATE_LOG_FILE_PATH, 'w').close()
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            sync = self._create_sync(server)
+            self.assertIsNone(sync.log.last_end_time())
+
+            self.assertEqual(len(self.rates), sync.sync('BTC-USD', self.START, self.END))
+            self.assertEqual(self.rates, GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+    def test_sync_fills_gaps_only(self):
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        log.append(self.rates[:100])
+        log.append(self.rates[110:700])
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            sync = self._create_sync(server)
+            self.assertListEqual([(self.rates.start_time[100], self.rates.start_time[110]),
+                                  (self.rates.start_time[700], self.END)],
+                                 sync.find_gaps(self.START, self.END, 60 * 60))
+
+            self.assertEqual(10 + 44, sync.sync('BTC-USD', self.START, self.END))
+            self.assertEqual(self.rates, GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+            self.assertEqual(1 + 2, len(server.requests))
+
+            # nothing left to do
+            self.assertEqual(0, sync.sync('BTC-USD', self.START, self.END))
+            self.assertEqual(3, len(server.requests))
+
+    def test_sync_skips_open_candles(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            sync = self._create_sync(server)
+            sync._clock = lambda: self.rates.end_time[9] + 59 * 60
+
+            self.assertEqual(10, sync.sync('BTC-USD', self.START, self.END))
+            self.assertEqual(self.rates[:10], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+    def test_sync_remembers_empty_periods(self):
+        rates_with_outage = self.rates[(self.rates.end_time <= self.rates.end_time[200]) |
+                                       (self.rates.end_time > self.rates.end_time[250])]
+
+        with StubGDAXServer({'BTC-USD': rates_with_outage}) as server:
+            sync = self._create_sync(server)
+            sync.sync('BTC-USD', self.START, self.END)
+            num_of_requests = len(server.requests)
+
+            self.assertEqual(rates_with_outage, GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+            self.assertEqual([], sync.find_gaps(self.START, self.END, 60 * 60, sync._read_state('BTC-USD', 60 * 60)))
+            self.assertEqual(0, sync.sync('BTC-USD', self.START, self.END))
+            self.assertEqual(num_of_requests, len(server.requests))
+
+            with self.assertRaises(ValueError):
+                sync.sync('ETH-USD', self.START, self.END)
+
+    def test_sync_refetches_unpublished_candles(self):
+        with StubGDAXServer({'BTC-USD': self.rates[:99]}) as server:
+            sync = self._create_sync(server)
+            sync._clock = lambda: self.rates.end_time[99] + 10 * 60
+
+            self.assertEqual(99, sync.sync('BTC-USD', self.START, self.END))
+            self.assertEqual([], sync._read_state('BTC-USD', 60 * 60))
+
+            # the candle is published before the next sync
+            server.rates_by_product['BTC-USD'] = self.rates[:100]
+            self.assertEqual(1, sync.sync('BTC-USD', self.START, self.END))
+            self.assertEqual(self.rates[:100], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+    def test_sync_resumes_after_failure(self):
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            sync = self._create_sync(server, pages_per_chunk=5)
+            server.failures = [None] * 12 + [(400, {}, {'message': 'Stub error'})]
+
+            with self.assertRaises(GDAXApiError):
+                sync.sync('BTC-USD', self.START, self.END)
+            self.assertEqual(self.rates[:10 * 24], GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+
+            sync.sync('BTC-USD', self.START, self.END)
+            self.assertEqual(self.rates, GDAXRateLog(self.RATE_LOG_FILE_PATH).read())
+            self.assertEqual(13 + 21, len(server.requests))
+
+    def test_sync_binary_log(self):
+        log = GDAXBinaryRateLog(self.BINARY_RATE_LOG_FILE_PATH, 'BTC-USD', 60 * 60)
+        log.append(self.rates[300:400])
+
+        with StubGDAXServer({'BTC-USD': self.rates}) as server:
+            self._create_sync(server, log).sync('BTC-USD', self.START, self.END)
+
+            self.assertEqual(self.rates, log.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import os
+import subprocess
+import sys
+
+
+class TestLazyImports(unittest.TestCase):
+
+    ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    EXISTING_RATE_LOG_FILE_PATH = os.path.join(ROOT_PATH, 'bitcoin_forecast', 'resources',
+                                               'test_rate_log_2017_sep.csv')
+
+    @classmethod
+    def _get_loaded_modules(cls, code):
+        # a fresh interpreter, modules imported by other tests don't count
+        script = 'import sys\n{}\nprint(" ".join(sorted(sys.modules)))'.format(code)
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=cls.ROOT_PATH,
+                                         env=dict(os.environ, PYTHONPATH=cls.ROOT_PATH))
+        return set(output.decode().split())
+
+    def test_rate_log_does_not_import_models(self):
+        modules = self._get_loaded_modules('import bitcoin_forecast\n'
+                                           'rates = bitcoin_forecast.GDAXRateLog({!r}).read()\n'
+                                           'assert len(rates) == 694'.format(self.EXISTING_RATE_LOG_FILE_PATH))
+
+        self.assertIn('bitcoin_forecast.gdax_api', modules)
+        self.assertNotIn('bitcoin_forecast.btc_forecast', modules)
+        self.assertNotIn('sklearn', modules)
+        self.assertNotIn('scipy', modules)
+        self.assertNotIn('requests', modules)
+
+    def test_from_import(self):
+        modules = self._get_loaded_modules('from bitcoin_forecast import GDAXRateSeries, GDAXBinaryRateLog')
+
+        self.assertNotIn('sklearn', modules)
+        self.assertNotIn('requests', modules)
+
+    def test_models_are_imported_when_used(self):
+        modules = self._get_loaded_modules('from bitcoin_forecast import BTCForecast, GDAXApi\n'
+                                           'GDAXApi()')
+
+        self.assertIn('sklearn', modules)
+        self.assertIn('requests', modules)
+
+    def test_unknown_name(self):
+        import bitcoin_forecast
+
+        with self.assertRaises(AttributeError):
+            bitcoin_forecast.GDAXUnknown
+        self.assertIn('BTCForecast', dir(bitcoin_forecast))
+
+
+if __name__ == '__main__':
+    unittest.main()
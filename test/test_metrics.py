@@ -0,0 +1,137 @@
+import unittest
+import logging
+import os
+import socket
+from unittest import mock
+from bitcoin_forecast import GDAXApi, GDAXRateLog, BTCForecast
+from bitcoin_forecast.metrics import Metrics, PrometheusMetrics, StatsDMetrics, get_metrics, set_metrics
+from .gdax_stub_server import StubGDAXServer
+
+
+class TestMetrics(unittest.TestCase):
+
+    EXISTING_RATE_LOG_FILE_PATH = '../bitcoin_forecast/resources/test_rate_log_2017_05.csv'
+    RATE_LOG_FILE_PATH = 'test_rate_log_metrics.csv'
+
+    def setUp(self):
+        self.metrics = PrometheusMetrics()
+        self.previous_metrics = set_metrics(self.metrics)
+
+    def tearDown(self):
+        set_metrics(self.previous_metrics)
+        for file_path in [self.RATE_LOG_FILE_PATH, self.RATE_LOG_FILE_PATH + '.idx']:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def test_default_metrics(self):
+        set_metrics(None)
+        metrics = get_metrics()
+
+        self.assertIs(Metrics, type(metrics))
+        with metrics.timer('noop_seconds') as timer:
+            metrics.increment('noop_total')
+            metrics.observe('noop_rows', 10)
+        self.assertIsNotNone(timer)
+
+    def test_prometheus_render(self):
+        self.metrics.increment('requests_total', tags={'status': 200})
+        self.metrics.increment('requests_total', 2, tags={'status': 200})
+        self.metrics.increment('requests_total', tags={'status': 'error'})
+        self.metrics.observe('request_seconds', 0.003)
+        self.metrics.observe('request_seconds', 0.005)
+        self.metrics.observe('fetch_pages', 4)
+
+        text = self.metrics.render()
+        self.assertIn('# TYPE requests_total counter\n', text)
+        self.assertIn('requests_total{status="200"} 3\n', text)
+        self.assertIn('requests_total{status="error"} 1\n', text)
+        self.assertIn('# TYPE request_seconds histogram\n', text)
+        self.assertIn('request_seconds_bucket{le="0.0025"} 0\n', text)
+        self.assertIn('request_seconds_bucket{le="0.005"} 2\n', text)
+        self.assertIn('request_seconds_bucket{le="+Inf"} 2\n', text)
+        self.assertIn('request_seconds_sum 0.008\n', text)
+        self.assertIn('request_seconds_count 2\n', text)
+        self.assertIn('fetch_pages_bucket{le="1"} 0\n', text)
+        self.assertIn('fetch_pages_bucket{le="10"} 1\n', text)
+
+    def test_statsd(self):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(5)
+        metrics = StatsDMetrics(port=receiver.getsockname()[1], prefix='test.')
+
+        try:
+            metrics.increment('requests_total', tags={'status': 200})
+            metrics.observe('request_seconds', 0.25)
+            metrics.observe('fetch_rows', 200)
+
+            self.assertEqual(b'test.requests_total:1|c|#status:200', receiver.recv(1024))
+            self.assertEqual(b'test.request:250|ms', receiver.recv(1024))
+            self.assertEqual(b'test.fetch_rows:200|h', receiver.recv(1024))
+        finally:
+            metrics.close()
+            receiver.close()
+
+    def test_gdax_api_metrics(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        with StubGDAXServer({'BTC-USD': rates}) as server:
+            server.fail_next(503, headers={'Retry-After': '0'})
+            api = GDAXApi(server.url, requests_per_second=None)
+            api.get_historic_rates('BTC-USD', '2017-05-01T00:00:00.000Z', '2017-06-01T00:00:00.000Z')
+
+        self.assertEqual(4, self.metrics.get_counter('gdax_api_requests_total', {'status': 200}))
+        self.assertEqual(1, self.metrics.get_counter('gdax_api_requests_total', {'status': 503}))
+        self.assertEqual(1, self.metrics.get_counter('gdax_api_retries_total'))
+        self.assertGreater(self.metrics.get_counter('gdax_api_response_bytes_total'), 0)
+        self.assertEqual(4, self.metrics.get_histogram('gdax_api_request_seconds', {'status': 200})[0])
+        self.assertEqual((1, 4), self.metrics.get_histogram('gdax_api_fetch_pages'))
+        self.assertEqual((1, len(rates)), self.metrics.get_histogram('gdax_api_fetch_rows'))
+
+    def test_rate_log_metrics(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        log = GDAXRateLog(self.RATE_LOG_FILE_PATH)
+        log.append(rates)
+
+        self.assertEqual(2 * len(rates), self.metrics.get_counter('gdax_rate_log_read_rows_total') +
+                         self.metrics.get_counter('gdax_rate_log_write_rows_total'))
+        self.assertEqual(1, self.metrics.get_histogram('gdax_rate_log_write_seconds')[0])
+
+        log.read_range('2017-05-02 00:00:00', '2017-05-03 00:00:00')
+        self.assertEqual(2, self.metrics.get_histogram('gdax_rate_log_read_seconds')[0])
+
+    def test_btc_forecast_metrics(self):
+        rates = GDAXRateLog(self.EXISTING_RATE_LOG_FILE_PATH).read()
+        forecast = BTCForecast('NYSTROEM', {'n_components': 50})
+        forecast.learn(rates)
+        forecast.predict(rates[:10])
+
+        tags = {'model_type': 'NYSTROEM'}
+        self.assertEqual(len(rates), self.metrics.get_counter('btc_forecast_learn_samples_total', tags))
+        self.assertEqual(10, self.metrics.get_counter('btc_forecast_predict_samples_total', tags))
+        self.assertEqual(1, self.metrics.get_histogram('btc_forecast_learn_seconds', tags)[0])
+        self.assertEqual(1, self.metrics.get_histogram('btc_forecast_predict_seconds', tags)[0])
+
+    def test_lazy_log_formatting(self):
+        formatted = []
+
+        class RawRates(list):
+            def __repr__(self):
+                formatted.append(self)
+                return list.__repr__(self)
+
+        api = GDAXApi('http://127.0.0.1:1', cache=None)
+        logger = logging.getLogger('GDAXApi')
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            with mock.patch.object(api, '_get', return_value=RawRates([[1496275200, 1, 2, 1, 2, 10]])):
+                api._get_raw_partial_rates('BTC-USD', '2017-06-01 00:00:00', '2017-06-01 01:00:00', 3600)
+            with mock.patch.object(api, '_get', return_value=RawRates([{'id': 'BTC-USD'}])):
+                self.assertEqual(['BTC-USD'], api.get_products())
+            self.assertEqual([], formatted)
+        finally:
+            logger.setLevel(level)
+
+
+if __name__ == '__main__':
+    unittest.main()
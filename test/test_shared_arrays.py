@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from bitcoin_forecast.shared_arrays import SharedArrays
+
+
+class TestSharedArrays(unittest.TestCase):
+
+    def test_shared_with_process(self):
+        x = np.arange(10, dtype=np.int64)
+        y = np.linspace(0, 1, 7)
+
+        with SharedArrays({'x': x, 'y': y[::2]}) as shared_arrays:
+            self.assertListEqual(list(x), list(shared_arrays.arrays['x']))
+            self.assertListEqual(list(y[::2]), list(shared_arrays.arrays['y']))
+
+            with ProcessPoolExecutor(1) as executor:
+                self.assertEqual(x.sum() + y[::2].sum(), executor.submit(_sum, shared_arrays.descriptor).result())
+
+    def test_empty_array(self):
+        with SharedArrays({'x': np.array([])}) as shared_arrays:
+            self.assertEqual(0, len(shared_arrays.arrays['x']))
+
+
+def _sum(descriptor):
+    shared_arrays = SharedArrays.attach(descriptor)
+    total = shared_arrays.arrays['x'].sum() + shared_arrays.arrays['y'].sum()
+    shared_arrays.close()
+    return total
+
+
+if __name__ == '__main__':
+    unittest.main()